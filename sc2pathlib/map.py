@@ -1,13 +1,16 @@
 # noinspection PyUnresolvedReferences
 from .sc2pathlib import Map
 import numpy as np
+from scipy import ndimage
+from concurrent.futures import Executor
 from typing import List, Optional, Tuple, Union
 from .choke import Choke
 from .mappings import MapsType, MapType
+from .path_finder import run_batch, to_int_points
 
 
 class Sc2Map:
-    __slots__ = ['_overlord_spots', '_chokes', 'heuristic_accuracy', 'height_map', '_map']
+    __slots__ = ['_overlord_spots', '_chokes', '_zone_grid', 'heuristic_accuracy', 'height_map', '_map']
 
     def __init__(
         self,
@@ -19,6 +22,7 @@ class Sc2Map:
 
         self._overlord_spots: Optional[List[Tuple[float, float]]] = None
         self._chokes: Optional[List[Choke]] = None
+        self._zone_grid: Optional[np.ndarray] = None
         self.heuristic_accuracy = 1  # Octile distance / set to 2 for optimal accuracy but less performance
 
         self.height_map = height_map
@@ -63,6 +67,7 @@ class Sc2Map:
         Zones start from 1 onwards.
         Zone 0 is empty zone.
         """
+        self._zone_grid = None
         self._map.calculate_zones(sorted_base_locations)
 
     def get_zone(self, position: Tuple[float, float]) -> int:
@@ -71,6 +76,38 @@ class Sc2Map:
         Zone 0 is empty zone.
         """
         return self._map.get_zone(position)
+
+    def zone_grid(self) -> np.ndarray:
+        """
+        Zone index of every grid cell as numpy array indexed with [x][y].
+        Values match `get_zone` for points that round to the cell, 0 is empty zone.
+        The grid is calculated once after `calculate_zones` and then cached.
+        """
+        if self._zone_grid is not None:
+            return self._zone_grid
+
+        # Zone image colors each zone with its own value, every connected area of one color belongs to a single
+        # zone, so the zone only needs to be read once for each area.
+        image = np.array(self._map.draw_zones())
+        _, colors = np.unique(image, return_inverse=True)
+        colors = colors.reshape(image.shape)
+        grid = np.zeros(image.shape, dtype=np.uint8)
+        get_zone = self._map.get_zone
+        for color, region in enumerate(ndimage.find_objects(colors + 1)):
+            if region is None:
+                continue
+            labels, count = ndimage.label(colors[region] == color)
+            values, first_cells = np.unique(labels, return_index=True)
+            zones = np.zeros(count + 1, dtype=np.uint8)
+            for label, cell in zip(values, first_cells):
+                if label == 0:
+                    continue
+                x, y = np.unravel_index(cell, labels.shape)
+                zones[label] = get_zone((int(x + region[0].start), int(y + region[1].start)))
+            area = labels > 0
+            grid[region][area] = zones[labels[area]]
+        self._zone_grid = grid
+        return grid
     
     def calculate_connections(self, start: Tuple[float, float]):
         """
@@ -180,6 +217,71 @@ class Sc2Map:
             return self._map.find_path_large(map_type, start, end, self.heuristic_accuracy)
         return self._map.find_path(map_type, start, end, self.heuristic_accuracy)
 
+    def find_paths_batch(
+        self,
+        map_type: MapType,
+        starts: Union[List[Tuple[float, float]], np.ndarray],
+        ends: Union[List[Tuple[float, float]], np.ndarray],
+        large: bool = False,
+        executor: Optional[Executor] = None,
+        chunk_size: int = 16,
+    ) -> List[Tuple[List[Tuple[int, int]], float]]:
+        """
+        Finds paths ignoring influence for multiple start and end pairs.
+
+        :param starts: Start positions as list of float tuples or numpy array of shape (n, 2)
+        :param ends: End positions as list of float tuples or numpy array of shape (n, 2)
+        :param large: Unit is large and requires path to have width of 2 to pass
+        :param executor: Optional process pool to solve the queries in. Workers search on a snapshot of the
+        pathing grid of the map type, with start and end positions rounded to grid cells.
+        :param chunk_size: Number of queries sent to a worker at a time.
+        :return: List of tuples of points and total distance in the same order as the queries.
+        """
+        if executor is not None and len(starts) > chunk_size:
+            maze = np.array(self._pathing_grid(map_type), dtype=np.uint8)
+            return run_batch(
+                maze, to_int_points(starts), to_int_points(ends), large, self.heuristic_accuracy, executor, chunk_size
+            )
+
+        starts_float = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+        ends_float = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+        assert len(starts_float) == len(ends_float)
+
+        if large:
+            find = self._map.find_path_large
+        else:
+            find = self._map.find_path
+        return [
+            find(map_type, (start[0], start[1]), (end[0], end[1]), self.heuristic_accuracy)
+            for start, end in zip(starts_float.tolist(), ends_float.tolist())
+        ]
+
+    def walk_distances_batch(
+        self,
+        map_type: MapType,
+        starts: Union[List[Tuple[float, float]], np.ndarray],
+        ends: Union[List[Tuple[float, float]], np.ndarray],
+        large: bool = False,
+        executor: Optional[Executor] = None,
+        chunk_size: int = 16,
+    ) -> np.ndarray:
+        """
+        Path distances for multiple start and end pairs, see `find_paths_batch`.
+
+        :return: Array of distances in the same order as the queries, -1 when no path was found.
+        """
+        results = self.find_paths_batch(map_type, starts, ends, large, executor, chunk_size)
+        return np.array([result[1] if len(result[0]) > 0 else -1 for result in results], dtype=np.float64)
+
+    def _pathing_grid(self, map_type: MapType) -> List[List[int]]:
+        if map_type == MapType.Air:
+            return self._map.air_pathing
+        if map_type == MapType.Reaper:
+            return self._map.reaper_pathing
+        if map_type == MapType.Colossus:
+            return self._map.colossus_pathing
+        return self._map.ground_pathing
+
     def find_path_influence(
         self, map_type: MapType, start: Tuple[float, float], end: Tuple[float, float], large: bool = False
     ) -> Tuple[List[Tuple[int, int]], float]:
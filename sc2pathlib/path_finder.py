@@ -1,13 +1,61 @@
 from .sc2pathlib import PathFind
 
 import numpy as np
-from typing import Union, List, Tuple
+from concurrent.futures import Executor
+from typing import Optional, Union, List, Tuple
 
 
 def to_float2(original: Tuple[int, int]) -> Tuple[float, float]:
     return (original[0] + 0.5, original[1] + 0.5)
 
 
+def to_int_points(points: Union[List[Tuple[float, float]], np.ndarray]) -> List[Tuple[int, int]]:
+    """
+    Rounds an array of points to integer tuples the same way as single path queries do.
+    """
+    rounded = np.rint(np.asarray(points, dtype=np.float64).reshape(-1, 2)).astype(int)
+    return [(int(x), int(y)) for x, y in rounded]
+
+
+def find_paths_chunk(
+    maze: np.ndarray, starts: List[Tuple[int, int]], ends: List[Tuple[int, int]], large: bool, heuristic_accuracy: int
+) -> List[Tuple[List[Tuple[int, int]], float]]:
+    """
+    Worker function for batched path queries. The native path finder holds the GIL while searching,
+    so this is meant to be run in a process pool with a snapshot of the grid.
+    """
+    path_find = PathFind(maze)
+    if large:
+        return [path_find.find_path_large(start, end, heuristic_accuracy) for start, end in zip(starts, ends)]
+    return [path_find.find_path(start, end, heuristic_accuracy) for start, end in zip(starts, ends)]
+
+
+def run_batch(
+    maze: np.ndarray,
+    starts: List[Tuple[int, int]],
+    ends: List[Tuple[int, int]],
+    large: bool,
+    heuristic_accuracy: int,
+    executor: Executor,
+    chunk_size: int,
+) -> List[Tuple[List[Tuple[int, int]], float]]:
+    """
+    Splits the queries into chunks, solves them with the executor and returns the results in order.
+    """
+    futures = []
+    for i in range(0, len(starts), chunk_size):
+        futures.append(
+            executor.submit(
+                find_paths_chunk, maze, starts[i : i + chunk_size], ends[i : i + chunk_size], large, heuristic_accuracy
+            )
+        )
+
+    results = []
+    for future in futures:
+        results.extend(future.result())
+    return results
+
+
 class PathFinder:
     def __init__(self, maze: Union[List[List[int]], np.array]):
         """ 
@@ -84,6 +132,54 @@ class PathFinder:
             return self._path_find.find_path_large(start_int, end_int, self.heuristic_accuracy)
         return self._path_find.find_path(start_int, end_int, self.heuristic_accuracy)
 
+    def find_paths_batch(
+        self,
+        starts: Union[List[Tuple[float, float]], np.ndarray],
+        ends: Union[List[Tuple[float, float]], np.ndarray],
+        large: bool = False,
+        executor: Optional[Executor] = None,
+        chunk_size: int = 16,
+    ) -> List[Tuple[List[Tuple[int, int]], float]]:
+        """
+        Finds paths ignoring influence for multiple start and end pairs.
+
+        :param starts: Start positions as list of float tuples or numpy array of shape (n, 2)
+        :param ends: End positions as list of float tuples or numpy array of shape (n, 2)
+        :param large: Unit is large and requires path to have width of 2 to pass
+        :param executor: Optional process pool to solve the queries in. Workers search on a snapshot of the current grid.
+        :param chunk_size: Number of queries sent to a worker at a time.
+        :return: List of tuples of points and total distance in the same order as the queries.
+        """
+        starts_int = to_int_points(starts)
+        ends_int = to_int_points(ends)
+        assert len(starts_int) == len(ends_int)
+
+        if executor is not None and len(starts_int) > chunk_size:
+            maze = np.array(self._path_find.map, dtype=np.uint8)
+            return run_batch(maze, starts_int, ends_int, large, self.heuristic_accuracy, executor, chunk_size)
+
+        if large:
+            find = self._path_find.find_path_large
+        else:
+            find = self._path_find.find_path
+        return [find(start, end, self.heuristic_accuracy) for start, end in zip(starts_int, ends_int)]
+
+    def walk_distances_batch(
+        self,
+        starts: Union[List[Tuple[float, float]], np.ndarray],
+        ends: Union[List[Tuple[float, float]], np.ndarray],
+        large: bool = False,
+        executor: Optional[Executor] = None,
+        chunk_size: int = 16,
+    ) -> np.ndarray:
+        """
+        Path distances for multiple start and end pairs, see `find_paths_batch`.
+
+        :return: Array of distances in the same order as the queries, -1 when no path was found.
+        """
+        results = self.find_paths_batch(starts, ends, large, executor, chunk_size)
+        return np.array([result[1] if len(result[0]) > 0 else -1 for result in results], dtype=np.float64)
+
     def find_path_influence(
         self, start: Tuple[float, float], end: Tuple[float, float], large: bool = False
     ) -> (List[Tuple[int, int]], float):
@@ -22,6 +22,8 @@ class Action:
         self.is_attack = is_attack
         self.ability = ability
         self.is_final = False
+        # Target position is solved later in the frame, see `MicroStep.deferred_move`
+        self.is_deferred = False
         self.debug_comment = debug_comment
 
     def to_commmand(self, unit: Unit) -> bool:
@@ -1,4 +1,4 @@
-from typing import Set, Optional, Dict
+from typing import Set, Optional, Dict, List
 
 from sharpy.general.extended_power import siege
 from sharpy.combat.move_type import MoveType
@@ -46,6 +46,42 @@ class GenericMicro(MicroStep):
 
         return health_percentage < 0.3 or unit.weapon_cooldown < 0  # low hp or unit can't attack
 
+    def retreat_move(self, unit: Unit) -> Action:
+        """ Backstep away from the closest enemy group, solved once for all retreating units of the type. """
+        center = self.closest_group.center
+        return self.deferred_move(
+            ("retreat",),
+            unit,
+            lambda units: self.safe_positions(units, [u.position.towards(center, -3) for u in units], 4),
+        )
+
+    def kite_move(self, unit: Unit) -> Action:
+        """ Move to low influence position in range of the closest enemy, solved once for all kiting units. """
+        return self.deferred_move(("kite",), unit, self._kite_positions)
+
+    def _kite_positions(self, units: Units) -> List[Point2]:
+        targets = [self.closest_units[u.tag] for u in units]
+        ranges = [self.unit_values.real_range(u, t) - 0.5 for u, t in zip(units, targets)]
+        flying = [u.is_flying for u in units]
+
+        air = [i for i, f in enumerate(flying) if f]
+        ground = [i for i, f in enumerate(flying) if not f]
+        positions: List[Optional[Point2]] = [None] * len(units)
+        found = self.pather.find_low_inside_air_batch(
+            [units[i].position for i in air], [targets[i].position for i in air], [ranges[i] for i in air]
+        )
+        for i, position in zip(air, found):
+            positions[i] = position
+        found = self.pather.find_low_inside_ground_batch(
+            [units[i].position for i in ground],
+            [targets[i].position for i in ground],
+            [ranges[i] for i in ground],
+            radius=[units[i].radius for i in ground],
+        )
+        for i, position in zip(ground, found):
+            positions[i] = position
+        return positions
+
     def group_solve_combat(self, units: Units, current_command: Action) -> Action:
         self.model = CombatModel.StalkerToRoach
 
@@ -73,6 +109,8 @@ class GenericMicro(MicroStep):
                     self.model = CombatModel.StalkerToRoach
 
         if self.model == CombatModel.StalkerToSpeedlings and self.closest_group:
+            # Large units such as thors and ultralisks need room to fit in the found position
+            radius = max(unit.radius for unit in units)
             if self.can_engage_ratio < 0.6:
                 # push forward
                 if self.ready_to_attack_ratio > 0.75:
@@ -80,7 +118,9 @@ class GenericMicro(MicroStep):
                 if self.ready_to_attack_ratio < 0.25:
                     return Action(self.center, False)
 
-                best_position = self.pather.find_low_inside_ground(self.center, self.closest_group.center, 6)
+                best_position = self.pather.find_low_inside_ground(
+                    self.center, self.closest_group.center, 6, radius=radius
+                )
 
                 return Action(best_position, False)
             else:
@@ -88,7 +128,9 @@ class GenericMicro(MicroStep):
                     return Action(self.closest_group.center, True)
                 # best_position = self.pather.find_weak_influence_ground(
                 #     self.center.towards(self.closest_group.center, -4), 4)
-                best_position = self.pather.find_low_inside_ground(self.center, self.closest_group.center, 6)
+                best_position = self.pather.find_low_inside_ground(
+                    self.center, self.closest_group.center, 6, radius=radius
+                )
                 return Action(best_position, False)
 
         return current_command
@@ -121,12 +163,7 @@ class GenericMicro(MicroStep):
                 return Action(backstep, False)
 
         if self.should_retreat(unit) and self.closest_group and not self.ready_to_shoot(unit):
-            backstep: Point2 = unit.position.towards(self.closest_group.center, -3)
-            if unit.is_flying:
-                backstep = self.pather.find_weak_influence_air(backstep, 4)
-            else:
-                backstep = self.pather.find_weak_influence_ground(backstep, 4)
-            return Action(backstep, False)
+            return self.retreat_move(unit)
 
         if self.move_type == MoveType.Push and unit.distance_to(current_command.target) > self.min_range(unit):
             # If MoveType.Push and we didn't reach the target we don't care about the combat model
@@ -157,15 +194,7 @@ class GenericMicro(MicroStep):
                 else:
                     current_command = Action(current_command.target, True)
             elif closest:
-                # d = unit.distance_to(closest)
-                range = self.unit_values.real_range(unit, closest) - 0.5
-
-                if unit.is_flying:
-                    best_position = self.pather.find_low_inside_air(unit.position, closest.position, range)
-                else:
-                    best_position = self.pather.find_low_inside_ground(unit.position, closest.position, range)
-
-                return Action(best_position, False)
+                return self.kite_move(unit)
 
         elif self.model == CombatModel.RoachToStalker:
             if self.ready_to_shoot(unit):
@@ -137,7 +137,7 @@ class GroupCombatManager(ManagerBase, ICombatManager):
             if move_type in {MoveType.DefensiveRetreat, MoveType.PanicRetreat}:
                 target = self.pather.find_influence_ground_path(group.center, target, 14)
             else:
-                target = self.pather.find_path(group.center, target, 14)
+                target = self.pather.find_path_background(group.center, target, 14)
 
         own_unit_cache: Dict[UnitTypeId, Units] = {}
 
@@ -154,8 +154,10 @@ class GroupCombatManager(ManagerBase, ICombatManager):
             micro.init_group(self.rules, group, type_units, self.enemy_groups, move_type, original_target)
             group_action = micro.group_solve_combat(type_units, Action(target, is_attack))
 
-            for unit in type_units:
-                final_action = micro.unit_solve_combat(unit, group_action)
+            final_actions = [micro.unit_solve_combat(unit, group_action) for unit in type_units]
+            micro.solve_deferred()
+
+            for unit, final_action in zip(type_units, final_actions):
                 final_action.to_commmand(unit)
 
                 if self.debug:
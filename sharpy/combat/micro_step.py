@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import List, Dict, Optional, TYPE_CHECKING
+from typing import Callable, List, Dict, Optional, Tuple, TYPE_CHECKING
 
 from sharpy.general.extended_power import ExtendedPower
 from sharpy.combat.move_type import MoveType
@@ -51,6 +51,8 @@ class MicroStep(ABC, Component):
         self.enemy_attack_range = 0
 
         self.focus_fired: Dict[int, float] = dict()
+        # Move actions with positions that are solved in a single batch for each query after all units are solved
+        self.deferred: Dict[Tuple, Tuple[Callable[[Units], List[Point2]], List[Unit], List[Action]]] = dict()
 
     async def start(self, knowledge: "Knowledge"):
         await super().start(knowledge)
@@ -75,9 +77,51 @@ class MicroStep(ABC, Component):
         self.our_power = group.power
         self.closest_units.clear()
         self.engaged_power.clear()
+        self.deferred.clear()
 
         self.rules.init_group_func(self, group, units, enemy_groups, move_type)
 
+    def deferred_move(self, key: Tuple, unit: Unit, solve: Callable[[Units], List[Point2]]) -> Action:
+        """
+        Move action to a position that is solved later, in a single batch for all units that request the same query.
+        Positions are set to the actions in `solve_deferred`, until then the action has no target
+        and `is_deferred` is set, so overrides that post-process the action should return it as it is.
+
+        :param key: Identifies the query within the group.
+        :param solve: Solves positions for the units in the same order.
+        """
+        action = Action(None, False)
+        action.is_deferred = True
+        if key not in self.deferred:
+            self.deferred[key] = (solve, [], [])
+        _, units, actions = self.deferred[key]
+        units.append(unit)
+        actions.append(action)
+        return action
+
+    def solve_deferred(self):
+        """ Solves positions of the deferred move actions, one batch for each query. """
+        for solve, units, actions in self.deferred.values():
+            for action, position in zip(actions, solve(Units(units, self.ai))):
+                action.target = position
+                action.is_deferred = False
+        self.deferred.clear()
+
+    def safe_move(self, unit: Unit, radius: float) -> Action:
+        """ Move to lowest influence position near the unit, solved once for all units of the type that request it. """
+        return self.deferred_move(
+            ("safe", radius), unit, lambda units: self.safe_positions(units, [u.position for u in units], radius)
+        )
+
+    def safe_positions(self, units: Units, targets: List[Point2], radius: float) -> List[Point2]:
+        """ Lowest influence positions near the targets, air or ground depending on the unit of each target. """
+        flying = [u.is_flying for u in units]
+        air = self.pather.find_weak_influence_air_batch([t for t, f in zip(targets, flying) if f], radius)
+        ground = self.pather.find_weak_influence_ground_batch([t for t, f in zip(targets, flying) if not f], radius)
+        air_iter = iter(air)
+        ground_iter = iter(ground)
+        return [next(air_iter) if is_flying else next(ground_iter) for is_flying in flying]
+
     def ready_to_shoot(self, unit: Unit) -> bool:
         return self.rules.ready_to_shoot_func(self, unit)
 
@@ -47,8 +47,7 @@ class MicroDisruptor(MicroStep):
 
     def stay_safe(self, unit: Unit, current_command: Action):
         # TODO: Backstep
-        pos = self.pather.find_weak_influence_ground(unit.position, 5)
-        return Action(pos, False)
+        return self.safe_move(unit, 5)
 
 
 class MicroPurificationNova(MicroStep):
@@ -125,8 +125,7 @@ class MicroVoidrays(MicroStep):
         shoot = self.should_shoot(unit)
         if not shoot:
             if self.should_retreat(unit):
-                pos = self.pather.find_weak_influence_air(unit.position, 4)
-                return Action(pos, False)
+                return self.safe_move(unit, 4)
 
         current_command = self.focus_fire(unit, current_command, None)
 
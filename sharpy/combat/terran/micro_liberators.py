@@ -18,6 +18,10 @@ class MicroLiberators(MicroStep):
         return self.final_solve(unit, super().unit_solve_combat(unit, current_command))
 
     def final_solve(self, unit: Unit, command: Action) -> Action:
+        if command.is_deferred:
+            # Retreat position isn't known yet
+            return command
+
         time = self.knowledge.ai.time
         # TODO: When in AG mode, look for relevant enemies inside the sieged zone.
         relevant_ground_enemies = self.cache.enemy_in_range(unit.position, 10).not_structure.not_flying.visible
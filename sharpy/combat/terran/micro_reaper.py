@@ -53,5 +53,4 @@ class MicroReaper(GenericMicro):
 
     def stay_safe(self, unit: Unit, current_command: Action) -> Action:
         """Partial retreat, micro back."""
-        pos = self.pather.find_weak_influence_ground(unit.position, 6)
-        return Action(pos, False)
+        return self.safe_move(unit, 6)
@@ -8,6 +8,10 @@ class MicroVikings(GenericMicro):
         return self.final_solve(unit, super().unit_solve_combat(unit, current_command))
 
     def final_solve(self, unit: Unit, command: Action) -> Action:
+        if command.is_deferred:
+            # Keep retreating or kiting in the current mode, the position isn't known yet
+            return command
+
         is_fighter = unit.type_id == UnitTypeId.VIKINGFIGHTER
         if not self.enemies_near_by:
             if is_fighter:
@@ -49,5 +49,4 @@ class MicroSwarmHosts(MicroStep):
 
     def stay_safe(self, unit: Unit, current_command: Action) -> Action:
         """Partial retreat, micro back."""
-        pos = self.pather.find_weak_influence_ground(unit.position, 5)
-        return Action(pos, False)
+        return self.safe_move(unit, 5)
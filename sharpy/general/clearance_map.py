@@ -0,0 +1,180 @@
+import math
+from typing import List, Optional, Set, Tuple, Union
+
+import numpy as np
+from scipy import ndimage
+
+from sc2.position import Point2
+
+# Clearances are only solved up to this distance, keeps the incremental updates local
+MAX_CLEARANCE = 8
+# When more blocks than this change at once, the whole map is solved again
+FULL_UPDATE_LIMIT = 40
+
+Block = Tuple[int, int, int, int]
+
+
+class ClearanceMap:
+    """
+    Distance from each pathable cell to the edge of the closest unpathable cell, capped at `max_clearance`.
+    A unit with radius r fits in a cell when the clearance of the cell is at least r.
+
+    Blocks are given each frame with `create_block`, the same way as to the path finders. `update` compares them
+    to the blocks of the previous update and only solves the clearance again around the blocks that changed.
+    """
+
+    def __init__(self, pathable: np.ndarray, max_clearance: int = MAX_CLEARANCE):
+        """
+        :param pathable: Pathable cells of the terrain as boolean [x][y] array, without any blocks.
+        :param max_clearance: Clearances larger than this are capped.
+        """
+        self.terrain = pathable.astype(bool)
+        self.max_clearance = max_clearance
+        self.width, self.height = pathable.shape
+        # Incremented every time the clearance changes
+        self.version = 0
+
+        self._block_counts = np.zeros(pathable.shape, dtype=np.int16)
+        self._blocks: Set[Block] = set()
+        self._next_blocks: Set[Block] = set()
+
+        self.pathable = self.terrain.copy()
+        self.clearance = self._solve(self.pathable)
+
+    # region Blocks
+
+    def create_block(self, center: Union[Tuple[float, float], List[Tuple[float, float]]], size: Tuple[int, int]):
+        """ Blocks the rectangle of the size around the center for the next update. """
+        if isinstance(center, list):
+            for point in center:
+                self._next_blocks.add(self._block(point, size))
+        else:
+            self._next_blocks.add(self._block(center, size))
+
+    @staticmethod
+    def _block(center: Tuple[float, float], size: Tuple[int, int]) -> Block:
+        x = int(math.floor(center[0] - size[0] / 2 + 0.5))
+        y = int(math.floor(center[1] - size[1] / 2 + 0.5))
+        return x, y, size[0], size[1]
+
+    def update(self) -> bool:
+        """
+        Applies the blocks created since the previous update.
+
+        :return: True if the clearance changed.
+        """
+        added = self._next_blocks - self._blocks
+        removed = self._blocks - self._next_blocks
+        self._blocks = self._next_blocks
+        self._next_blocks = set()
+
+        if not added and not removed:
+            return False
+
+        for block in added:
+            self._block_counts[self._slice(block, 0)] += 1
+        for block in removed:
+            self._block_counts[self._slice(block, 0)] -= 1
+
+        self.pathable = self.terrain & (self._block_counts == 0)
+
+        if len(added) + len(removed) > FULL_UPDATE_LIMIT:
+            self.clearance = self._solve(self.pathable)
+        else:
+            margin = self.max_clearance + 1
+            for block in added | removed:
+                self._solve_window(block, margin)
+
+        self.version += 1
+        return True
+
+    def _slice(self, block: Block, margin: int) -> Tuple[slice, slice]:
+        x, y, width, height = block
+        return (
+            slice(max(0, x - margin), min(self.width, x + width + margin)),
+            slice(max(0, y - margin), min(self.height, y + height + margin)),
+        )
+
+    def _solve(self, pathable: np.ndarray) -> np.ndarray:
+        distances = ndimage.distance_transform_edt(pathable) - 0.5
+        return np.clip(distances, 0, self.max_clearance).astype(np.float32)
+
+    def _solve_window(self, block: Block, margin: int):
+        """ Solves clearance for the cells near the block, using all obstacles that can affect them. """
+        area = self._slice(block, margin)
+        window = self._slice(block, margin * 2)
+        solved = self._solve(self.pathable[window])
+        offset_x = area[0].start - window[0].start
+        offset_y = area[1].start - window[1].start
+        width = area[0].stop - area[0].start
+        height = area[1].stop - area[1].start
+        self.clearance[area] = solved[offset_x : offset_x + width, offset_y : offset_y + height]
+
+    # endregion
+
+    # region Queries
+
+    def _cell(self, point: Tuple[float, float]) -> Optional[Tuple[int, int]]:
+        x = int(math.floor(point[0]))
+        y = int(math.floor(point[1]))
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x, y
+        return None
+
+    def value(self, point: Tuple[float, float]) -> float:
+        """ Clearance at the point, 0 outside of the map. """
+        cell = self._cell(point)
+        if cell is None:
+            return 0
+        return float(self.clearance[cell])
+
+    def is_clear(self, point: Tuple[float, float], radius: float) -> bool:
+        """ Can a unit with the radius stand at the point. """
+        return self.value(point) >= radius
+
+    def mask(self, radius: float) -> np.ndarray:
+        """ Cells where a unit with the radius fits as boolean [x][y] array. """
+        return self.clearance >= radius
+
+    def closest_clear(self, point: Tuple[float, float], radius: float, max_distance: int = 3) -> Optional[Point2]:
+        """
+        Closest cell center to the point where a unit with the radius fits.
+
+        :return: Position or None if there is no such cell within max distance.
+        """
+        x = int(math.floor(point[0]))
+        y = int(math.floor(point[1]))
+        xs = slice(max(0, x - max_distance), min(self.width, x + max_distance + 1))
+        ys = slice(max(0, y - max_distance), min(self.height, y + max_distance + 1))
+        cells = np.argwhere(self.clearance[xs, ys] >= radius)
+        if len(cells) == 0:
+            return None
+
+        cells = cells + (xs.start, ys.start)
+        distances = np.hypot(cells[:, 0] + 0.5 - point[0], cells[:, 1] + 0.5 - point[1])
+        index = int(np.argmin(distances))
+        if distances[index] > max_distance:
+            return None
+        return Point2((cells[index][0] + 0.5, cells[index][1] + 0.5))
+
+    def rect_may_fit(self, x: int, y: int, width: int, height: int) -> bool:
+        """
+        Quick check for rectangle of cells starting from x, y.
+
+        :return: False when the rectangle certainly contains unpathable cells, True when it might be free.
+        """
+        center_x = x + width / 2
+        center_y = y + height / 2
+        cell = self._cell((center_x, center_y))
+        if cell is None:
+            return False
+
+        # Unpathable cell centers within this radius of the rectangle center are inside the rectangle
+        inner_radius = min(width, height) / 2 - 0.5
+        # Distance from rectangle center to the closest unpathable cell center is at most this
+        closest = self.clearance[cell] + 0.5 + math.hypot(center_x - cell[0] - 0.5, center_y - cell[1] - 0.5)
+        if self.clearance[cell] >= self.max_clearance:
+            return True
+        return closest > inner_radius
+
+    # endregion
@@ -0,0 +1,55 @@
+import numpy as np
+
+from .clearance_map import ClearanceMap
+
+
+def create_terrain() -> np.ndarray:
+    terrain = np.zeros((80, 60), dtype=bool)
+    terrain[2:78, 2:58] = True
+    terrain[40:42, 0:25] = False
+    return terrain
+
+
+class TestClearanceMap:
+    def test_clearance_next_to_wall(self):
+        clearance = ClearanceMap(create_terrain())
+
+        assert clearance.value((39.5, 10.5)) == 0.5
+        assert clearance.value((37.5, 10.5)) == 2.5
+        assert clearance.value((40.5, 10.5)) == 0
+        assert clearance.value((20.5, 30.5)) == clearance.max_clearance
+
+    def test_incremental_update_matches_full_solve(self):
+        clearance = ClearanceMap(create_terrain())
+        clearance.create_block([(20, 30), (60.5, 40.5)], (2, 2))
+        clearance.create_block((30.5, 45.5), (3, 3))
+        assert clearance.update()
+
+        expected = ClearanceMap(clearance.pathable)
+        assert np.array_equal(clearance.clearance, expected.clearance)
+
+        # Building at (20, 30) was destroyed
+        clearance.create_block((60.5, 40.5), (2, 2))
+        clearance.create_block((30.5, 45.5), (3, 3))
+        assert clearance.update()
+        assert clearance.value((20, 30)) == clearance.max_clearance
+
+        clearance.create_block((60.5, 40.5), (2, 2))
+        clearance.create_block((30.5, 45.5), (3, 3))
+        assert not clearance.update()
+
+    def test_closest_clear(self):
+        clearance = ClearanceMap(create_terrain())
+
+        assert clearance.closest_clear((20.5, 20.5), 1) == (20.5, 20.5)
+        position = clearance.closest_clear((39.5, 10.5), 1.5)
+        assert position is not None
+        assert clearance.is_clear(position, 1.5)
+        assert clearance.closest_clear((39.5, 10.5), 20) is None
+
+    def test_rect_may_fit(self):
+        clearance = ClearanceMap(create_terrain())
+
+        assert clearance.rect_may_fit(30, 10, 6, 6)
+        assert not clearance.rect_may_fit(38, 10, 6, 6)
+        assert not clearance.rect_may_fit(-10, 10, 6, 6)
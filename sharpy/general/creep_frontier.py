@@ -0,0 +1,134 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import ndimage
+from scipy.spatial.ckdtree import cKDTree
+
+Points = Sequence[Tuple[float, float]]
+
+
+def far_from(points: Points, sources: Points, distance: float) -> np.ndarray:
+    """ Points that are at least `distance` away from all of the sources, solved with a KD-tree of the sources. """
+    points = np.array(points, dtype=np.float64).reshape(-1, 2)
+    if len(sources) == 0 or len(points) == 0:
+        return np.ones(len(points), dtype=bool)
+    distances, _ = cKDTree(np.array(sources, dtype=np.float64).reshape(-1, 2)).query(
+        points, distance_upper_bound=distance
+    )
+    return distances >= distance
+
+
+class CreepFrontier:
+    """
+    Creep frontier analysis for creep tumor placement, arrays are indexed with [x][y].
+
+    Edge distance of creep cells is the distance to the nearest pathable cell without creep, solved with a distance
+    transform of the creep map. Candidate cells for new tumors are the placeable and visible creep cells near the
+    edge, scored by distance to existing creep sources from a KD-tree and by edge distance.
+    Candidates are solved again only when creep, visibility, placeable cells or sources change.
+    """
+
+    def __init__(self, pathable: np.ndarray, depth: float = 4):
+        """
+        :param pathable: Pathable cells of the terrain as boolean [x][y] array.
+        :param depth: Max edge distance of the candidate cells.
+        """
+        self.pathable = pathable.astype(bool)
+        self.depth = depth
+        self.placeable = self.pathable
+        self.creep = np.zeros(pathable.shape, dtype=bool)
+        self.visible = np.ones(pathable.shape, dtype=bool)
+        self.sources = np.zeros((0, 2), dtype=np.float64)
+
+        self._creep_source: Optional[np.ndarray] = None
+        self._visibility_source: Optional[np.ndarray] = None
+        self._edge_distance: Optional[np.ndarray] = None
+        self._candidates: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def set_creep(self, creep: np.ndarray):
+        """ Sets the creep map of the game, indexed with [y][x]. """
+        if creep is not self._creep_source:
+            self._creep_source = creep
+            self.creep = creep.T != 0
+            self._edge_distance = None
+            self._candidates = None
+
+    def set_visibility(self, visibility: np.ndarray):
+        """ Sets the visibility map of the game, indexed with [y][x]. Only visible cells are candidates. """
+        if visibility is not self._visibility_source:
+            self._visibility_source = visibility
+            self.visible = visibility.T == 2
+            self._candidates = None
+
+    def set_placeable(self, placeable: np.ndarray):
+        """ Sets the cells that tumors can be placed at as boolean [x][y] array. """
+        if placeable is not self.placeable:
+            self.placeable = placeable
+            self._candidates = None
+
+    def set_sources(self, sources: Points):
+        """ Sets positions of the existing creep sources, such as tumors, planned tumors and townhalls. """
+        sources = np.array(sources, dtype=np.float64).reshape(-1, 2)
+        if not np.array_equal(sources, self.sources):
+            self.sources = sources
+            self._candidates = None
+
+    @property
+    def edge_distance(self) -> np.ndarray:
+        """ Distance from each cell to the nearest pathable cell without creep, zero for cells without creep. """
+        if self._edge_distance is None:
+            # Cliffs and other unpathable cells are not part of the edge that creep spreads to
+            self._edge_distance = ndimage.distance_transform_edt(self.creep | ~self.pathable)
+        return self._edge_distance
+
+    def candidates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Candidate cells for new tumors and their scores.
+        Cells far from existing sources and close to the creep edge have higher scores.
+
+        :return: Cells as (n, 2) integer array and the scores as (n,) array.
+        """
+        if self._candidates is None:
+            edge = self.edge_distance
+            mask = self.creep & self.placeable & self.visible & (edge <= self.depth)
+            cells = np.argwhere(mask)
+
+            if len(self.sources) > 0 and len(cells) > 0:
+                source_distance, _ = cKDTree(self.sources).query(cells, distance_upper_bound=self.depth * 4)
+                source_distance = np.minimum(source_distance, self.depth * 4)
+            else:
+                source_distance = np.full(len(cells), self.depth * 4)
+
+            # Cells right next to sources are taken
+            keep = source_distance >= 1
+            self._candidates = cells[keep], source_distance[keep] - edge[mask][keep]
+        return self._candidates
+
+    def best_targets(self, origins: Points, radius: float, spacing: float = 1) -> List[Optional[Tuple[int, int]]]:
+        """
+        Best scored candidate cell in range of each of the origins, in one pass over the candidates.
+        Origins are solved in order and cells closer than `spacing` to targets of earlier origins are not used.
+
+        :param radius: Targets must be closer than this to the origin.
+        :return: Target cell for each origin, None if there were no candidates in range.
+        """
+        cells, scores = self.candidates()
+        origins = np.array(origins, dtype=np.float64).reshape(-1, 2)
+        if len(cells) == 0:
+            return [None] * len(origins)
+
+        in_range = np.hypot(cells[:, 0] - origins[:, 0, None], cells[:, 1] - origins[:, 1, None]) < radius
+        available = np.ones(len(cells), dtype=bool)
+
+        targets: List[Optional[Tuple[int, int]]] = []
+        for index in range(0, len(origins)):
+            valid = in_range[index] & available
+            if not valid.any():
+                targets.append(None)
+                continue
+
+            best = np.flatnonzero(valid)[np.argmax(scores[valid])]
+            x, y = cells[best]
+            targets.append((int(x), int(y)))
+            available &= np.hypot(cells[:, 0] - x, cells[:, 1] - y) >= spacing
+        return targets
@@ -0,0 +1,49 @@
+import numpy as np
+
+from .creep_frontier import CreepFrontier, far_from
+
+
+def create_frontier() -> CreepFrontier:
+    pathable = np.ones((40, 30), dtype=bool)
+    # Cliff on the right side of the creep
+    pathable[20:, :] = False
+    frontier = CreepFrontier(pathable)
+    # Creep is indexed with [y][x], creep covers x 5..19 and y 5..19
+    creep = np.zeros((30, 40), dtype=np.uint8)
+    creep[5:20, 5:20] = 1
+    frontier.set_creep(creep)
+    return frontier
+
+
+class TestCreepFrontier:
+    def test_far_from(self):
+        points = [(0, 0), (10, 0), (20, 0)]
+        assert far_from(points, [(9, 0), (0, 8)], 8).tolist() == [True, False, True]
+        assert far_from(points, [], 8).tolist() == [True, True, True]
+
+    def test_edge_distance(self):
+        frontier = create_frontier()
+        edge = frontier.edge_distance
+
+        assert edge[4, 10] == 0
+        assert edge[5, 10] == 1
+        assert edge[8, 10] == 4
+        # Creep next to the cliff is not on the edge
+        assert edge[19, 10] == 6
+
+    def test_best_targets(self):
+        frontier = create_frontier()
+        frontier.set_sources([(12.5, 12.5)])
+
+        targets = frontier.best_targets([(12.5, 12.5), (12.5, 12.5), (30, 25)], 9, 8)
+        # Corners are out of range, cells next to the edge and furthest from the source are the best
+        assert targets == [(5, 8), (5, 17), None]
+
+        # Visibility and placeable cells limit the candidates
+        visibility = np.zeros((30, 40), dtype=np.uint8)
+        visibility[10:20, 5:10] = 2
+        frontier.set_visibility(visibility)
+        placeable = np.ones((40, 30), dtype=bool)
+        placeable[5, :] = False
+        frontier.set_placeable(placeable)
+        assert frontier.best_targets([(12.5, 12.5)], 9) == [(7, 19)]
@@ -0,0 +1,154 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Frames of the same image that are stored in a single compressed dump
+FRAMES_PER_FILE = 64
+# Images waiting to be written, new images are dropped when the writer falls this much behind
+MAX_QUEUED = 32
+
+Render = Callable[[np.ndarray], np.ndarray]
+
+
+class DebugPlotter:
+    """
+    Writes debug images of the game state in a background thread.
+
+    Only every `sample_rate`:th frame that images are captured in is sampled, regardless of the game loop step size,
+    and capturing stops for the frame once `frame_budget`
+    seconds have been spent on it. The game thread only takes a snapshot of the data, converting and writing
+    the images is left to the writer thread.
+
+    Images are written either as compressed NumPy dumps that contain a sequence of frames,
+    see `load_frames` for replaying them, or as separate png images.
+    """
+
+    def __init__(
+        self,
+        directory: str = "data",
+        sample_rate: int = 8,
+        frame_budget: float = 0.002,
+        image_format: str = "npz",
+        frames_per_file: int = FRAMES_PER_FILE,
+    ):
+        """
+        :param directory: Directory where the images are written.
+        :param sample_rate: Capture images every nth frame that capture is called in.
+        :param frame_budget: Maximum time in seconds to spend on capturing images in one frame.
+        :param image_format: "npz" for compressed NumPy dumps or "png" for images.
+        """
+        assert image_format in {"npz", "png"}
+        self.directory = directory
+        self.sample_rate = max(1, sample_rate)
+        self.frame_budget = frame_budget
+        self.image_format = image_format
+        self.frames_per_file = frames_per_file
+
+        self.dropped = 0
+        self._frame = -1
+        self._frame_count = 0
+        self._frame_time = 0.0
+        self._buffers: Dict[str, List[Tuple[int, np.ndarray]]] = {}
+        self._queue: "queue.Queue[Optional[Tuple[str, int, np.ndarray, Optional[Render]]]]" = queue.Queue(MAX_QUEUED)
+        self._thread = threading.Thread(target=self._run, name="DebugPlotter", daemon=True)
+        self._thread.start()
+
+    def capture(
+        self,
+        name: str,
+        frame: int,
+        snapshot: Callable[[], np.ndarray],
+        render: Optional[Render] = None,
+        force: bool = False,
+    ) -> bool:
+        """
+        Captures an image when the frame is sampled and there is time left in the frame budget.
+
+        :param name: Name of the image sequence.
+        :param frame: Current game loop.
+        :param snapshot: Copies the data of the image, called in the game thread.
+        :param render: Converts the snapshot into an image for png output, called in the writer thread.
+        :param force: Capture regardless of the sample rate and the frame budget.
+        :return: True if the image was captured.
+        """
+        if frame != self._frame:
+            self._frame = frame
+            self._frame_count += 1
+            self._frame_time = 0.0
+
+        sampled = (self._frame_count - 1) % self.sample_rate == 0
+        if not force and (not sampled or self._frame_time >= self.frame_budget):
+            return False
+
+        start = time.perf_counter()
+        try:
+            self._queue.put_nowait((name, frame, np.array(snapshot()), render))
+            captured = True
+        except queue.Full:
+            self.dropped += 1
+            captured = False
+        self._frame_time += time.perf_counter() - start
+        return captured
+
+    def stop(self):
+        """ Writes the remaining images and stops the writer thread. """
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+            except Exception:
+                logging.exception("Writing debug image failed")
+
+        for name in list(self._buffers.keys()):
+            self._flush(name)
+
+    def _write(self, name: str, frame: int, image: np.ndarray, render: Optional[Render]):
+        os.makedirs(self.directory, exist_ok=True)
+
+        if self.image_format == "png":
+            from PIL import Image
+
+            if render is not None:
+                image = render(image)
+            # Images are [x][y] arrays, y axis points up in game
+            Image.fromarray(np.rot90(image).astype(np.uint8)).save(
+                os.path.join(self.directory, f"{name}_{frame:06d}.png")
+            )
+            return
+
+        buffer = self._buffers.setdefault(name, [])
+        if buffer and buffer[0][1].shape != image.shape:
+            self._flush(name)
+            buffer = self._buffers.setdefault(name, [])
+        buffer.append((frame, image))
+        if len(buffer) >= self.frames_per_file:
+            self._flush(name)
+
+    def _flush(self, name: str):
+        buffer = self._buffers.pop(name, None)
+        if not buffer:
+            return
+        frames = np.array([frame for frame, _ in buffer], dtype=np.int32)
+        images = np.stack([image for _, image in buffer])
+        np.savez_compressed(os.path.join(self.directory, f"{name}_{frames[0]:06d}.npz"), frames=frames, images=images)
+
+
+def load_frames(filename: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Loads a compressed image sequence written by `DebugPlotter`.
+
+    :return: Game loops and images of the frames.
+    """
+    with np.load(filename) as data:
+        return data["frames"], data["images"]
@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+from .debug_plotter import DebugPlotter, load_frames
+
+
+class TestDebugPlotter:
+    def test_sampled_frames_are_written_as_sequence(self, tmp_path):
+        plotter = DebugPlotter(str(tmp_path), sample_rate=4, frame_budget=1, frames_per_file=2)
+        captured = [plotter.capture("map", frame, lambda: np.full((5, 4), frame)) for frame in range(0, 12)]
+        plotter.stop()
+
+        assert captured == [frame % 4 == 0 for frame in range(0, 12)]
+        frames, images = load_frames(os.path.join(str(tmp_path), "map_000000.npz"))
+        assert frames.tolist() == [0, 4]
+        assert images.shape == (2, 5, 4)
+        assert images[1][0][0] == 4
+        frames, images = load_frames(os.path.join(str(tmp_path), "map_000008.npz"))
+        assert frames.tolist() == [8]
+
+    def test_sample_rate_counts_frames(self, tmp_path):
+        plotter = DebugPlotter(str(tmp_path), sample_rate=4, frame_budget=1)
+        # Game loop advances by 6 each frame and the image is captured twice in the same frame
+        captured = [
+            plotter.capture(name, frame, lambda: np.zeros((2, 2))) for frame in range(0, 60, 6) for name in "ab"
+        ]
+        plotter.stop()
+
+        assert captured[::2] == [True, False, False, False, True, False, False, False, True, False]
+        assert captured[1::2] == captured[::2]
+
+    def test_frame_budget(self, tmp_path):
+        plotter = DebugPlotter(str(tmp_path), sample_rate=1, frame_budget=1e-9)
+        assert plotter.capture("a", 1, lambda: np.zeros((2, 2)))
+        assert not plotter.capture("b", 1, lambda: np.zeros((2, 2)))
+        assert plotter.capture("c", 1, lambda: np.zeros((2, 2)), force=True)
+        assert plotter.capture("b", 2, lambda: np.zeros((2, 2)))
+        plotter.stop()
@@ -1,5 +1,7 @@
 from typing import Union, List, Set
 
+import numpy as np
+
 from sc2 import UnitTypeId
 from sc2.unit import Unit
 
@@ -42,6 +44,21 @@ siege = {
 }
 
 
+# Fields of ExtendedPower in the order of `ExtendedPower.to_array`
+POWER_FIELDS = (
+    "power",
+    "air_presence",
+    "ground_presence",
+    "air_power",
+    "ground_power",
+    "melee_power",
+    "surround_power",
+    "siege_power",
+    "detectors",
+    "stealth_power",
+)
+
+
 class ExtendedPower:
     def is_enough_for(self, enemies: "ExtendedPower", our_percentage: float = 1.1) -> bool:
         # reduce some variable from air / ground power so that we don't fight against 100 roach with
@@ -132,7 +149,7 @@ class ExtendedPower:
                     self.air_power += pwr
 
             if unit_type in siege:
-                self.siege_power = pwr
+                self.siege_power += pwr
 
             if UnitFeature.Cloak in features:
                 self.stealth_power += pwr
@@ -190,6 +207,15 @@ class ExtendedPower:
         self.detectors *= multiplier
         self.stealth_power *= multiplier
 
+    def to_array(self) -> np.ndarray:
+        """ Values of the power as an array in the order of `POWER_FIELDS`. """
+        return np.array([getattr(self, field) for field in POWER_FIELDS], dtype=np.float64)
+
+    def set_array(self, values: np.ndarray):
+        """ Sets values of the power from an array in the order of `POWER_FIELDS`. """
+        for field, value in zip(POWER_FIELDS, values):
+            setattr(self, field, float(value))
+
     def clear(self):
         self.power = 0
         self.air_presence = 0
@@ -1,24 +1,152 @@
 from typing import Tuple, List, Optional
 
+import numpy as np
 from sc2.position import Point2
 
+# Distance between samples when checking line of sight between two cells
+LINE_SAMPLE_STEP = 0.25
+# Half width of the line of sight check, keeps straightened paths from cutting corners
+LINE_HALF_WIDTH = 0.45
+
+
+def in_line_of_sight(pathable: np.ndarray, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+    """
+    Checks that a unit can walk straight from start cell to end cell.
+
+    :param pathable: Pathable cells as boolean [x][y] array.
+    """
+    start_center = np.array(start, dtype=np.float64) + 0.5
+    vector = np.array(end, dtype=np.float64) + 0.5 - start_center
+    length = np.hypot(vector[0], vector[1])
+    if length == 0:
+        return True
+
+    normal = np.array((-vector[1], vector[0])) / length * LINE_HALF_WIDTH
+    steps = np.linspace(0, 1, int(length / LINE_SAMPLE_STEP) + 2)[:, None]
+    samples = start_center + steps * vector
+    samples = np.concatenate((samples, samples + normal, samples - normal))
+
+    cells = np.floor(samples).astype(int)
+    if np.any(cells < 0) or np.any(cells[:, 0] >= pathable.shape[0]) or np.any(cells[:, 1] >= pathable.shape[1]):
+        return False
+    return bool(np.all(pathable[cells[:, 0], cells[:, 1]]))
+
+
+def string_pull(path: List[Tuple[int, int]], pathable: np.ndarray) -> List[int]:
+    """
+    Straightens a grid path into waypoints that have line of sight to each other.
+
+    :param path: Path cells as returned by the path finder.
+    :param pathable: Pathable cells as boolean [x][y] array.
+    :return: Indices of the waypoints in the path, first and last cell are always included.
+    """
+    count = len(path)
+    if count < 3:
+        return list(range(0, count))
+
+    waypoints = [0]
+    anchor = 0
+    while anchor < count - 1:
+        # Exponential search for a cell that is no longer visible, followed by binary search between
+        # the last visible and the first hidden cell.
+        visible = anchor + 1
+        step = 2
+        hidden = None
+        while visible < count - 1:
+            candidate = min(anchor + step, count - 1)
+            if in_line_of_sight(pathable, path[anchor], path[candidate]):
+                visible = candidate
+                step *= 2
+            else:
+                hidden = candidate
+                break
+
+        if hidden is not None:
+            while hidden - visible > 1:
+                middle = (visible + hidden) // 2
+                if in_line_of_sight(pathable, path[anchor], path[middle]):
+                    visible = middle
+                else:
+                    hidden = middle
+
+        waypoints.append(visible)
+        anchor = visible
+    return waypoints
+
 
 class Path:
-    path: Tuple[int, int]
+    """
+    Compact path between two points.
+
+    Only the waypoints of the path are stored, together with their indices in the original grid path and
+    cumulative distances. Positions by original index or by walked distance are interpolated between the waypoints.
+    """
 
-    def __init__(self, path: Tuple[List[Tuple[int, int]], float], reverse: bool = False) -> None:
+    def __init__(
+        self, path: Tuple[List[Tuple[int, int]], float], reverse: bool = False, pathable: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        :param path: Path cells and distance as returned by the path finder.
+        :param reverse: Path is stored from end to start.
+        :param pathable: Pathable cells as boolean [x][y] array, when set the path is straightened into waypoints.
+        """
         self.distance: float = path[1]
-        if reverse:
-            self.path = path[0][::-1]
+        cells = path[0][::-1] if reverse else path[0]
+        self.count = len(cells)
+
+        if pathable is not None:
+            indices = string_pull(cells, pathable)
         else:
-            self.path = path[0]
+            indices = list(range(0, self.count))
+
+        self.indices: np.ndarray = np.array(indices, dtype=np.int32)
+        self.waypoints: np.ndarray = np.array([cells[i] for i in indices], dtype=np.int16).reshape(-1, 2)
+        segments = np.hypot(*np.diff(self.waypoints.astype(np.float32), axis=0).T)
+        self.cumulative: np.ndarray = np.concatenate(([0], np.cumsum(segments))).astype(np.float32)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def path(self) -> List[Tuple[int, int]]:
+        """ Cells of the path, interpolated between the waypoints. """
+        if self.count < 1:
+            return []
+        index = np.arange(0, self.count)
+        xs = np.rint(np.interp(index, self.indices, self.waypoints[:, 0])).astype(int)
+        ys = np.rint(np.interp(index, self.indices, self.waypoints[:, 1])).astype(int)
+        return list(zip(xs.tolist(), ys.tolist()))
 
     def get_index(self, target_index: int) -> Optional[Point2]:
-        if len(self.path) < 1:
+        """ Position of the cell with the index in the original grid path. """
+        if self.count < 1:
             return None
 
-        if len(self.path) <= target_index:
-            target_index = len(self.path) - 1
+        if self.count <= target_index:
+            target_index = self.count - 1
 
-        target = self.path[target_index]
-        return Point2((target[0] + 0.5, target[1] + 0.5))
+        segment = int(np.searchsorted(self.indices, target_index, side="right")) - 1
+        if segment >= len(self.indices) - 1:
+            target = self.waypoints[-1]
+        else:
+            start_index = self.indices[segment]
+            ratio = (target_index - start_index) / (self.indices[segment + 1] - start_index)
+            start = self.waypoints[segment]
+            target = start + (self.waypoints[segment + 1] - start) * ratio
+        return Point2((float(target[0]) + 0.5, float(target[1]) + 0.5))
+
+    def get_distance(self, distance: float) -> Optional[Point2]:
+        """ Position after walking the distance along the path. """
+        if self.count < 1:
+            return None
+
+        segment = int(np.searchsorted(self.cumulative, distance, side="right")) - 1
+        if segment >= len(self.cumulative) - 1:
+            target = self.waypoints[-1]
+        else:
+            segment = max(0, segment)
+            start_distance = self.cumulative[segment]
+            ratio = max(0.0, distance - start_distance) / (self.cumulative[segment + 1] - start_distance)
+            start = self.waypoints[segment]
+            target = start + (self.waypoints[segment + 1] - start) * ratio
+        return Point2((float(target[0]) + 0.5, float(target[1]) + 0.5))
@@ -0,0 +1,159 @@
+from concurrent.futures import Executor, Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from sc2pathlib import PathFinder
+from sc2pathlib.path_finder import find_paths_chunk
+
+PathResult = Tuple[List[Tuple[int, int]], float]
+RequestKey = Tuple[int, int, int, int]
+
+
+class PathService:
+    """
+    Solves path requests in the background so that slow searches don't block the game step.
+
+    Requests are collected during the frame and dispatched as a single batch on `update`, searches are
+    done in a process pool against a snapshot of the grid at the time of dispatching. The native path finder
+    holds the GIL while searching, so threads would not run the searches in parallel with the game step.
+    Results are delivered on a later `update` call, so the earliest time a result is available is the next frame.
+    Requests with the same rounded start and end share a single search.
+    """
+
+    def __init__(
+        self,
+        path_finder: PathFinder,
+        executor: Executor,
+        max_requests_per_frame: int = 50,
+    ):
+        """
+        :param path_finder: Path finder whose grid is used for the searches.
+        :param executor: Process pool to solve the batches in, the pool is not shut down by the service.
+        :param max_requests_per_frame: Maximum number of searches dispatched per frame, rest are queued.
+        """
+        self.path_finder = path_finder
+        self.max_requests_per_frame = max_requests_per_frame
+        self._executor = executor
+
+        self._queued: Dict[RequestKey, Future] = {}
+        self._in_flight: Dict[RequestKey, Future] = {}
+        self._batches: List[Tuple[List[RequestKey], Future]] = []
+
+    @property
+    def queued_count(self) -> int:
+        return len(self._queued)
+
+    @property
+    def in_flight_count(self) -> int:
+        return len(self._in_flight)
+
+    @staticmethod
+    def key(start: Tuple[float, float], end: Tuple[float, float]) -> RequestKey:
+        return int(round(start[0])), int(round(start[1])), int(round(end[0])), int(round(end[1]))
+
+    def request(self, start: Tuple[float, float], end: Tuple[float, float]) -> Future:
+        """
+        Requests a path from start to end.
+
+        :return: Future of the path finder result, identical requests get the same future.
+        """
+        key = self.key(start, end)
+        future = self._in_flight.get(key) or self._queued.get(key)
+        if future is None:
+            future = Future()
+            self._queued[key] = future
+        return future
+
+    def result(self, future: Future) -> PathResult:
+        """
+        Result of the request, solved synchronously if the result is not ready yet.
+        """
+        if future.done():
+            return future.result()
+
+        key = self._find_key(future)
+        if key is None:
+            raise ValueError("Future was not requested from this path service")
+
+        self._queued.pop(key, None)
+        self._in_flight.pop(key, None)
+        result = self.path_finder.find_path((key[0], key[1]), (key[2], key[3]))
+        self._set_result(future, result)
+        return future.result()
+
+    def update(self):
+        """ Delivers finished results and dispatches queued requests. Call this once per frame. """
+        self._collect()
+        self._dispatch()
+
+    def shutdown(self):
+        for future in list(self._queued.values()) + list(self._in_flight.values()):
+            future.cancel()
+        self._queued.clear()
+        self._in_flight.clear()
+        self._batches.clear()
+
+    def _find_key(self, future: Future) -> Optional[RequestKey]:
+        for requests in (self._queued, self._in_flight):
+            for key, requested in requests.items():
+                if requested is future:
+                    return key
+        return None
+
+    def _collect(self):
+        pending: List[Tuple[List[RequestKey], Future]] = []
+        for keys, batch in self._batches:
+            if not batch.done():
+                pending.append((keys, batch))
+                continue
+
+            error = batch.exception()
+            results = batch.result() if error is None else [None] * len(keys)
+            for key, result in zip(keys, results):
+                future = self._in_flight.pop(key, None)
+                if future is None or future.done():
+                    continue  # Solved synchronously
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+        self._batches = pending
+
+    def _dispatch(self):
+        if not self._queued:
+            return
+
+        keys = list(self._queued.keys())[: self.max_requests_per_frame]
+        maze = np.array(self.path_finder.map, dtype=np.uint8)
+        starts = [(key[0], key[1]) for key in keys]
+        ends = [(key[2], key[3]) for key in keys]
+
+        batch = self._executor.submit(find_paths_chunk, maze, starts, ends, False, self.path_finder.heuristic_accuracy)
+        self._batches.append((keys, batch))
+        for key in keys:
+            self._in_flight[key] = self._queued.pop(key)
+
+    def _set_result(self, future: Future, result: PathResult):
+        if not future.done():
+            future.set_result(result)
+
+
+class BackgroundPath:
+    """ Latest solved path towards a single target and the request that is being solved for it. """
+
+    def __init__(self):
+        self.start: Optional[Tuple[float, float]] = None
+        self.path: Optional[List[Tuple[int, int]]] = None
+        self.request: Optional[Future] = None
+        self.request_start: Optional[Tuple[float, float]] = None
+        self.last_used: float = 0
+
+    def collect(self):
+        """ Takes the path of the finished request, failed and cancelled requests are dropped. """
+        if self.request is None or not self.request.done():
+            return
+        if not self.request.cancelled() and self.request.exception() is None:
+            self.path = self.request.result()[0]
+            self.start = self.request_start
+        self.request = None
@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from sc2pathlib import PathFinder
+from .path_service import BackgroundPath, PathService
+
+
+def create_path_finder() -> PathFinder:
+    grid = np.zeros((60, 40), dtype=np.uint8)
+    grid[2:58, 2:38] = 1
+    grid[30:32, 0:30] = 0
+    return PathFinder(grid)
+
+
+@pytest.fixture(scope="module")
+def executor():
+    pool = ProcessPoolExecutor(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def wait_for_batches(service: PathService):
+    for _ in range(0, 500):
+        service.update()
+        if service.in_flight_count == 0:
+            return
+        time.sleep(0.01)
+
+
+class TestPathService:
+    def test_identical_requests_share_search(self, executor):
+        service = PathService(create_path_finder(), executor)
+        first = service.request((10.2, 10), (50, 10))
+        second = service.request((10, 9.8), (50, 10))
+        other = service.request((10, 10), (50, 20))
+
+        assert first is second
+        assert first is not other
+        assert service.queued_count == 2
+        service.shutdown()
+
+    def test_result_is_delivered_on_update(self, executor):
+        path_finder = create_path_finder()
+        service = PathService(path_finder, executor)
+        future = service.request((10, 10), (50, 10))
+
+        service.update()
+        assert not future.done()  # Not available on the same frame
+        wait_for_batches(service)
+
+        assert future.done()
+        assert future.result() == path_finder.find_path((10, 10), (50, 10))
+        service.shutdown()
+
+    def test_requests_are_limited_per_frame(self, executor):
+        service = PathService(create_path_finder(), executor, max_requests_per_frame=2)
+        for y in range(5, 10):
+            service.request((10, y), (50, 10))
+
+        service.update()
+        assert service.in_flight_count == 2
+        assert service.queued_count == 3
+        service.shutdown()
+
+    def test_synchronous_fallback(self, executor):
+        path_finder = create_path_finder()
+        service = PathService(path_finder, executor)
+        future = service.request((10, 10), (50, 10))
+
+        assert service.result(future) == path_finder.find_path((10, 10), (50, 10))
+        assert service.queued_count == 0
+        service.shutdown()
+
+    def test_background_path_keeps_last_solved_path(self, executor):
+        path_finder = create_path_finder()
+        service = PathService(path_finder, executor)
+        background = BackgroundPath()
+        background.request = service.request((10, 10), (50, 10))
+        background.request_start = (10, 10)
+
+        background.collect()
+        assert background.path is None  # Still being solved
+
+        wait_for_batches(service)
+        background.collect()
+        assert background.request is None
+        assert background.start == (10, 10)
+        assert background.path == path_finder.find_path((10, 10), (50, 10))[0]
+
+        background.request = service.request((12, 10), (50, 10))
+        service.shutdown()
+        background.collect()
+        assert background.request is None
+        assert background.start == (10, 10)  # Cancelled request doesn't replace the path
@@ -0,0 +1,57 @@
+import numpy as np
+
+from sc2pathlib import PathFinder
+from .path import Path, in_line_of_sight
+
+
+def create_grid() -> np.ndarray:
+    """ Open area with a wall that has a single gap in it. """
+    grid = np.zeros((100, 80), dtype=np.uint8)
+    grid[2:98, 2:78] = 1
+    grid[40:43, :] = 0
+    grid[40:43, 50:56] = 1
+    return grid
+
+
+class TestPath:
+    def test_path_is_straightened_into_waypoints(self):
+        grid = create_grid()
+        result = PathFinder(grid).find_path((10, 10), (90, 10))
+        path = Path(result, pathable=grid > 0)
+
+        assert len(path) == len(result[0])
+        assert len(path.waypoints) < 6
+        assert tuple(path.waypoints[0]) == result[0][0]
+        assert tuple(path.waypoints[-1]) == result[0][-1]
+        for i in range(1, len(path.waypoints)):
+            assert in_line_of_sight(grid > 0, tuple(path.waypoints[i - 1]), tuple(path.waypoints[i]))
+
+    def test_get_index_follows_original_path(self):
+        grid = create_grid()
+        result = PathFinder(grid).find_path((10, 10), (90, 10))
+        path = Path(result, pathable=grid > 0)
+        full_path = Path(result)
+
+        start = full_path.get_index(0)
+        for index in range(0, len(path), 7):
+            position = path.get_index(index)
+            # Straightened path cuts the corners of the grid path, but walks the same amount of cells
+            assert position.distance_to_point2(full_path.get_index(index)) < 8
+            assert position.distance_to_point2(start) <= index * 1.4143
+            assert grid[int(position.x), int(position.y)] > 0
+        assert path.get_index(1000) == full_path.get_index(len(result[0]) - 1)
+
+    def test_get_distance(self):
+        grid = create_grid()
+        path = Path(PathFinder(grid).find_path((10, 10), (30, 10)), pathable=grid > 0)
+
+        assert path.get_distance(0) == path.get_index(0)
+        assert path.get_distance(5).distance_to_point2(path.get_index(0)) == 5
+        assert path.get_distance(1000) == path.get_index(1000)
+
+    def test_reverse(self):
+        grid = create_grid()
+        result = PathFinder(grid).find_path((10, 10), (90, 10))
+        path = Path(result, True, grid > 0)
+
+        assert path.get_index(0) == Path(result).get_index(len(result[0]) - 1)
@@ -0,0 +1,274 @@
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Center x, center y, width and height of a structure footprint
+Footprint = Tuple[float, float, int, int]
+# Position and radius of a power source
+PowerField = Tuple[Tuple[float, float], float]
+
+
+def integral_image(mask: np.ndarray) -> np.ndarray:
+    """ Summed-area table of the [x][y] mask, padded with a zero row and column. """
+    integral = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(mask, axis=0, dtype=np.int32), axis=1, out=integral[1:, 1:])
+    return integral
+
+
+class PlacementMap:
+    """
+    Structure placement checks for footprints answered from summed-area tables.
+
+    Keeps buildable, creep, power and occupied masks as [x][y] arrays. Occupied cells are counted per structure
+    and powered cells per power field, so structures and power fields can be added and removed incrementally.
+    Summed-area tables are solved again lazily on the first query after their mask changed,
+    after that any footprint query is O(1).
+    """
+
+    def __init__(self, buildable: np.ndarray, pathable: Optional[np.ndarray] = None):
+        """
+        :param buildable: Buildable cells of the terrain as boolean [x][y] array.
+        :param pathable: Pathable cells of the terrain as boolean [x][y] array, buildable cells by default.
+        """
+        self.width, self.height = buildable.shape
+        self.buildable = buildable.astype(bool)
+        self.pathable = self.buildable if pathable is None else pathable.astype(bool)
+        self.occupied = np.zeros(buildable.shape, dtype=np.int16)
+        self.creep = np.zeros(buildable.shape, dtype=bool)
+        self.power_count = np.zeros(buildable.shape, dtype=np.int16)
+
+        self._structures: Dict[int, Footprint] = dict()
+        self._power_fields: Counter = Counter()
+        self._creep_source: Optional[np.ndarray] = None
+        self._integrals: Dict[str, np.ndarray] = {"buildable": integral_image(self.buildable)}
+        # Incremented when the mask changes, footprints that last changed the occupied mask are also kept
+        self.versions: Dict[str, int] = {"occupied": 0, "creep": 0, "power": 0}
+        self.changed_footprints: List[Footprint] = []
+
+    # region Updates
+
+    def set_structures(self, structures: Dict[int, Footprint]):
+        """ Sets footprints of all structures by tag, only footprints that changed are applied. """
+        changed: List[Footprint] = []
+
+        for tag in self._structures.keys() - structures.keys():
+            footprint = self._structures.pop(tag)
+            self.occupied[self._slice(footprint)] -= 1
+            changed.append(footprint)
+
+        for tag, footprint in structures.items():
+            previous = self._structures.get(tag)
+            if previous == footprint:
+                continue
+            if previous is not None:
+                self.occupied[self._slice(previous)] -= 1
+                changed.append(previous)
+            self.occupied[self._slice(footprint)] += 1
+            self._structures[tag] = footprint
+            changed.append(footprint)
+
+        if changed:
+            self._integrals.pop("occupied", None)
+            self.versions["occupied"] += 1
+            self.changed_footprints = changed
+
+    def set_creep(self, creep: np.ndarray):
+        """ Sets the creep map of the game, indexed with [y][x]. Creep table is solved when creep is queried. """
+        if creep is not self._creep_source:
+            self._creep_source = creep
+            self._integrals.pop("creep", None)
+            self.versions["creep"] += 1
+
+    @property
+    def power(self) -> np.ndarray:
+        """ Cells that are covered by at least one power field. """
+        return self.power_count > 0
+
+    def set_power(self, fields: List[PowerField]):
+        """
+        Sets the power fields of pylons and warp prisms.
+        Only fields that appeared, moved or disappeared are applied to the power raster.
+        """
+        fields = Counter(((float(position[0]), float(position[1])), float(radius)) for position, radius in fields)
+        removed = self._power_fields - fields
+        added = fields - self._power_fields
+        if not removed and not added:
+            return
+
+        self._power_fields = fields
+        for field, count in removed.items():
+            self._apply_power(field, -count)
+        for field, count in added.items():
+            self._apply_power(field, count)
+        self._integrals.pop("power", None)
+        self.versions["power"] += 1
+
+    def _apply_power(self, field: PowerField, count: int):
+        (x, y), radius = field
+        xs = slice(max(0, math.floor(x - radius)), max(0, min(self.width, math.ceil(x + radius) + 1)))
+        ys = slice(max(0, math.floor(y - radius)), max(0, min(self.height, math.ceil(y + radius) + 1)))
+        cell_x, cell_y = np.ogrid[xs, ys]
+        # Same as `PowerSource.covers` for cell centers
+        self.power_count[xs, ys] += (np.hypot(cell_x + 0.5 - x, cell_y + 0.5 - y) <= radius) * np.int16(count)
+
+    def _slice(self, footprint: Footprint) -> Tuple[slice, slice]:
+        x, y, width, height = footprint
+        x0 = math.floor(x - width / 2 + 0.5)
+        y0 = math.floor(y - height / 2 + 0.5)
+        return (
+            slice(max(0, x0), max(0, min(self.width, x0 + width))),
+            slice(max(0, y0), max(0, min(self.height, y0 + height))),
+        )
+
+    def _integral(self, name: str) -> np.ndarray:
+        integral = self._integrals.get(name)
+        if integral is None:
+            if name == "occupied":
+                integral = integral_image(self.occupied > 0)
+            elif name == "creep":
+                if self._creep_source is not None:
+                    self.creep = self._creep_source.T != 0
+                integral = integral_image(self.creep)
+            else:
+                integral = integral_image(self.power)
+            self._integrals[name] = integral
+        return integral
+
+    # endregion
+
+    # region Queries
+
+    def _corners(self, positions: Sequence[Tuple[float, float]], width: int, height: int):
+        points = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        x0 = np.floor(points[:, 0] - width / 2 + 0.5).astype(np.int32)
+        y0 = np.floor(points[:, 1] - height / 2 + 0.5).astype(np.int32)
+        inside = (x0 >= 0) & (y0 >= 0) & (x0 + width <= self.width) & (y0 + height <= self.height)
+        return np.clip(x0, 0, self.width - width), np.clip(y0, 0, self.height - height), inside
+
+    @staticmethod
+    def _sums(integral: np.ndarray, x0: np.ndarray, y0: np.ndarray, width: int, height: int) -> np.ndarray:
+        x1 = x0 + width
+        y1 = y0 + height
+        return integral[x1, y1] - integral[x0, y1] - integral[x1, y0] + integral[x0, y0]
+
+    def count_batch(
+        self, name: str, positions: Sequence[Tuple[float, float]], width: int, height: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Number of set cells in the footprints centered at the positions, -1 for footprints outside of the map.
+
+        :param name: Mask to count, one of "buildable", "occupied", "creep" or "power".
+        """
+        height = width if height is None else height
+        if len(positions) == 0:
+            return np.zeros(0, dtype=np.int32)
+        x0, y0, inside = self._corners(positions, width, height)
+        counts = self._sums(self._integral(name), x0, y0, width, height)
+        counts[~inside] = -1
+        return counts
+
+    def can_place_batch(
+        self,
+        positions: Sequence[Tuple[float, float]],
+        size: int,
+        creep: Optional[bool] = None,
+        power: bool = False,
+        ignore_buildable: bool = False,
+    ) -> np.ndarray:
+        """
+        Can structures of the size be placed at the positions.
+
+        :param creep: True if the whole footprint must be on creep, False if it must not have any creep.
+        :param power: Footprint center must be powered, with even sizes the four center cells must be powered.
+        :param ignore_buildable: Only check the dynamic masks, for positions that are already known to be buildable.
+        :return: Boolean array for the positions.
+        """
+        if len(positions) == 0:
+            return np.zeros(0, dtype=bool)
+
+        area = size * size
+        x0, y0, valid = self._corners(positions, size, size)
+        valid &= self._sums(self._integral("occupied"), x0, y0, size, size) == 0
+
+        if not ignore_buildable:
+            valid &= self._sums(self._integral("buildable"), x0, y0, size, size) == area
+        if creep is not None:
+            creep_cells = self._sums(self._integral("creep"), x0, y0, size, size)
+            valid &= (creep_cells == area) if creep else (creep_cells == 0)
+        if power:
+            valid &= self._powered(x0, y0, size)
+
+        return valid
+
+    def powered_batch(self, positions: Sequence[Tuple[float, float]], size: int) -> np.ndarray:
+        """ Are footprints of the size centered at the positions powered, see `can_place_batch`. """
+        if len(positions) == 0:
+            return np.zeros(0, dtype=bool)
+        x0, y0, inside = self._corners(positions, size, size)
+        return inside & self._powered(x0, y0, size)
+
+    def _powered(self, x0: np.ndarray, y0: np.ndarray, size: int) -> np.ndarray:
+        core = 1 + (size + 1) % 2
+        offset = (size - core) // 2
+        return self._sums(self._integral("power"), x0 + offset, y0 + offset, core, core) == core * core
+
+    def can_place(
+        self, position: Tuple[float, float], size: int, creep: Optional[bool] = None, power: bool = False
+    ) -> bool:
+        return bool(self.can_place_batch([position], size, creep, power)[0])
+
+    def warp_in_spots(
+        self,
+        center: Tuple[float, float],
+        count: int,
+        radius: float,
+        blocked: Sequence[Tuple[float, float]] = (),
+        influence: Optional[np.ndarray] = None,
+        spacing: float = 1.5,
+    ) -> List[Tuple[float, float]]:
+        """
+        Warp-in positions for up to `count` units near the center, selected from one mask of the cells in radius.
+
+        Cells must be powered, pathable and free of structures and of the `blocked` positions.
+        Cells with lower influence are preferred, after that cells closer to the center.
+
+        :param blocked: Positions of units that are in the way.
+        :param influence: Enemy influence of the map cells as [x][y] array.
+        :param spacing: Minimum distance between the selected positions.
+        """
+        x, y = center
+        xs = slice(max(0, math.floor(x - radius)), max(0, min(self.width, math.ceil(x + radius) + 1)))
+        ys = slice(max(0, math.floor(y - radius)), max(0, min(self.height, math.ceil(y + radius) + 1)))
+        cell_x, cell_y = np.ogrid[xs, ys]
+        mask = (
+            (self.power_count[xs, ys] > 0)
+            & self.pathable[xs, ys]
+            & (self.occupied[xs, ys] == 0)
+            & (np.hypot(cell_x + 0.5 - x, cell_y + 0.5 - y) <= radius)
+        )
+
+        if len(blocked) > 0:
+            cells = np.floor(np.array(blocked, dtype=np.float64).reshape(-1, 2)).astype(np.int32)
+            cells -= (xs.start, ys.start)
+            inside = np.all((cells >= 0) & (cells < mask.shape), axis=1)
+            mask[cells[inside, 0], cells[inside, 1]] = False
+
+        cells = np.argwhere(mask) + (xs.start, ys.start)
+        positions = cells + 0.5
+        order = np.hypot(positions[:, 0] - x, positions[:, 1] - y)
+        if influence is not None and len(cells) > 0:
+            order = np.lexsort((order, influence[cells[:, 0], cells[:, 1]]))
+        else:
+            order = np.argsort(order, kind="stable")
+
+        spots: List[Tuple[float, float]] = []
+        for px, py in positions[order]:
+            if len(spots) >= count:
+                break
+            if all(math.hypot(px - sx, py - sy) >= spacing for sx, sy in spots):
+                spots.append((float(px), float(py)))
+        return spots
+
+    # endregion
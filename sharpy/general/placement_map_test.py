@@ -0,0 +1,86 @@
+import numpy as np
+
+from .placement_map import PlacementMap
+
+
+def create_map() -> PlacementMap:
+    buildable = np.ones((40, 30), dtype=bool)
+    buildable[20:22, :] = False
+    return PlacementMap(buildable)
+
+
+class TestPlacementMap:
+    def test_buildable_and_structures(self):
+        placement = create_map()
+
+        assert placement.can_place_batch([(10.5, 10.5), (20.5, 10.5), (18.5, 10.5), (0.5, 0.5)], 3).tolist() == [
+            True,
+            False,
+            True,
+            False,
+        ]
+
+        placement.set_structures({1: (10.5, 10.5, 3, 3), 2: (30, 20, 2, 1)})
+        assert not placement.can_place((12.5, 12.5), 3)
+        assert placement.can_place((13.5, 12.5), 3)
+        assert not placement.can_place((30, 20.5), 2)
+        assert placement.can_place((30, 22), 2)
+
+        # Structure 1 was destroyed, structure 3 started
+        placement.set_structures({2: (30, 20, 2, 1), 3: (14, 12, 2, 2)})
+        assert placement.can_place((10.5, 10.5), 3)
+        assert not placement.can_place((13.5, 12.5), 3)
+        assert placement.occupied.sum() == 6
+
+    def test_creep(self):
+        placement = create_map()
+        creep = np.zeros((30, 40), dtype=np.uint8)
+        creep[5:15, 5:15] = 1
+        placement.set_creep(creep)
+
+        positions = [(7.5, 7.5), (14.5, 7.5), (30.5, 7.5)]
+        assert placement.can_place_batch(positions, 3, creep=True).tolist() == [True, False, False]
+        assert placement.can_place_batch(positions, 3, creep=False).tolist() == [False, False, True]
+        assert placement.count_batch("creep", [(14.5, 7.5), (-5, -5)], 3).tolist() == [6, -1]
+
+    def test_power(self):
+        placement = create_map()
+        placement.set_power([((10, 10), 6.5)])
+
+        assert placement.can_place((14.5, 10.5), 3, power=True)
+        assert not placement.can_place((16.5, 10.5), 3, power=True)
+        # Even sizes need all four center cells powered
+        assert placement.can_place((15, 10), 2, power=True)
+        assert not placement.can_place((10, 17), 2, power=True)
+
+        placement.set_power([])
+        assert not placement.can_place((14.5, 10.5), 3, power=True)
+
+    def test_power_fields_move(self):
+        placement = create_map()
+        placement.set_power([((10, 10), 6.5), ((14, 10), 3.75)])
+        assert placement.power_count[13, 10] == 2
+
+        # Warp prism moved away, pylon stays
+        placement.set_power([((10, 10), 6.5), ((30, 10), 3.75)])
+        assert placement.power_count[13, 10] == 1
+        assert placement.can_place((30.5, 10.5), 1, power=True)
+        assert not placement.power[19, 10]
+
+    def test_warp_in_spots(self):
+        placement = create_map()
+        placement.set_power([((15, 10), 6.5)])
+        placement.set_structures({1: (15, 10, 2, 2)})
+
+        spots = placement.warp_in_spots((15, 10), 3, 7, blocked=[(15.5, 8.5)])
+        assert spots == [(13.5, 9.5), (14.5, 11.5), (16.5, 9.5)]
+
+        # Cells on the left side have high influence and cells past the unbuildable column are never used
+        influence = np.full((40, 30), 20)
+        influence[:15, :] = 50
+        spots = placement.warp_in_spots((15, 10), 40, 7, influence=influence)
+        assert len(spots) > 10
+        assert spots[0] == (15.5, 8.5)
+        assert all(x > 15 for x, y in spots[:10])
+        assert all(x < 20 for x, y in spots)
+        assert len(set(spots)) == len(spots)
@@ -0,0 +1,84 @@
+from typing import Dict, List, TYPE_CHECKING
+
+import numpy as np
+
+from sc2 import UnitTypeId
+from sc2.unit import Unit
+from sharpy.general.extended_power import ExtendedPower, POWER_FIELDS
+
+if TYPE_CHECKING:
+    from sharpy.managers.core import UnitValue
+
+
+class PowerTable:
+    """
+    Unit type feature matrix for calculating `ExtendedPower` of many units at once.
+
+    Each unit type has a row with the power fields the unit type adds to per power, and a row with the fields
+    it adds to regardless of health, such as detectors. Rows are solved from `ExtendedPower.add_unit` the first
+    time the type is seen, so the results are identical to adding the units one by one.
+    """
+
+    def __init__(self, unit_values: "UnitValue"):
+        self.unit_values = unit_values
+        self._rows: Dict[UnitTypeId, int] = {}
+        self.scaled = np.zeros((0, len(POWER_FIELDS)), dtype=np.float64)
+        self.constant = np.zeros((0, len(POWER_FIELDS)), dtype=np.float64)
+        self.static_ground = np.zeros(0, dtype=bool)
+        self.static_air = np.zeros(0, dtype=bool)
+
+    def row(self, type_id: UnitTypeId) -> int:
+        row = self._rows.get(type_id, None)
+        if row is None:
+            row = self._add_row(type_id)
+        return row
+
+    def rows(self, units: List[Unit]) -> np.ndarray:
+        return np.array([self.row(unit.type_id) for unit in units], dtype=np.int32)
+
+    def _add_row(self, type_id: UnitTypeId) -> int:
+        single = ExtendedPower(self.unit_values)
+        single.add_unit(type_id)
+        double = ExtendedPower(self.unit_values)
+        double.add_unit(type_id, 2)
+        scaled = double.to_array() - single.to_array()
+        constant = single.to_array() - scaled
+
+        self.scaled = np.vstack((self.scaled, scaled))
+        self.constant = np.vstack((self.constant, constant))
+        self.static_ground = np.append(self.static_ground, self.unit_values.is_static_ground_defense(type_id))
+        self.static_air = np.append(self.static_air, self.unit_values.is_static_air_defense(type_id))
+        self._rows[type_id] = len(self._rows)
+        return self._rows[type_id]
+
+    @staticmethod
+    def health_factors(units: List[Unit]) -> np.ndarray:
+        """ Health multipliers of the units, see `UnitValue.power`. """
+        health = np.array(
+            [(unit.health + unit.shield, unit.health_max + unit.shield_max) for unit in units], dtype=np.float64
+        ).reshape(-1, 2)
+        factors = np.ones(len(health), dtype=np.float64)
+        known = health[:, 1] > 0
+        factors[known] = 0.5 + 0.5 * health[known, 0] / health[known, 1]
+        return factors
+
+    def unit_power(self, unit: Unit) -> np.ndarray:
+        """ Power of a single unit in the order of `POWER_FIELDS`. """
+        row = self.row(unit.type_id)
+        return self.health_factors([unit])[0] * self.scaled[row] + self.constant[row]
+
+    def aggregate(self, rows: np.ndarray, factors: np.ndarray, groups: np.ndarray, group_count: int) -> np.ndarray:
+        """
+        Sums the power of the units in each group.
+
+        :param rows: Type row of each unit.
+        :param factors: Health multiplier of each unit.
+        :param groups: Group of each unit, units with negative group are left out.
+        :return: Power of each group as [group][field] array in the order of `POWER_FIELDS`.
+        """
+        included = groups >= 0
+        rows = rows[included]
+        powers = factors[included, None] * self.scaled[rows] + self.constant[rows]
+        result = np.zeros((group_count, len(POWER_FIELDS)), dtype=np.float64)
+        np.add.at(result, groups[included], powers)
+        return result
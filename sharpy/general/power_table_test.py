@@ -0,0 +1,44 @@
+import numpy as np
+
+from sc2 import UnitTypeId
+from sharpy.general.extended_power import ExtendedPower
+from sharpy.managers.core.unit_value import UnitValue
+from .power_table import PowerTable
+from .zone_tracker_test import create_unit
+
+UNITS = [
+    (UnitTypeId.ZEALOT, 0),
+    (UnitTypeId.SENTRY, 1),
+    (UnitTypeId.OBSERVER, 0),
+    (UnitTypeId.COLOSSUS, 2),
+    (UnitTypeId.SIEGETANKSIEGED, 2),
+    (UnitTypeId.PHOTONCANNON, -1),
+    (UnitTypeId.ZERGLING, 1),
+]
+
+
+class TestPowerTable:
+    def test_aggregate_matches_add_unit(self):
+        unit_values = UnitValue()
+        table = PowerTable(unit_values)
+        units = [create_unit(i, type_id, 10, 10, 20 + i * 10) for i, (type_id, _) in enumerate(UNITS)]
+        groups = np.array([group for _, group in UNITS])
+
+        result = table.aggregate(table.rows(units), table.health_factors(units), groups, 3)
+
+        for group in range(0, 3):
+            expected = ExtendedPower(unit_values)
+            for unit, unit_group in zip(units, groups):
+                if unit_group == group:
+                    expected.add_unit(unit)
+            assert np.allclose(result[group], expected.to_array())
+
+    def test_static_defenses(self):
+        table = PowerTable(UnitValue())
+        cannon = table.row(UnitTypeId.PHOTONCANNON)
+        spore = table.row(UnitTypeId.SPORECRAWLER)
+        zealot = table.row(UnitTypeId.ZEALOT)
+
+        assert table.static_ground[cannon] and table.static_air[cannon]
+        assert not table.static_ground[spore] and table.static_air[spore]
+        assert not table.static_ground[zealot] and not table.static_air[zealot]
@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from sc2.position import Point2
+
+from .placement_map import PlacementMap, Footprint
+
+# Status arrays of slot groups and the placement map mask they are solved from
+STATUS_MASKS = {"occupied": "occupied", "powered": "power", "on_creep": "creep"}
+
+
+class SlotGroup:
+    """ Solved building slots of a single size in priority order, with status of each slot as arrays. """
+
+    def __init__(self, size: int, positions: List[Point2], wall: List[Point2]):
+        self.size = size
+        self.positions = list(positions)
+        self.wall_positions = list(wall)
+        self.points = np.array(self.positions, dtype=np.float64).reshape(-1, 2)
+
+        wall_set = set(wall)
+        self.wall = np.array([position in wall_set for position in self.positions], dtype=bool)
+        self.occupied = np.zeros(len(self.positions), dtype=bool)
+        self.powered = np.zeros(len(self.positions), dtype=bool)
+        self.on_creep = np.zeros(len(self.positions), dtype=bool)
+        # Placement map versions that the statuses were solved with
+        self.versions: Dict[str, int] = dict()
+
+    def matches(self, positions: List[Point2], wall: List[Point2]) -> bool:
+        return self.positions == positions and self.wall_positions == wall
+
+    def overlaps(self, footprint: Footprint) -> np.ndarray:
+        """ Slots that may overlap with the footprint, footprints are snapped to cells by up to half a cell. """
+        x, y, width, height = footprint
+        return (np.abs(self.points[:, 0] - x) * 2 < self.size + width + 1) & (
+            np.abs(self.points[:, 1] - y) * 2 < self.size + height + 1
+        )
+
+
+class SlotRegistry:
+    """
+    Registry of the solved building slots by size with occupancy, wall membership, power and creep status.
+
+    Statuses are solved from the placement map when a query needs them and the placement map has changed.
+    Structures that started or were destroyed only update the slots under their footprints.
+    Slots that are ready for a rule are cached in priority order as tuples until any status of the size changes,
+    so picking the next position with the same rule is O(1).
+    """
+
+    def __init__(self, placement: PlacementMap):
+        self.placement = placement
+        self.groups: Dict[int, SlotGroup] = dict()
+        self._ready: Dict[Tuple, Tuple[Point2, ...]] = dict()
+
+    def set_slots(self, size: int, positions: List[Point2], wall: List[Point2]):
+        """ Sets the slots of a size in priority order, statuses are solved again only if the slots changed. """
+        group = self.groups.get(size)
+        if group is None or not group.matches(positions, wall):
+            self.groups[size] = SlotGroup(size, positions, wall)
+            self._clear(size)
+
+    def slots(self, size: int, allow_wall: bool = True, step: int = 1) -> Tuple[Point2, ...]:
+        """ Slots of the size in priority order regardless of their status. """
+        return self._select(size, False, False, allow_wall, step, False)
+
+    def ready(
+        self, size: int, power: bool = False, creep: bool = False, allow_wall: bool = True, step: int = 1
+    ) -> Tuple[Point2, ...]:
+        """
+        Free slots of the size in priority order that match the rule.
+
+        :param power: Slot must be powered.
+        :param creep: Slot must be on creep, with the area that zerg structures require.
+        :param allow_wall: Include slots that are part of the wall.
+        :param step: Only include every step:th slot.
+        """
+        return self._select(size, power, creep, allow_wall, step, True)
+
+    def first(
+        self, size: int, power: bool = False, creep: bool = False, allow_wall: bool = True, step: int = 1
+    ) -> Optional[Point2]:
+        """ Free slot of the size with highest priority that matches the rule, see `ready`. """
+        ready = self.ready(size, power, creep, allow_wall, step)
+        if ready:
+            return ready[0]
+        return None
+
+    def _select(
+        self, size: int, power: bool, creep: bool, allow_wall: bool, step: int, free: bool
+    ) -> Tuple[Point2, ...]:
+        group = self.groups.get(size)
+        if group is None:
+            return ()
+
+        if free:
+            self._solve(group, "occupied")
+        if power:
+            self._solve(group, "powered")
+        if creep:
+            self._solve(group, "on_creep")
+
+        key = (size, power, creep, allow_wall, step, free)
+        selected = self._ready.get(key)
+        if selected is None:
+            mask = np.arange(len(group.positions)) % step == 0
+            if free:
+                mask &= ~group.occupied
+            if power:
+                mask &= group.powered
+            if creep:
+                mask &= group.on_creep
+            if not allow_wall:
+                mask &= ~group.wall
+            selected = tuple(group.positions[index] for index in np.flatnonzero(mask))
+            self._ready[key] = selected
+        return selected
+
+    def _solve(self, group: SlotGroup, status: str):
+        version = self.placement.versions[STATUS_MASKS[status]]
+        solved_version = group.versions.get(status)
+        if solved_version == version:
+            return
+
+        current = getattr(group, status)
+        if status == "occupied" and solved_version == version - 1:
+            # Only the structures that started or were destroyed since last solve
+            mask = np.zeros(len(group.positions), dtype=bool)
+            for footprint in self.placement.changed_footprints:
+                mask |= group.overlaps(footprint)
+            indices = np.flatnonzero(mask)
+            values = self._solve_status(group, status, group.points[indices])
+        else:
+            indices = slice(None)
+            values = self._solve_status(group, status, group.points)
+
+        group.versions[status] = version
+        if not np.array_equal(current[indices], values):
+            current[indices] = values
+            self._clear(group.size)
+
+    def _solve_status(self, group: SlotGroup, status: str, points: np.ndarray) -> np.ndarray:
+        if status == "occupied":
+            return self.placement.count_batch("occupied", points, group.size) != 0
+        if status == "powered":
+            return self.placement.powered_batch(points, group.size)
+        # Creep is required on an area two cells larger than the structure, starting from the same corner
+        area = group.size + 2
+        corners = np.floor(points) + 1
+        return self.placement.count_batch("creep", corners, area) == area * area
+
+    def _clear(self, size: int):
+        for key in [key for key in self._ready.keys() if key[0] == size]:
+            del self._ready[key]
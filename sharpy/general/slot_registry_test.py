@@ -0,0 +1,58 @@
+import numpy as np
+
+from sc2.position import Point2
+
+from .placement_map import PlacementMap
+from .slot_registry import SlotRegistry
+
+SLOTS = [Point2((10.5, 10.5)), Point2((20.5, 10.5)), Point2((30.5, 10.5)), Point2((30.5, 20.5))]
+
+
+def create_registry() -> SlotRegistry:
+    registry = SlotRegistry(PlacementMap(np.ones((40, 30), dtype=bool)))
+    registry.set_slots(3, SLOTS, [SLOTS[1]])
+    return registry
+
+
+class TestSlotRegistry:
+    def test_occupancy_and_wall(self):
+        registry = create_registry()
+        placement = registry.placement
+
+        assert registry.first(3) == SLOTS[0]
+        assert registry.ready(3, allow_wall=False) == (SLOTS[0], SLOTS[2], SLOTS[3])
+        assert registry.ready(3, step=2) == (SLOTS[0], SLOTS[2])
+        assert registry.first(2) is None
+
+        # Structure started on the first slot and another one overlapping the third slot
+        placement.set_structures({1: (10.5, 10.5, 3, 3), 2: (32, 11, 2, 2)})
+        assert registry.first(3) == SLOTS[1]
+        assert registry.first(3, allow_wall=False) == SLOTS[3]
+        assert registry.slots(3, allow_wall=False) == (SLOTS[0], SLOTS[2], SLOTS[3])
+
+        # First structure was destroyed
+        placement.set_structures({2: (32, 11, 2, 2)})
+        assert registry.ready(3) == (SLOTS[0], SLOTS[1], SLOTS[3])
+
+        # Statuses are solved again when slots change
+        registry.set_slots(3, SLOTS[::-1], [])
+        assert registry.ready(3) == (SLOTS[3], SLOTS[1], SLOTS[0])
+
+    def test_power_and_creep(self):
+        registry = create_registry()
+        placement = registry.placement
+
+        assert registry.first(3, power=True) is None
+        placement.set_power([((30, 15), 6.5)])
+        assert registry.ready(3, power=True) == (SLOTS[2], SLOTS[3])
+
+        creep = np.zeros((30, 40), dtype=np.uint8)
+        creep[9:14, 29:34] = 1
+        placement.set_creep(creep)
+        assert registry.ready(3, creep=True) == (SLOTS[2],)
+
+        # Creep must extend two cells past the structure
+        creep = creep.copy()
+        creep[9:14, 33] = 0
+        placement.set_creep(creep)
+        assert registry.first(3, creep=True) is None
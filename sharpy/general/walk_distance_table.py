@@ -0,0 +1,161 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import ndimage
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+# Number of sources solved at once, limits the size of the temporary distance arrays
+SOURCE_CHUNK_SIZE = 16
+DIAGONAL_COST = 1.4142
+
+
+def grid_graph(pathable: np.ndarray) -> csr_matrix:
+    """
+    Creates a graph of the pathable cells with the same movement rules as the path finder:
+    8 directions and diagonal moves are not allowed to cut corners.
+
+    :param pathable: Pathable cells as boolean [x][y] array.
+    """
+    width, height = pathable.shape
+    indices = np.arange(width * height).reshape(width, height)
+    rows = []
+    cols = []
+    costs = []
+
+    for dx, dy, cost in ((1, 0, 1.0), (0, 1, 1.0), (1, 1, DIAGONAL_COST), (1, -1, DIAGONAL_COST)):
+        xs = slice(0, width - dx)
+        xs_to = slice(dx, width)
+        if dy >= 0:
+            ys = slice(0, height - dy)
+            ys_to = slice(dy, height)
+        else:
+            ys = slice(-dy, height)
+            ys_to = slice(0, height + dy)
+
+        mask = pathable[xs, ys] & pathable[xs_to, ys_to]
+        if dx != 0 and dy != 0:
+            mask &= pathable[xs_to, ys] & pathable[xs, ys_to]
+
+        rows.append(indices[xs, ys][mask])
+        cols.append(indices[xs_to, ys_to][mask])
+        costs.append(np.full(np.count_nonzero(mask), cost))
+
+    size = width * height
+    data = (np.concatenate(costs), (np.concatenate(rows), np.concatenate(cols)))
+    return coo_matrix(data, shape=(size, size)).tocsr()
+
+
+def blocks_passage(pathable: np.ndarray, center: Tuple[float, float], radius: float) -> bool:
+    """
+    Checks whether a blocker, such as a rock, separates pathable areas around it.
+    Blockers standing in the open only make units walk around them, while blockers in passages
+    change the connectivity of the map.
+
+    :param pathable: Pathable cells as boolean [x][y] array, the cells of the blocker itself are ignored.
+    :param center: Center of the blocker.
+    :param radius: Radius of the blocker.
+    """
+    margin = int(math.ceil(radius)) + 3
+    x0 = max(0, int(center[0]) - margin)
+    y0 = max(0, int(center[1]) - margin)
+    x1 = min(pathable.shape[0], int(center[0]) + margin + 1)
+    y1 = min(pathable.shape[1], int(center[1]) + margin + 1)
+
+    xs, ys = np.mgrid[x0:x1, y0:y1]
+    distances = np.hypot(xs + 0.5 - center[0], ys + 0.5 - center[1])
+    blocker = distances <= radius + 0.5
+    ring = (distances > radius + 0.5) & (distances <= radius + 2)
+
+    window = pathable[x0:x1, y0:y1] & ~blocker
+    labels, count = ndimage.label(window, structure=np.ones((3, 3)))
+    return len(np.unique(labels[ring & window])) > 1
+
+
+class WalkDistanceTable:
+    """
+    Dense walk distance matrix between key points of the map, such as zone centers, ramps and gather points.
+
+    Distances are solved with a single Dijkstra search per point, lookups between known points are O(1).
+    Points are identified by the grid cell they round to, the same way as the path finder does.
+    """
+
+    def __init__(self, pathable: np.ndarray, points: List[Tuple[float, float]]):
+        """
+        :param pathable: Pathable cells as boolean [x][y] array.
+        :param points: Key points of the map.
+        """
+        self.cells: List[Tuple[int, int]] = []
+        self.index: Dict[Tuple[int, int], int] = {}
+        self.distances: np.ndarray = np.zeros((0, 0))
+        self._set_grid(pathable)
+        self.add_points(points)
+
+    @staticmethod
+    def cell(point: Tuple[float, float]) -> Tuple[int, int]:
+        return int(round(point[0])), int(round(point[1]))
+
+    def _set_grid(self, pathable: np.ndarray):
+        self.pathable = pathable
+        self._graph = grid_graph(pathable)
+        # Closest pathable cell for each cell, used for points that are not pathable themselves
+        _, self._closest = ndimage.distance_transform_edt(~pathable, return_indices=True)
+
+    def _node(self, cell: Tuple[int, int]) -> int:
+        x = self._closest[0][cell]
+        y = self._closest[1][cell]
+        return int(x * self.pathable.shape[1] + y)
+
+    def add_points(self, points: List[Tuple[float, float]]):
+        """ Adds new key points to the table, only distances from the new points are solved. """
+        width, height = self.pathable.shape
+        new_cells = []
+        for point in points:
+            cell = self.cell(point)
+            if cell not in self.index and 0 <= cell[0] < width and 0 <= cell[1] < height:
+                self.index[cell] = len(self.cells)
+                self.cells.append(cell)
+                new_cells.append(cell)
+
+        if not new_cells:
+            return
+
+        count = len(self.cells)
+        old_count = count - len(new_cells)
+        distances = np.full((count, count), np.inf)
+        distances[:old_count, :old_count] = self.distances
+        self.distances = distances
+        self._solve(old_count, count)
+
+    def rebuild(self, pathable: np.ndarray):
+        """ Solves all distances again, use when the connectivity of the map has changed. """
+        self._set_grid(pathable)
+        self._solve(0, len(self.cells))
+
+    def _solve(self, start: int, end: int):
+        nodes = np.array([self._node(cell) for cell in self.cells], dtype=np.int64)
+
+        for chunk_start in range(start, end, SOURCE_CHUNK_SIZE):
+            chunk_end = min(end, chunk_start + SOURCE_CHUNK_SIZE)
+            result = dijkstra(self._graph, directed=False, indices=nodes[chunk_start:chunk_end])
+            self.distances[chunk_start:chunk_end, :] = result[:, nodes]
+            self.distances[:, chunk_start:chunk_end] = result[:, nodes].T
+
+    def distance(self, start: Tuple[float, float], end: Tuple[float, float]) -> Optional[float]:
+        """
+        Walk distance between two key points.
+
+        :return: Distance, None when either of the points is not in the table or there is no path.
+        """
+        index_start = self.index.get(self.cell(start))
+        if index_start is None:
+            return None
+        index_end = self.index.get(self.cell(end))
+        if index_end is None:
+            return None
+
+        distance = self.distances[index_start, index_end]
+        if distance == np.inf:
+            return None
+        return float(distance)
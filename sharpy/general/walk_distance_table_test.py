@@ -0,0 +1,46 @@
+import numpy as np
+
+from sc2pathlib import PathFinder
+from .walk_distance_table import WalkDistanceTable, blocks_passage
+
+POINTS = [(10.5, 10.5), (50.5, 30.5), (90, 70), (45.2, 75.7)]
+
+
+def create_grid() -> np.ndarray:
+    """ Open area with a wall that has a single gap in it. """
+    grid = np.zeros((100, 80), dtype=np.uint8)
+    grid[2:98, 2:78] = 1
+    grid[40:43, :] = 0
+    grid[40:43, 50:56] = 1
+    return grid
+
+
+class TestWalkDistanceTable:
+    def test_distances_match_path_finder(self):
+        grid = create_grid()
+        table = WalkDistanceTable(grid > 0, POINTS)
+        path_finder = PathFinder(grid)
+
+        for start in POINTS:
+            for end in POINTS:
+                assert abs(table.distance(start, end) - path_finder.find_path(start, end)[1]) < 0.001
+
+    def test_unknown_points_are_not_answered(self):
+        table = WalkDistanceTable(create_grid() > 0, POINTS)
+        assert table.distance(POINTS[0], (20, 20)) is None
+
+        table.add_points([(20, 20)])
+        assert table.distance(POINTS[0], (20, 20)) is not None
+        assert table.distance(POINTS[1], (20, 20)) is not None
+
+    def test_rebuild_after_passage_opens(self):
+        grid = create_grid()
+        table = WalkDistanceTable(grid > 0, POINTS)
+        before = table.distance(POINTS[0], POINTS[1])
+
+        grid[40:43, 28:33] = 1
+        assert blocks_passage(grid > 0, (41.5, 30.5), 2)
+        assert not blocks_passage(grid > 0, (20.5, 30.5), 2)
+
+        table.rebuild(grid > 0)
+        assert table.distance(POINTS[0], POINTS[1]) < before
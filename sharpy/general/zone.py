@@ -14,6 +14,8 @@ from sharpy.general.extended_power import ExtendedPower
 
 import enum
 
+import numpy as np
+
 worker_types = {UnitTypeId.SCV, UnitTypeId.MULE, UnitTypeId.DRONE, UnitTypeId.PROBE}
 
 if TYPE_CHECKING:
@@ -82,6 +84,10 @@ class Zone:
         self.enemy_workers: Units = Units([], self.ai)
         self.known_enemy_power: ExtendedPower = ExtendedPower(self.unit_values)
         self.our_power: ExtendedPower = ExtendedPower(self.unit_values)
+        # Power of enemy static defenses, figured out in zone manager update
+        self._enemy_static_power: ExtendedPower = ExtendedPower(self.unit_values)
+        self._enemy_static_ground_power: ExtendedPower = ExtendedPower(self.unit_values)
+        self._enemy_static_air_power: ExtendedPower = ExtendedPower(self.unit_values)
 
         # Assaulting enemies can be further away, but zone defense should prepare for at least that amount of defense
         self.assaulting_enemies: Units = Units([], self.ai)
@@ -201,14 +207,9 @@ class Zone:
             if new_mf:
                 self.mineral_fields.append(new_mf)
 
-        self.our_power.clear()
-        self.known_enemy_power.clear()
         self.assaulting_enemy_power.clear()
 
-        # Own and enemy units are figured out in zone manager update.
-
-        # Only add units that we can fight against
-        self.known_enemy_units = self.known_enemy_units.filter(lambda x: x.cloak != 2)
+        # Own and enemy units and their power are figured out in zone manager update.
         self.enemy_workers = self.known_enemy_units.of_type(worker_types)
         self.our_workers: Units = self.our_units.of_type(worker_types)
 
@@ -217,20 +218,6 @@ class Zone:
         self.update_our_townhall()
         self.update_enemy_townhall()
 
-        if self.ai.is_visible(self.center_location):
-            self.last_scouted_center = self.knowledge.ai.time
-
-        if self.ai.is_visible(self.mineral_line_center):
-            self.last_scouted_mineral_line = self.knowledge.ai.time
-
-        for unit in self.our_units:
-            # Our unit is inside the zone
-            self.our_power.add_unit(unit)
-
-        for unit in self.known_enemy_units:
-            # Enemy unit is inside the zone
-            self.known_enemy_power.add_unit(unit)
-
         if self.is_ours:
             self.calc_needs_evacuation()
             self.assaulting_enemies: Units = self.cache.enemy_in_range(self.center_location, self.danger_radius)
@@ -243,11 +230,9 @@ class Zone:
         best_score = 0
         best_mf: Optional[Unit] = None
 
+        workers_by_target = self.cache.workers_by_target
         for mf in self.mineral_fields:  # type: Unit
-            score = mf.mineral_contents
-            for worker in self.our_workers:  # type: Unit
-                if worker.order_target == mf.tag:
-                    score -= 1000
+            score = mf.mineral_contents - 1000 * len(workers_by_target.get(mf.tag, []))
             if score > best_score or best_mf is None:
                 best_mf = mf
                 best_score = score
@@ -296,7 +281,7 @@ class Zone:
 
         # We are going to presume that the enemy has a town hall even if we don't see one
         self._is_enemys = self.enemy_townhall is not None or (
-            self == self.zone_manager.enemy_main_zone and self in self.zone_manager.unscouted_zones
+            self == self.zone_manager.enemy_main_zone and not self.is_scouted_at_least_once
         )
 
     @property
@@ -385,17 +370,18 @@ class Zone:
     @property
     def enemy_static_power(self) -> ExtendedPower:
         """Returns power of enemy static defenses."""
-        power = ExtendedPower(self.unit_values)
-        power.add_units(self.enemy_static_defenses)
-        return power
+        return self._enemy_static_power
+
+    def set_enemy_static_power(self, power: np.ndarray, ground_power: np.ndarray, air_power: np.ndarray):
+        """ Sets power of enemy static defenses, in the order of `POWER_FIELDS`. """
+        self._enemy_static_power.set_array(power)
+        self._enemy_static_ground_power.set_array(ground_power)
+        self._enemy_static_air_power.set_array(air_power)
 
     @property
     def enemy_static_ground_power(self) -> ExtendedPower:
         """Returns power of enemy static ground defenses."""
-        power = ExtendedPower(self.unit_values)
-        for ground_def in self.enemy_static_ground_defenses:
-            power.add_unit(ground_def)
-        return power
+        return self._enemy_static_ground_power
 
     @property
     def enemy_static_air_defenses(self) -> Units:
@@ -404,22 +390,21 @@ class Zone:
 
     @property
     def enemy_static_air_power(self) -> ExtendedPower:
-        """Returns power of enemy static ground defenses on the zone."""
-        power = ExtendedPower(self.unit_values)
-        for air_def in self.enemy_static_air_defenses:
-            power.add_unit(air_def)
-        return power
+        """Returns power of enemy static air defenses on the zone."""
+        return self._enemy_static_air_power
 
     def go_mine(self, unit: Unit):
         if len(self.mineral_fields) > 0:
             # Go to mine in this zone
-            mf = self.mineral_fields[0]
+            mf = self.check_best_mineral_field()
             unit.gather(mf)
+            self.cache.assign_worker(unit, mf)
         elif self.ai.townhalls.exists and self.ai.mineral_field.exists:
             closest_base = self.ai.townhalls.closest_to(self.center_location)
             # Go to mine in some other base
             mf = self.ai.mineral_field.closest_to(closest_base)
             unit.gather(mf)
+            self.cache.assign_worker(unit, mf)
 
     def _find_ramp(self, ai) -> Optional[ExtendedRamp]:
         if not self.ai.game_info.map_ramps:
@@ -0,0 +1,290 @@
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import ndimage
+
+from sc2.position import Point2
+from sc2pathlib import PathFinder
+from sc2pathlib.choke import Choke
+
+# Choke center must be this close to a zone border to be used as the crossing point of that border
+CHOKE_SNAP_DISTANCE = 3
+
+
+class ZoneGraph:
+    """
+    Hierarchical path finder on top of sc2pathlib zones and chokes.
+
+    Nodes of the abstract graph are zone centers and portals. Portals are the crossing points of the
+    borders between two zones, placed on the choke when one is found on the border. Pathable cells
+    that are not part of any zone are given to the closest zone, so that every border is a crossing
+    between two zones. All transitions between the portals and centers inside a zone are searched
+    once with full resolution A* on creation, long range queries are then answered with Dijkstra over
+    the abstract graph and only the segments that the caller needs are refined.
+    """
+
+    def __init__(
+        self,
+        path_finder: PathFinder,
+        zone_grid: np.ndarray,
+        zone_centers: List[Point2],
+        chokes: Optional[List[Choke]] = None,
+    ):
+        """
+        :param path_finder: Path finder with the terrain the graph is created for.
+        :param zone_grid: Zone index for each cell as [x][y] array, zones start from 1 onwards.
+        :param zone_centers: Center locations of zones in zone index order, first one is zone 1.
+        :param chokes: Chokes of the map, used as portals when they are close to a zone border.
+        """
+        self.path_finder = path_finder
+        pathable = np.array(path_finder.map) > 0
+        self.areas = self._solve_areas(np.array(zone_grid, dtype=np.int32), pathable)
+
+        self.nodes: List[Tuple[int, int]] = []
+        # Zones that the node belongs to. Portals belong to two zones, centers to one.
+        self.node_zones: List[Tuple[int, ...]] = []
+        self.zone_nodes: Dict[int, List[int]] = {}
+        self.center_nodes: Dict[Tuple[int, int], int] = {}
+        self.edges: Dict[int, Dict[int, float]] = {}
+        self._segments: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+
+        self._create_portals(chokes or [])
+
+        for index, center in enumerate(zone_centers):
+            zone = index + 1
+            cell = (int(round(center[0])), int(round(center[1])))
+            if self.zone_at(center) == zone:
+                self.center_nodes[cell] = self._add_node(cell, (zone,))
+
+        for nodes in self.zone_nodes.values():
+            for i in range(0, len(nodes)):
+                for j in range(i + 1, len(nodes)):
+                    self._add_edge(nodes[i], nodes[j])
+
+    # region Init
+
+    @staticmethod
+    def _solve_areas(zone_grid: np.ndarray, pathable: np.ndarray) -> np.ndarray:
+        """ Gives all pathable cells without a zone to the closest zone. """
+        if not np.any(zone_grid > 0):
+            return np.zeros(zone_grid.shape, dtype=np.int32)
+
+        _, (closest_x, closest_y) = ndimage.distance_transform_edt(zone_grid == 0, return_indices=True)
+        areas = zone_grid[closest_x, closest_y]
+        areas[~pathable] = 0
+        return areas
+
+    def _create_portals(self, chokes: List[Choke]):
+        areas = self.areas
+        borders: Dict[Tuple[int, int], np.ndarray] = {}
+
+        for shifted_a, shifted_b, dx, dy in (
+            (areas[:-1, :], areas[1:, :], 1, 0),
+            (areas[:, :-1], areas[:, 1:], 0, 1),
+        ):
+            mask = (shifted_a != shifted_b) & (shifted_a > 0) & (shifted_b > 0)
+            xs, ys = np.nonzero(mask)
+            for x, y in zip(xs, ys):
+                zone_a = areas[x, y]
+                zone_b = areas[x + dx, y + dy]
+                key = (min(zone_a, zone_b), max(zone_a, zone_b))
+                border = borders.get(key)
+                if border is None:
+                    border = np.zeros(areas.shape, dtype=bool)
+                    borders[key] = border
+                border[x, y] = True
+                border[x + dx, y + dy] = True
+
+        choke_centers = [
+            ((choke.main_line[0][0] + choke.main_line[1][0]) / 2, (choke.main_line[0][1] + choke.main_line[1][1]) / 2)
+            for choke in chokes
+        ]
+
+        for key, border in borders.items():
+            labels, count = ndimage.label(border, structure=np.ones((3, 3)))
+            for label in range(1, count + 1):
+                cells = np.argwhere(labels == label)
+                portal = self._portal_cell(cells, choke_centers)
+                self._add_node(portal, key)
+
+    def _portal_cell(self, cells: np.ndarray, choke_centers: List[Tuple[float, float]]) -> Tuple[int, int]:
+        for center in choke_centers:
+            distances = np.hypot(cells[:, 0] - center[0], cells[:, 1] - center[1])
+            index = int(np.argmin(distances))
+            if distances[index] <= CHOKE_SNAP_DISTANCE:
+                return int(cells[index][0]), int(cells[index][1])
+
+        centroid = cells.mean(axis=0)
+        index = int(np.argmin(np.hypot(cells[:, 0] - centroid[0], cells[:, 1] - centroid[1])))
+        return int(cells[index][0]), int(cells[index][1])
+
+    def _add_node(self, cell: Tuple[int, int], zones: Tuple[int, ...]) -> int:
+        index = len(self.nodes)
+        self.nodes.append(cell)
+        self.node_zones.append(zones)
+        self.edges[index] = {}
+        for zone in zones:
+            self.zone_nodes.setdefault(zone, []).append(index)
+        return index
+
+    def _add_edge(self, node_a: int, node_b: int):
+        path, distance = self.path_finder.find_path(self.nodes[node_a], self.nodes[node_b])
+        if len(path) < 1:
+            return  # Not connected within current terrain
+
+        self.edges[node_a][node_b] = distance
+        self.edges[node_b][node_a] = distance
+        self._segments[(node_a, node_b)] = path
+
+    # endregion
+
+    # region Queries
+
+    def zone_at(self, point: Tuple[float, float]) -> int:
+        """ Zone of the point, 0 when the point is not pathable. """
+        x = int(round(point[0]))
+        y = int(round(point[1]))
+        if 0 <= x < self.areas.shape[0] and 0 <= y < self.areas.shape[1]:
+            return int(self.areas[x, y])
+        return 0
+
+    def route(self, start: Tuple[float, float], end: Tuple[float, float]) -> Optional[Tuple[List[int], float]]:
+        """
+        Finds the route over the abstract graph.
+        Distances from arbitrary points to the nodes of their zone are estimated with straight lines,
+        distances from and to zone centers are exact.
+
+        :return: Tuple of node indices and estimated total distance, None if the points are in the same zone
+        or no route could be found.
+        """
+        start_zone = self.zone_at(start)
+        end_zone = self.zone_at(end)
+        if start_zone == 0 or end_zone == 0 or start_zone == end_zone:
+            return None
+
+        start_cell = (int(round(start[0])), int(round(start[1])))
+        end_cell = (int(round(end[0])), int(round(end[1])))
+        start_node = self.center_nodes.get(start_cell)
+        end_node = self.center_nodes.get(end_cell)
+
+        distances: Dict[int, float] = {}
+        previous: Dict[int, int] = {}
+        heap: List[Tuple[float, int]] = []
+
+        if start_node is not None:
+            distances[start_node] = 0
+            heap.append((0, start_node))
+        else:
+            for node in self.zone_nodes.get(start_zone, []):
+                d = self._straight_distance(start, self.nodes[node])
+                distances[node] = d
+                heap.append((d, node))
+            heapq.heapify(heap)
+
+        if end_node is not None:
+            end_costs = {end_node: 0.0}
+        else:
+            end_costs = {
+                node: self._straight_distance(end, self.nodes[node]) for node in self.zone_nodes.get(end_zone, [])
+            }
+
+        best_distance = math.inf
+        best_node: Optional[int] = None
+
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > distances.get(node, math.inf) or d >= best_distance:
+                continue
+
+            end_cost = end_costs.get(node)
+            if end_cost is not None and d + end_cost < best_distance:
+                best_distance = d + end_cost
+                best_node = node
+
+            for neighbour, cost in self.edges[node].items():
+                new_distance = d + cost
+                if new_distance < distances.get(neighbour, math.inf):
+                    distances[neighbour] = new_distance
+                    previous[neighbour] = node
+                    heapq.heappush(heap, (new_distance, neighbour))
+
+        if best_node is None:
+            return None
+
+        nodes = [best_node]
+        while nodes[-1] in previous:
+            nodes.append(previous[nodes[-1]])
+        nodes.reverse()
+        return nodes, best_distance
+
+    def distance(self, start: Tuple[float, float], end: Tuple[float, float]) -> Optional[float]:
+        """
+        Estimated walk distance between the points, None when the graph can't answer the query.
+        """
+        result = self.route(start, end)
+        if result is None:
+            return None
+        return result[1]
+
+    def find_path(
+        self, start: Tuple[float, float], end: Tuple[float, float], min_points: Optional[int] = None
+    ) -> Optional[Tuple[List[Tuple[int, int]], float]]:
+        """
+        Finds a path in the same format as `PathFinder.find_path`.
+
+        :param start: Start position in float tuple
+        :param end: End position in float tuple
+        :param min_points: When set, segments are refined only until the path has more points than this,
+        returned distance is then the estimated total distance.
+        :return: Tuple of points and total distance, None when the graph can't answer the query.
+        """
+        result = self.route(start, end)
+        if result is None:
+            return None
+
+        nodes, estimate = result
+        path: List[Tuple[int, int]] = []
+        distance = 0.0
+
+        first = self.nodes[nodes[0]]
+        if self.center_nodes.get((int(round(start[0])), int(round(start[1])))) != nodes[0]:
+            segment, segment_distance = self.path_finder.find_path(start, first)
+            if len(segment) < 1:
+                return None
+            path.extend(segment)
+            distance += segment_distance
+        else:
+            path.append(first)
+
+        for i in range(1, len(nodes)):
+            if min_points is not None and len(path) > min_points:
+                return path, estimate
+            path.extend(self._segment(nodes[i - 1], nodes[i])[1:])
+            distance += self.edges[nodes[i - 1]][nodes[i]]
+
+        if min_points is not None and len(path) > min_points:
+            return path, estimate
+
+        last = self.nodes[nodes[-1]]
+        if self.center_nodes.get((int(round(end[0])), int(round(end[1])))) != nodes[-1]:
+            segment, segment_distance = self.path_finder.find_path(last, end)
+            if len(segment) < 1:
+                return None
+            path.extend(segment[1:])
+            distance += segment_distance
+
+        return path, distance
+
+    def _segment(self, node_a: int, node_b: int) -> List[Tuple[int, int]]:
+        segment = self._segments.get((node_a, node_b))
+        if segment is not None:
+            return segment
+        return self._segments[(node_b, node_a)][::-1]
+
+    @staticmethod
+    def _straight_distance(point: Tuple[float, float], cell: Tuple[int, int]) -> float:
+        return math.hypot(point[0] - cell[0], point[1] - cell[1])
+
+    # endregion
@@ -0,0 +1,65 @@
+import numpy as np
+
+from sc2.position import Point2, Rect
+from sc2pathlib import PathFinder, Sc2Map
+from .zone_graph import ZoneGraph
+
+WIDTH = 100
+HEIGHT = 80
+ZONE_CENTERS = [Point2((15.5, 40.5)), Point2((50.5, 40.5)), Point2((85.5, 40.5))]
+
+
+def create_grid() -> np.ndarray:
+    """ Three areas separated by walls, one gap in the first wall and two gaps in the second one. """
+    grid = np.zeros((HEIGHT, WIDTH), dtype=np.uint8)
+    grid[2 : HEIGHT - 2, 2 : WIDTH - 2] = 1
+    grid[:, 33:36] = 0
+    grid[36:42, 33:36] = 1
+    grid[:, 66:69] = 0
+    grid[10:15, 66:69] = 1
+    grid[60:66, 66:69] = 1
+    return grid
+
+
+def create_zone_graph() -> (ZoneGraph, PathFinder):
+    grid = create_grid()
+    height = np.full((HEIGHT, WIDTH), 100, dtype=np.uint8)
+    sc2_map = Sc2Map(grid, grid, height, Rect((2, 2, WIDTH - 4, HEIGHT - 4)))
+    sc2_map.calculate_zones(ZONE_CENTERS)
+    path_finder = PathFinder(grid.T)
+    return ZoneGraph(path_finder, sc2_map.zone_grid(), ZONE_CENTERS, sc2_map.chokes), path_finder
+
+
+class TestZoneGraph:
+    def test_same_zone_is_not_answered(self):
+        graph, _ = create_zone_graph()
+        assert graph.find_path((45, 40), (55, 45)) is None
+        assert graph.distance((45, 40), (55, 45)) is None
+
+    def test_distance_is_close_to_full_search(self):
+        graph, path_finder = create_zone_graph()
+        full_distance = path_finder.find_path(ZONE_CENTERS[0], ZONE_CENTERS[2])[1]
+        distance = graph.distance(ZONE_CENTERS[0], ZONE_CENTERS[2])
+
+        assert distance is not None
+        assert full_distance <= distance < full_distance * 1.1
+
+    def test_path_goes_through_the_gaps(self):
+        graph, _ = create_zone_graph()
+        path, _ = graph.find_path((10, 70), (90, 10))
+
+        assert path[0] == (10, 70)
+        assert path[-1] == (90, 10)
+        for x, y in path:
+            if 33 <= x <= 35:
+                assert 36 <= y < 42
+            if 66 <= x <= 68:
+                assert 10 <= y < 15 or 60 <= y < 66
+
+    def test_path_is_refined_only_until_target_index(self):
+        graph, _ = create_zone_graph()
+        full_path, _ = graph.find_path((10, 40), (90, 40))
+        partial_path, _ = graph.find_path((10, 40), (90, 40), 14)
+
+        assert 14 < len(partial_path) < len(full_path)
+        assert partial_path[14] == full_path[14]
@@ -0,0 +1,106 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from sc2.position import Point2
+
+# Maximum distance from a cell center to a position that rounds to the cell
+CELL_HALF_DIAGONAL = 0.7072
+
+
+class ZoneRaster:
+    """
+    Assigns positions to zones in batches.
+
+    Positions are first looked up from the zone raster of the map. Positions outside of the zone areas are assigned
+    to the closest zone within zone radius, using a lookup table of the candidate zones for each cell.
+    """
+
+    def __init__(self, zone_grid: np.ndarray, centers: List[Point2], radii: List[float], heights: List[float]):
+        """
+        :param zone_grid: Zone of each cell as [x][y] array, zones start from 1 onwards and 0 is no zone.
+        :param centers: Center of each zone in the same order as in the zone grid.
+        :param radii: Radius of each zone.
+        :param heights: Terrain height of each zone.
+        """
+        self.grid: np.ndarray = np.array(zone_grid, dtype=np.int16) - 1
+        self.width, self.height = self.grid.shape
+        self.centers = np.array(centers, dtype=np.float64).reshape(-1, 2)
+        self.radii = np.array(radii, dtype=np.float64)
+        self.heights = np.array(heights, dtype=np.float64)
+        self.candidates = self._solve_candidates()
+
+    def _solve_candidates(self) -> np.ndarray:
+        """ Zones that positions rounding to the cell can be in range of, as [x][y][n] array padded with -1. """
+        xs, ys = np.meshgrid(np.arange(self.width), np.arange(self.height), indexing="ij")
+        in_range = [
+            np.hypot(xs - center[0], ys - center[1]) <= radius + CELL_HALF_DIAGONAL
+            for center, radius in zip(self.centers, self.radii)
+        ]
+        counts = np.zeros(self.grid.shape, dtype=np.int16)
+        for mask in in_range:
+            counts += mask
+        size = int(counts.max()) if len(in_range) > 0 else 0
+
+        candidates = np.full(self.grid.shape + (size,), -1, dtype=np.int16)
+        counts[:] = 0
+        for index, mask in enumerate(in_range):
+            cells_x, cells_y = np.nonzero(mask)
+            candidates[cells_x, cells_y, counts[cells_x, cells_y]] = index
+            counts[cells_x, cells_y] += 1
+        return candidates
+
+    def cells(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Cells of the positions, rounded the same way as in `Sc2Map.get_zone`. """
+        cells = np.floor(positions + 0.5).astype(np.int32)
+        return np.clip(cells[:, 0], 0, self.width - 1), np.clip(cells[:, 1], 0, self.height - 1)
+
+    def zone_indices(self, positions: np.ndarray) -> np.ndarray:
+        """
+        :param positions: Positions as [n][2] array.
+        :return: Zone index of the zone area each position is in, -1 for positions outside of the zone areas.
+        """
+        if len(positions) == 0:
+            return np.zeros(0, dtype=np.int16)
+        return self.grid[self.cells(positions)]
+
+    def closest_zones(self, positions: np.ndarray, heights: np.ndarray, neutral: np.ndarray) -> np.ndarray:
+        """
+        Finds the best zone within range for each position.
+        Distance is weighted with height difference to the zone and neutral zones are avoided.
+
+        :param positions: Positions as [n][2] array.
+        :param heights: Terrain height at each position.
+        :param neutral: Is each zone neutral.
+        :return: Zone index for each position, -1 when no zone is in range.
+        """
+        if len(positions) == 0 or self.candidates.shape[2] == 0:
+            return np.full(len(positions), -1, dtype=np.int16)
+
+        candidates = self.candidates[self.cells(positions)]
+        valid = candidates >= 0
+        zones = np.where(valid, candidates, 0)
+
+        distances = np.hypot(
+            positions[:, 0, None] - self.centers[zones, 0], positions[:, 1, None] - self.centers[zones, 1]
+        )
+        valid &= distances <= self.radii[zones]
+        # structures in the same zone are at the same height, units walking in ramps need also accounting
+        costs = distances + 10 * np.abs(self.heights[zones] - heights[:, None])
+        # We'll want to count units as being in relevant zones if possible
+        costs += 5 * np.asarray(neutral, dtype=bool)[zones]
+        costs[~valid] = np.inf
+
+        best = np.argmin(costs, axis=1)
+        rows = np.arange(len(positions))
+        return np.where(valid[rows, best], zones[rows, best], -1).astype(np.int16)
+
+
+def group_by_zone(zone_indices: np.ndarray, zone_count: int) -> List[np.ndarray]:
+    """
+    :return: Indices of the items in each zone, items without zone are left out.
+    """
+    order = np.argsort(zone_indices, kind="stable")
+    sorted_zones = zone_indices[order]
+    bounds = np.searchsorted(sorted_zones, np.arange(0, zone_count + 1))
+    return [order[bounds[i] : bounds[i + 1]] for i in range(0, zone_count)]
@@ -0,0 +1,36 @@
+import numpy as np
+
+from sc2.position import Point2
+from .zone_raster import ZoneRaster, group_by_zone
+
+CENTERS = [Point2((20.5, 20.5)), Point2((60.5, 20.5)), Point2((40.5, 30.5))]
+
+
+def create_raster() -> ZoneRaster:
+    grid = np.zeros((80, 50), dtype=np.uint8)
+    grid[10:31, 10:31] = 1
+    grid[50:71, 10:31] = 2
+    return ZoneRaster(grid, CENTERS, [15, 15, 12], [10, 10, 12])
+
+
+class TestZoneRaster:
+    def test_zone_indices_match_rounding(self):
+        raster = create_raster()
+        positions = np.array([(20, 20), (9.6, 20), (9.4, 20), (60, 20), (40, 45), (-5, 100)])
+        assert raster.zone_indices(positions).tolist() == [0, 0, -1, 1, -1, -1]
+
+    def test_closest_zones(self):
+        raster = create_raster()
+        positions = np.array([(32.5, 25.5), (40.5, 40.5), (5, 45)])
+
+        zones = raster.closest_zones(positions, np.array([12, 12, 10]), [False, False, False])
+        assert zones.tolist() == [2, 2, -1]
+        # First position is closer to the third zone, but height difference outweighs it
+        zones = raster.closest_zones(positions, np.array([10, 10, 10]), [False, False, False])
+        assert zones.tolist() == [0, 2, -1]
+        zones = raster.closest_zones(positions[0:1], np.array([12]), [False, False, True])
+        assert zones.tolist() == [2]
+
+    def test_group_by_zone(self):
+        groups = group_by_zone(np.array([1, -1, 0, 1, 2]), 3)
+        assert [group.tolist() for group in groups] == [[2], [0, 3], [4]]
@@ -0,0 +1,151 @@
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from sc2.unit import Unit
+from sc2.units import Units
+from sharpy.general.extended_power import POWER_FIELDS
+from sharpy.general.power_table import PowerTable
+from sharpy.general.zone_raster import ZoneRaster, group_by_zone
+
+
+class TrackedUnit:
+    __slots__ = ("cell", "zone", "key", "power")
+
+    def __init__(self, cell: Tuple[int, int], zone: int, key: tuple, power: np.ndarray):
+        self.cell = cell
+        self.zone = zone
+        # Unit type and health that the power was calculated with
+        self.key = key
+        self.power = power
+
+
+class ZoneTracker:
+    """
+    Zone membership and zone power of one side's units, updated incrementally.
+
+    Units that stay in the same cell keep their zone and units that keep their type and health keep their power.
+    Zone power totals are only updated with the difference of the units that entered, left or changed.
+    Units outside of the zone areas are assigned by distance and are solved again every frame.
+    """
+
+    def __init__(self, raster: ZoneRaster, zone_count: int, table: PowerTable, full_rebuild: bool = False):
+        """
+        :param full_rebuild: Solve zones and zone powers of all units from scratch every update, for validation.
+        """
+        self.raster = raster
+        self.zone_count = zone_count
+        self.table = table
+        self.full_rebuild = full_rebuild
+        self.units: Dict[int, TrackedUnit] = {}
+        # Zone power totals as [zone][field] array in the order of `POWER_FIELDS`
+        self.power = np.zeros((zone_count, len(POWER_FIELDS)), dtype=np.float64)
+        # Zone index of each unit in the last update
+        self.zone_indices = np.zeros(0, dtype=np.int16)
+        # Number of units whose zone or power was solved in the last update
+        self.processed = 0
+
+    def clear(self):
+        self.units.clear()
+        self.power[:] = 0
+
+    def update(self, units: Units, terrain_height: Callable[[Unit], float], neutral: List[bool]) -> List[List[Unit]]:
+        """
+        :param terrain_height: Terrain height of the unit, used for units outside of the zone areas.
+        :param neutral: Is each zone neutral.
+        :return: Units of each zone.
+        """
+        positions = np.array([unit.position_tuple for unit in units], dtype=np.float64).reshape(-1, 2)
+        if self.full_rebuild:
+            zone_indices = self._rebuild(units, positions, terrain_height, neutral)
+        else:
+            zone_indices = self._update(units, positions, terrain_height, neutral)
+
+        self.zone_indices = zone_indices
+        groups = group_by_zone(zone_indices, self.zone_count)
+        for zone, indices in enumerate(groups):
+            if len(indices) == 0:
+                # Removes accumulated rounding errors
+                self.power[zone] = 0
+        return [[units[i] for i in indices] for indices in groups]
+
+    def _rebuild(
+        self, units: Units, positions: np.ndarray, terrain_height: Callable[[Unit], float], neutral: List[bool]
+    ) -> np.ndarray:
+        self.units.clear()
+        zone_indices = self.raster.zone_indices(positions)
+        unzoned = np.flatnonzero(zone_indices < 0)
+        if len(unzoned) > 0:
+            heights = np.array([terrain_height(units[i]) for i in unzoned], dtype=np.float64)
+            zone_indices[unzoned] = self.raster.closest_zones(positions[unzoned], heights, neutral)
+
+        self.processed = len(units)
+        self.power = self.table.aggregate(
+            self.table.rows(units), self.table.health_factors(units), zone_indices, self.zone_count
+        )
+        return zone_indices
+
+    def _update(
+        self, units: Units, positions: np.ndarray, terrain_height: Callable[[Unit], float], neutral: List[bool]
+    ) -> np.ndarray:
+        cells_x, cells_y = self.raster.cells(positions)
+        area_zones = self.raster.grid[cells_x, cells_y].tolist()
+        cells = list(zip(cells_x.tolist(), cells_y.tolist()))
+
+        zone_indices = np.full(len(units), -1, dtype=np.int16)
+        unzoned: List[int] = []
+        seen = set()
+        self.processed = 0
+
+        for i, unit in enumerate(units):
+            tag = unit.tag
+            seen.add(tag)
+            tracked = self.units.get(tag, None)
+            zone = area_zones[i]
+
+            if zone < 0:
+                unzoned.append(i)
+                zone = tracked.zone if tracked is not None else -1
+            elif tracked is not None and tracked.cell == cells[i]:
+                zone = tracked.zone
+
+            zone_indices[i] = zone
+            key = (unit.type_id, unit.health + unit.shield, unit.health_max + unit.shield_max)
+            if tracked is None:
+                self.processed += 1
+                self.units[tag] = TrackedUnit(cells[i], zone, key, self.table.unit_power(unit))
+                if zone >= 0:
+                    self.power[zone] += self.units[tag].power
+            elif tracked.cell != cells[i] or tracked.zone != zone or tracked.key != key:
+                self.processed += 1
+                if tracked.zone >= 0:
+                    self.power[tracked.zone] -= tracked.power
+                if tracked.key != key:
+                    tracked.key = key
+                    tracked.power = self.table.unit_power(unit)
+                tracked.cell = cells[i]
+                tracked.zone = zone
+                if zone >= 0:
+                    self.power[zone] += tracked.power
+
+        if unzoned:
+            heights = np.array([terrain_height(units[i]) for i in unzoned], dtype=np.float64)
+            found = self.raster.closest_zones(positions[unzoned], heights, neutral)
+            for i, zone in zip(unzoned, found.tolist()):
+                self._move(units[i].tag, zone)
+                zone_indices[i] = zone
+
+        for tag in [tag for tag in self.units.keys() if tag not in seen]:
+            self._move(tag, -1)
+            del self.units[tag]
+        return zone_indices
+
+    def _move(self, tag: int, zone: int):
+        tracked = self.units[tag]
+        if tracked.zone == zone:
+            return
+        if tracked.zone >= 0:
+            self.power[tracked.zone] -= tracked.power
+        if zone >= 0:
+            self.power[zone] += tracked.power
+        tracked.zone = zone
@@ -0,0 +1,81 @@
+import random
+from unittest import mock
+
+import numpy as np
+
+from sc2 import UnitTypeId
+from sc2.unit import Unit
+from sc2.units import Units
+from sharpy.managers.core.unit_value import UnitValue
+from .power_table import PowerTable
+from .zone_raster_test import create_raster
+from .zone_tracker import ZoneTracker
+
+TYPES = [UnitTypeId.ZEALOT, UnitTypeId.STALKER, UnitTypeId.COLOSSUS, UnitTypeId.PHOENIX]
+
+
+def create_unit(tag: int, type_id: UnitTypeId, x: float, y: float, health: float) -> Unit:
+    proto = mock.Mock()
+    proto.tag = tag
+    proto.unit_type = type_id.value
+    proto.pos.x = x
+    proto.pos.y = y
+    proto.health = health
+    proto.health_max = 100
+    proto.shield = 0
+    proto.shield_max = 50
+    bot = mock.Mock()
+    bot._game_data.unit_types = {}
+    return Unit(proto, bot)
+
+
+def random_units(count: int) -> Units:
+    return Units(
+        [
+            create_unit(
+                tag, TYPES[tag % len(TYPES)], random.uniform(0, 80), random.uniform(0, 50), random.choice([50, 100])
+            )
+            for tag in random.sample(range(0, count * 2), count)
+        ],
+        None,
+    )
+
+
+class TestZoneTracker:
+    def test_incremental_matches_full_rebuild(self):
+        random.seed(3)
+        raster = create_raster()
+        incremental = ZoneTracker(raster, 3, PowerTable(UnitValue()))
+        full = ZoneTracker(raster, 3, PowerTable(UnitValue()), full_rebuild=True)
+        neutral = [False, True, False]
+
+        for frame in range(0, 10):
+            units = random_units(40)
+            groups = incremental.update(units, lambda unit: 10, neutral)
+            expected = full.update(units, lambda unit: 10, neutral)
+
+            assert [[unit.tag for unit in group] for group in groups] == [
+                [unit.tag for unit in group] for group in expected
+            ]
+            assert np.allclose(incremental.power, full.power)
+            assert full.processed == 40
+
+    def test_unchanged_units_are_not_processed(self):
+        tracker = ZoneTracker(create_raster(), 3, PowerTable(UnitValue()))
+        units = Units(
+            [create_unit(1, UnitTypeId.ZEALOT, 20, 20, 100), create_unit(2, UnitTypeId.STALKER, 60, 20, 100)], None
+        )
+        tracker.update(units, lambda unit: 10, [False] * 3)
+        power = tracker.power.copy()
+
+        units = Units(
+            [create_unit(1, UnitTypeId.ZEALOT, 20.2, 20, 100), create_unit(2, UnitTypeId.STALKER, 60, 20, 50)], None
+        )
+        groups = tracker.update(units, lambda unit: 10, [False] * 3)
+        assert tracker.processed == 1
+        assert tracker.power[0][0] == power[0][0]
+        assert tracker.power[1][0] < power[1][0]
+
+        groups = tracker.update(Units([units[1]], None), lambda unit: 10, [False] * 3)
+        assert len(groups[0]) == 0
+        assert tracker.power[0][0] == 0
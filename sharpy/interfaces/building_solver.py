@@ -1,8 +1,12 @@
 from abc import abstractmethod, ABC
-from typing import List, Optional
+from typing import List, Optional, TYPE_CHECKING
 
 from sc2.position import Point2
 
+if TYPE_CHECKING:
+    from sharpy.general.placement_map import PlacementMap
+    from sharpy.general.slot_registry import SlotRegistry
+
 
 class IBuildingSolver(ABC):
     @property
@@ -39,3 +43,13 @@ class IBuildingSolver(ABC):
     @abstractmethod
     def buildings3x3(self) -> List[Point2]:
         pass
+
+    @property
+    @abstractmethod
+    def placement(self) -> "PlacementMap":
+        pass
+
+    @property
+    @abstractmethod
+    def slots(self) -> "SlotRegistry":
+        pass
@@ -1,6 +1,8 @@
 from abc import abstractmethod, ABC
 from typing import Optional, List, Union, Iterable, Dict, Tuple
 
+from scipy.spatial.ckdtree import cKDTree
+
 from sc2.ids.effect_id import EffectId
 
 from sc2.game_state import EffectData
@@ -50,6 +52,26 @@ class IUnitCache(ABC):
         """Returns all known mineral wall mineral field units."""
         pass
 
+    @property
+    def workers_by_target(self) -> Dict[int, List[int]]:
+        """
+        Returns tags of own workers gathering from each mineral field, gas building or townhall by target tag.
+        Caches that don't track gathering return an empty dictionary.
+        """
+        return {}
+
+    @property
+    def own_ground_tree(self) -> Optional[cKDTree]:
+        """
+        Returns KD-tree of the positions of own units that are not flying, None when there are no such units.
+        Caches that don't build the tree return None.
+        """
+        return None
+
+    def assign_worker(self, worker: Unit, target: Unit):
+        """Records a gather order given on this frame to `workers_by_target`, does nothing by default."""
+        pass
+
     @abstractmethod
     def by_tag(self, tag: int) -> Optional[Unit]:
         pass
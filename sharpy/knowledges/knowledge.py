@@ -5,6 +5,7 @@ from typing import List, Optional, Callable, Type
 
 import sc2
 from sharpy.events import UnitDestroyedEvent
+from sharpy.general.debug_plotter import DebugPlotter
 from sharpy.interfaces.data_manager import IDataManager
 from sharpy.managers.core import *
 from sharpy.interfaces import (
@@ -50,6 +51,7 @@ class Knowledge:
         self.reserved_minerals: int = 0
         self.reserved_gas: int = 0
         self.log_manager: ILogManager = LogManager()
+        self.debug_plotter: Optional[DebugPlotter] = None
         # TODO: Remove references to these managers
         self.lag_handler: Optional[ILagHandler] = None
         self.unit_values: Optional[IUnitValues] = None
@@ -87,6 +89,13 @@ class Knowledge:
         self.config: ConfigParser = self.ai.config
         self.is_chat_allowed = self.config["general"].getboolean("chat")
         self._debug = self.config["general"].getboolean("debug")
+        if self._debug:
+            general = self.config["general"]
+            self.debug_plotter = DebugPlotter(
+                sample_rate=general.getint("debug_plot_rate", fallback=8),
+                frame_budget=general.getfloat("debug_plot_budget", fallback=2) / 1000,
+                image_format=general.get("debug_plot_format", fallback="npz"),
+            )
         self.my_worker_type = UnitValue.get_worker_type(self.my_race)
 
     def _set_managers(self, additional_managers: Optional[List[ManagerBase]]):
@@ -267,6 +276,10 @@ class Knowledge:
         for manager in self.managers:
             await manager.on_end(game_result)
 
+        if self.debug_plotter is not None:
+            self.debug_plotter.stop()
+            self.debug_plotter = None
+
     # endregion
 
     # region Settings
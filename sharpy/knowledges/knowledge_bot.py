@@ -23,6 +23,7 @@ class KnowledgeBot(SkeletonBot, ABC):
 
     def __init__(self, name: str):
         super().__init__(name)
+        self.visibility_manager = VisibilityManager()
         self.memory_manager = MemoryManager()
         self.lost_units_manager = LostUnitsManager()
         self.enemy_units_manager = EnemyUnitsManager()
@@ -46,6 +47,7 @@ class KnowledgeBot(SkeletonBot, ABC):
         user_managers = self.configure_managers()
 
         managers = [
+            self.visibility_manager,
             self.memory_manager,
             self.lost_units_manager,
             self.enemy_units_manager,
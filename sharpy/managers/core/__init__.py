@@ -15,3 +15,4 @@ from .pathing_manager import PathingManager
 from .unit_value import UnitValue
 from .enemy_units_manager import EnemyUnitsManager
 from .previousunitsmanager import PreviousUnitsManager
+from .visibility_manager import VisibilityManager
@@ -1,14 +1,18 @@
 import enum
 import logging
 import math
+import time
+from collections import deque
 from math import floor
-from typing import Dict, List, Optional, Tuple, Set
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Set
 
 import numpy as np
 
 import sc2pathlib
 from sharpy.constants import Constants
 from sharpy import sc2math
+from sharpy.general.placement_map import PlacementMap, Footprint
+from sharpy.general.slot_registry import SlotRegistry
 from sharpy.general.zone import Zone
 from sc2 import Race
 
@@ -16,6 +20,7 @@ from sc2.client import Client
 
 from sharpy.managers.core.manager_base import ManagerBase
 from sc2.position import Point2, Point3
+from sc2.unit import Unit
 from sharpy.general.extended_ramp import RampPosition
 
 from .grids import *
@@ -45,6 +50,23 @@ def fill_padding(cell: GridArea, point: Point2 = None) -> GridArea:
     return cell
 
 
+# Zone types of the expansion zones in order, later zones are solved without a zone type
+ZONE_TYPES = [
+    ZoneArea.OwnMainZone,
+    ZoneArea.OwnNaturalZone,
+    ZoneArea.OwnThirdZone,
+    ZoneArea.OwnFourthZone,
+    ZoneArea.OwnFifthZone,
+]
+
+# Areas for the vectorized grid queries, same as `is_empty` and `is_free`
+EMPTY_AREAS = (BuildArea.Empty,)
+FREE_AREAS = (BuildArea.Empty, BuildArea.BuildingPadding)
+NOT_HARD_WALL_AREAS = tuple(area for area in BuildArea if area not in {BuildArea.NotBuildable, BuildArea.HighRock})
+# Size of the building slots for the build areas that have slots
+SLOT_SIZES = {BuildArea.Pylon: 2, BuildArea.Building: 3}
+
+
 class WallFinder:
     def __init__(
         self,
@@ -65,27 +87,51 @@ class WallFinder:
         self.checks: List[Point2] = [b1 + check_from_b1, b2 + check_from_b2]
         self.zealot: Point2 = zealot
         self.score = score
+        # Rectangles of the template can start this many cells away from the position
+        self.margin = int(max(abs(value) for offset in self.buildings + self.checks for value in offset)) + 2
 
     def query(self, grid: BuildGrid, position: Point2, zone: ZoneArea):
-        def is_not_hard_wall(cell: GridArea) -> bool:
-            if cell.Area == BuildArea.NotBuildable or cell.Area == BuildArea.HighRock:
-                return False
-            return True
-
         # and cell.ZoneIndex == zone
 
         # Both checks need to match with hard wall
         for check in self.checks:
-            if grid.query_area(position + check, BlockerType.Building3x3, is_not_hard_wall):
+            if grid.query_area_in(position + check, BlockerType.Building3x3, NOT_HARD_WALL_AREAS):
                 return False
 
         # All buildings must be buildable:
         for building in self.buildings:
-            if not grid.query_area(position + building, BlockerType.Building3x3, is_empty):
+            if not grid.query_area_in(position + building, BlockerType.Building3x3, EMPTY_AREAS):
                 return False
 
         return True
 
+    def validity(self, empty: np.ndarray, not_hard_wall: np.ndarray, margin: int) -> np.ndarray:
+        """
+        Vectorized `query` for positions in every cell of the grid. Template offsets must be whole cells.
+
+        :param empty: `BuildGrid.rect_validity` for empty 3x3 rectangles with the margin.
+        :param not_hard_wall: `BuildGrid.rect_validity` for 3x3 rectangles without hard walls with the margin.
+        :return: Boolean [x][y] array of cells where query passes for positions inside the cell.
+        """
+        width = empty.shape[0] - 2 * margin
+        height = empty.shape[1] - 2 * margin
+        valid = np.ones((width, height), dtype=bool)
+
+        for check in self.checks:
+            valid &= ~self._shifted(not_hard_wall, check, margin, width, height)
+
+        for building in self.buildings:
+            valid &= self._shifted(empty, building, margin, width, height)
+
+        return valid
+
+    @staticmethod
+    def _shifted(rects: np.ndarray, offset: Point2, margin: int, width: int, height: int) -> np.ndarray:
+        # 3x3 area of a position starts one cell before the cell of the position
+        x = margin + int(offset.x) - 1
+        y = margin + int(offset.y) - 1
+        return rects[x : x + width, y : y + height]
+
     def positions(self, position: Point2) -> List[Point2]:
         list = []
         for building in self.buildings:
@@ -99,6 +145,8 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
     def __init__(self):
         super().__init__()
         self.grid: BuildGrid = None
+        self._placement: Optional[PlacementMap] = None
+        self._slots: Optional[SlotRegistry] = None
         self.wall_type = WallType.Auto
 
         self._building_positions: Dict[BuildArea, List[Point2]] = dict()
@@ -106,6 +154,20 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
 
         self._wall3x3: List[Point2] = []
         self._wall2x2: List[Point2] = []
+        # Slot sizes where building positions or the wall changed after they were set to the slot registry
+        self._changed_slots: Set[int] = set()
+        # Empty rectangles by size when the zone fill started, cells only stop being empty while filling
+        self._empty_rects: Dict[Tuple[int, int], np.ndarray] = dict()
+        # Zones that have been solved or are queued to be solved, later zones are solved when we take them
+        self._zones_solved: Set[Zone] = set()
+        self._zone_jobs: Deque[Iterator[None]] = deque()
+        self.frame_budget = 0.002
+
+        # Debug boxes are cached until the grid changes, only boxes near the camera are drawn when radius is set
+        self.debug_camera_radius: Optional[float] = None
+        self._debug_boxes: List[Tuple[Point3, Point3, Point3]] = []
+        self._debug_cells = np.zeros((0, 2), dtype=np.float64)
+        self._debug_version = -1
 
         self.wall_finders_v = [
             # Pure vertical walls
@@ -178,11 +240,11 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
 
     @property
     def not_wall2x2(self) -> List[Point2]:
-        return [item for item in self._building_positions.get(BuildArea.Pylon, []) if item not in self._wall2x2]
+        return list(self.slots.slots(2, allow_wall=False))
 
     @property
     def not_wall3x3(self) -> List[Point2]:
-        return [item for item in self._building_positions.get(BuildArea.Building, []) if item not in self._wall3x3]
+        return list(self.slots.slots(3, allow_wall=False))
 
     @property
     def buildings2x2(self) -> List[Point2]:
@@ -196,18 +258,104 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
     def buildings5x5(self) -> List[Point2]:
         return []
 
+    @property
+    def placement(self) -> PlacementMap:
+        return self._placement
+
+    @property
+    def slots(self) -> SlotRegistry:
+        """ Building slots with their status, slots are updated when the building position lists have changed. """
+        if self._changed_slots:
+            if 2 in self._changed_slots:
+                self._slots.set_slots(2, self.buildings2x2, self._wall2x2)
+            if 3 in self._changed_slots:
+                self._slots.set_slots(3, self.buildings3x3, self._wall3x3)
+            self._changed_slots.clear()
+        return self._slots
+
     async def start(self, knowledge: "Knowledge"):
         await super().start(knowledge)
         self.grid = BuildGrid(self.knowledge)
+        # Pixel maps are indexed with [y][x]
+        buildable = self.ai.game_info.placement_grid.data_numpy.T != 0
+        pathable = buildable | (self.ai.game_info.pathing_grid.data_numpy.T != 0)
+        self._placement = PlacementMap(buildable, pathable)
+        self._slots = SlotRegistry(self._placement)
         self.base_ramp = self.zone_manager.expansion_zones[0].ramp
-        self.color_zone(self.zone_manager.expansion_zones[0], ZoneArea.OwnMainZone)
-        self.color_zone(self.zone_manager.expansion_zones[1], ZoneArea.OwnNaturalZone)
-        self.color_zone(self.zone_manager.expansion_zones[2], ZoneArea.OwnThirdZone)
+        self.frame_budget = knowledge.config["general"].getfloat("building_solver_budget", fallback=2) / 1000
+        for zone, zone_type in zip(self.zone_manager.expansion_zones[0:3], ZONE_TYPES):
+            self.color_zone(zone, zone_type)
+            self._zones_solved.add(zone)
 
     async def update(self):
         if self.knowledge.iteration == 0:
             await self.solve_grid()
 
+        self.update_placement()
+        self.queue_new_zones()
+        self.solve_zones()
+
+    def queue_new_zones(self):
+        """ Queues building positions to be solved for zones that we have started to take. """
+        for index, zone in enumerate(self.zone_manager.expansion_zones):
+            if zone in self._zones_solved or not zone.is_ours:
+                continue
+
+            self._zones_solved.add(zone)
+            zone_type = ZONE_TYPES[index] if index < len(ZONE_TYPES) else None
+            candidates = self.color_zone(zone, zone_type)
+            self._zone_jobs.append(self.fill_zone_steps(zone.center_location, zone_type, candidates))
+
+    def solve_zones(self):
+        """ Solves queued zones until the frame budget is used, at least one position is tried in each frame. """
+        start = time.perf_counter()
+        while self._zone_jobs:
+            try:
+                next(self._zone_jobs[0])
+            except StopIteration:
+                self._zone_jobs.popleft()
+
+            if time.perf_counter() - start >= self.frame_budget:
+                break
+
+    def update_placement(self):
+        """ Updates structures, rocks, creep and power of the placement map, only changes are applied. """
+        structures: Dict[int, Footprint] = {}
+        for units in (self.ai.structures, self.ai.enemy_structures, self.ai.mineral_field, self.ai.vespene_geyser):
+            for unit in units:
+                footprint = self.structure_footprint(unit)
+                if footprint is not None:
+                    structures[unit.tag] = footprint
+        for rock in self.ai.destructables:
+            structures[rock.tag] = self.structure_footprint(rock) or self.rock_footprint(rock)
+
+        self._placement.set_structures(structures)
+        self._placement.set_creep(self.ai.state.creep.data_numpy)
+        self._placement.set_power([(source.position, source.radius) for source in self.ai.state.psionic_matrix.sources])
+
+    @staticmethod
+    def structure_footprint(unit: Unit) -> Optional[Footprint]:
+        x, y = unit.position_tuple
+        if unit.is_mineral_field:
+            return x, y, 2, 1
+        if unit.is_vespene_geyser:
+            return x, y, 3, 3
+        if unit.is_flying:
+            return None
+
+        radius = unit.footprint_radius
+        if not radius:
+            return None
+        size = int(round(radius * 2))
+        return x, y, size, size
+
+    @staticmethod
+    def rock_footprint(unit: Unit) -> Footprint:
+        """ Square that covers the rock, rocks don't have a creation ability to read the footprint from. """
+        x, y = unit.position_tuple
+        size = max(1, int(round(unit.radius * 2)))
+        return x, y, size, size
+
     async def post_update(self):
         if self.debug:
             client: "Client" = self.ai._client
@@ -220,29 +368,43 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
                 c2 = Point3((x + 0.25, y + 0.25, z + 2))
                 client.debug_box_out(c1, c2)
 
-            correction = Point2((0, 1))
-            for x in range(0, self.grid.width - 1):
-                for y in range(0, self.grid.height - 1):
-                    cell: GridArea = self.grid.get(x, y)
-                    color = None
-                    if cell.Area == BuildArea.Building:
-                        color = self.grid.building_color
-                    elif cell.Area == BuildArea.TownHall:
-                        color = self.grid.townhall_color
-                    elif cell.Area == BuildArea.Pylon:
-                        color = self.grid.pylon_color
-                    elif cell.Area == BuildArea.Mineral:
-                        color = self.grid.mineral_color
-                    elif cell.Area == BuildArea.Gas:
-                        color = self.grid.gas_color
-                    # elif cell.Area == BuildArea.Empty:
-                    #    color = self.grid.gas_color
-
-                    if color:
-                        z = self.knowledge.get_z(Point2((x, y)) + correction)
-                        c1 = Point3((x, y, z))
-                        c2 = Point3((x + 1, y + 1, z + 1))
-                        client.debug_box_out(c1, c2, color)
+            boxes = self.debug_boxes()
+            if self.debug_camera_radius is not None:
+                camera = self.ai.state.observation_raw.player.camera
+                distances = np.hypot(self._debug_cells[:, 0] - camera.x, self._debug_cells[:, 1] - camera.y)
+                boxes = [boxes[i] for i in np.flatnonzero(distances <= self.debug_camera_radius)]
+
+            for c1, c2, color in boxes:
+                client.debug_box_out(c1, c2, color)
+
+    def debug_boxes(self) -> List[Tuple[Point3, Point3, Point3]]:
+        """ Debug boxes of the building cells, solved again only when the grid has changed. """
+        if self._debug_version == self.grid.version:
+            return self._debug_boxes
+
+        colors = {
+            BuildArea.Building: self.grid.building_color,
+            BuildArea.TownHall: self.grid.townhall_color,
+            BuildArea.Pylon: self.grid.pylon_color,
+            BuildArea.Mineral: self.grid.mineral_color,
+            BuildArea.Gas: self.grid.gas_color,
+        }
+        # Last column and row are not drawn
+        areas = self.grid.cells["Area"][:-1, :-1]
+        xs, ys = np.nonzero(self.grid.area_mask(areas, colors.keys()))
+        # Height is from the cell above, same as with `get_z(Point2((x, y + 1)))`
+        heights = self.ai.game_info.terrain_height.data_numpy[ys + 1, xs].astype(np.float64)
+        zs = self.knowledge.terrain_to_z_height(heights)
+        codes = areas[xs, ys]
+
+        area_colors = {AREA_CODES[area]: color for area, color in colors.items()}
+        self._debug_boxes = [
+            (Point3((x, y, z)), Point3((x + 1, y + 1, z + 1)), area_colors[code])
+            for x, y, z, code in zip(xs.tolist(), ys.tolist(), zs.tolist(), codes.tolist())
+        ]
+        self._debug_cells = np.column_stack((xs + 0.5, ys + 0.5))
+        self._debug_version = self.grid.version
+        return self._debug_boxes
 
     async def solve_grid(self):
         if self.wall_type == WallType.Auto:
@@ -268,14 +430,21 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
 
         self.solve_buildings()
 
-        if self.debug:
-            self.grid.save("buildGrid.bmp")
+        if self.debug and self.knowledge.debug_plotter is not None:
+            self.knowledge.debug_plotter.capture(
+                "build_grid",
+                self.ai.state.game_loop,
+                self.grid.cell_snapshot,
+                self.grid.render_snapshot,
+                force=True,
+            )
 
     def terran_depot_wall(self):
         main: Zone = self.zone_manager.own_main_zone
         if main.ramp.ramp.depot_in_middle:
             self._wall2x2 = list(main.ramp.ramp.corner_depots)
             self._wall2x2.append(main.ramp.ramp.depot_in_middle)
+            self._changed_slots.add(2)
             for pos in self._wall2x2:
                 self.fill_and_save(pos, BlockerType.Building2x2, BuildArea.Pylon)
 
@@ -288,6 +457,7 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
         if self.knowledge.my_race == Race.Terran:
             list = self._building_positions.get(BuildArea.Building)
             list.sort(key=lambda k: start.distance_to_point2(k))
+            self._changed_slots.add(3)
 
         zone: Zone = self.zone_manager.expansion_zones[1]
         zone_color = ZoneArea.OwnNaturalZone
@@ -297,8 +467,22 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
         zone_color = ZoneArea.OwnThirdZone
         self.fill_zone(zone.center_location, zone_color)
 
-    def fill_zone(self, center: Point2, zone_color: ZoneArea):
+    def fill_zone(self, center: Point2, zone_color: Optional[ZoneArea], candidates: Optional[np.ndarray] = None):
+        for _ in self.fill_zone_steps(center, zone_color, candidates):
+            pass
+
+    def fill_zone_steps(
+        self, center: Point2, zone_color: Optional[ZoneArea], candidates: Optional[np.ndarray] = None
+    ) -> Iterator[None]:
+        """
+        Fills building positions around the zone center, yields after each position that was tried.
+
+        :param candidates: Boolean [x][y] array of cells to try, cells with the zone color by default.
+        """
         center = Point2((floor(center.x), floor(center.y)))
+        self._empty_rects.clear()
+        if candidates is None:
+            candidates = self.grid.cells["ZoneIndex"] == zone_color.value
         x_range = range(-18, 18)
 
         if self.ai.start_location.x < self.ai.game_info.map_center.x:
@@ -311,76 +495,66 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
         if self.ai.start_location.y < self.ai.game_info.map_center.y:
             y_range = range(-18, 18)[::-1]
 
-        if self.knowledge.my_race == Race.Terran:
-            for x in x_range:
-                for y in y_range:
-                    pos = Point2((x + center.x, y + center.y))
-                    area: GridArea = self.grid[pos]
-
-                    if area is None or area.ZoneIndex != zone_color:
-                        continue
-
-                    self.terran_massive_grid(pos)
-
-            for x in x_range:
-                for y in y_range:
-                    pos = Point2((x + center.x, y + center.y))
-                    area: GridArea = self.grid[pos]
+        positions = [
+            Point2((x + center.x, y + center.y))
+            for x in x_range
+            for y in y_range
+            if self.grid.is_inside((x + center.x, y + center.y)) and candidates[x + center.x, y + center.y]
+        ]
 
-                    if area is None or area.ZoneIndex != zone_color:
-                        continue
+        if self.knowledge.my_race == Race.Terran:
+            for pos in positions:
+                self.terran_massive_grid(pos)
+                yield
 
-                    self.terran_grid(pos)
+            for pos in positions:
+                self.terran_grid(pos)
+                yield
         elif self.knowledge.my_race == Race.Protoss:
             if zone_color == ZoneArea.OwnMainZone:
-                for x in x_range:
-                    for y in y_range:
-                        pos = Point2((x + center.x, y + center.y))
-                        area: GridArea = self.grid[pos]
+                for pos in positions:
+                    self.massive_grid(pos)
+                    yield
 
-                        if area is None or area.ZoneIndex != zone_color:
-                            continue
-
-                        self.massive_grid(pos)
-
-            for x in x_range:
-                for y in y_range:
-                    pos = Point2((x + center.x, y + center.y))
-                    area: GridArea = self.grid[pos]
-
-                    if area is None or area.ZoneIndex != zone_color:
-                        continue
-
-                    action(pos)
+            for pos in positions:
+                action(pos)
+                yield
         else:
             larva_padding = Rectangle(center.x, center.y - 3, 5, 1)
-            self.grid.fill_rect(larva_padding, fill_padding)
-
-            for x in x_range:
-                for y in y_range:
-                    pos = Point2((x + center.x, y + center.y))
-                    area: GridArea = self.grid[pos]
+            self.grid.fill_rect_with(larva_padding, BuildArea.BuildingPadding, EMPTY_AREAS)
 
-                    if area is None or area.ZoneIndex != zone_color:
-                        continue
+            for pos in positions:
+                self.massive_zerg_grid(pos)
+                yield
 
-                    self.massive_zerg_grid(pos)
-
-            for x in x_range:
-                for y in y_range:
-                    pos = Point2((x + center.x, y + center.y))
-                    area: GridArea = self.grid[pos]
-
-                    if area is None or area.ZoneIndex != zone_color:
-                        continue
-
-                    self.zerg_grid(pos)
+            for pos in positions:
+                self.zerg_grid(pos)
+                yield
 
             if zone_color == ZoneArea.OwnMainZone:
                 # sort building by their distance to our main withing the main zone
                 self._building_positions.get(BuildArea.Building).sort(
                     key=lambda p: p.distance_to_point2(self.ai.start_location)
                 )
+                self._changed_slots.add(3)
+
+    def rect_may_fit(self, rect: Rectangle) -> bool:
+        """
+        Quick rejection of rectangles that were not empty when the zone fill started
+        or that are too tight for the terrain, based on the clearance map.
+        """
+        size = (rect.width, rect.height)
+        empty = self._empty_rects.get(size)
+        if empty is None:
+            empty = self.grid.rect_validity(EMPTY_AREAS, rect.width, rect.height)
+            self._empty_rects[size] = empty
+
+        if 0 <= rect.x < self.grid.width and 0 <= rect.y < self.grid.height and not empty[rect.x, rect.y]:
+            return False
+
+        if self.pather is None:
+            return True
+        return self.pather.clearance.rect_may_fit(rect.x, rect.y, rect.width, rect.height)
 
     def massive_grid(self, pos):
         rect = Rectangle(pos.x, pos.y, 6, 9)
@@ -389,9 +563,10 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
         padding = Rectangle(pos.x - 2, pos.y - 2, 10, 12)
 
         if (
-            self.grid.query_rect(rect, is_empty)
-            and self.grid.query_rect(unit_exit_rect, is_free)
-            and self.grid.query_rect(unit_exit_rect2, is_free)
+            self.rect_may_fit(rect)
+            and self.grid.query_rect_in(rect, EMPTY_AREAS)
+            and self.grid.query_rect_in(unit_exit_rect, FREE_AREAS)
+            and self.grid.query_rect_in(unit_exit_rect2, FREE_AREAS)
         ):
             pylons = [pos + Point2((1, 1)), pos + Point2((1 + 2, 1)), pos + Point2((1 + 4, 1))]
             gates = [
@@ -402,7 +577,7 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
             ]
 
             pylon_check = pylons[0].offset(Point2((0, -1)))
-            if not self.grid.query_area(pylon_check, BlockerType.Building2x2, is_free):
+            if not self.grid.query_area_in(pylon_check, BlockerType.Building2x2, FREE_AREAS):
                 pylons.pop(0)
 
             for pylon_pos in pylons:
@@ -411,14 +586,14 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
             for gate_pos in gates:
                 self.fill_and_save(gate_pos, BlockerType.Building3x3, BuildArea.Building)
 
-            self.grid.fill_rect(padding, fill_padding)
+            self.grid.fill_rect_with(padding, BuildArea.BuildingPadding, EMPTY_AREAS)
 
     def massive_zerg_grid(self, pos):
         rect = Rectangle(pos.x, pos.y, 6, 6)
         padding = Rectangle(pos.x - 2, pos.y - 1, 10, 8)
         padding2 = Rectangle(pos.x - 1, pos.y - 2, 8, 10)
 
-        if self.grid.query_rect(rect, is_empty):
+        if self.rect_may_fit(rect) and self.grid.query_rect_in(rect, EMPTY_AREAS):
             buildings = [
                 pos + Point2((1.5, 1.5)),
                 pos + Point2((4.5, 1.5)),
@@ -429,14 +604,14 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
             for gate_pos in buildings:
                 self.fill_and_save(gate_pos, BlockerType.Building3x3, BuildArea.Building)
 
-            self.grid.fill_rect(padding, fill_padding)
-            self.grid.fill_rect(padding2, fill_padding)
+            self.grid.fill_rect_with(padding, BuildArea.BuildingPadding, EMPTY_AREAS)
+            self.grid.fill_rect_with(padding2, BuildArea.BuildingPadding, EMPTY_AREAS)
 
     def zerg_grid(self, pos):
         rect = Rectangle(pos.x, pos.y, 3, 3)
         padding = Rectangle(pos.x, pos.y, 5, 5)
 
-        if self.grid.query_rect(rect, is_empty):
+        if self.rect_may_fit(rect) and self.grid.query_rect_in(rect, EMPTY_AREAS):
             buildings = [
                 pos + Point2((1.5, 1.5)),
             ]
@@ -444,13 +619,13 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
             for pos in buildings:
                 self.fill_and_save(pos, BlockerType.Building3x3, BuildArea.Building)
 
-            self.grid.fill_rect(padding, fill_padding)
+            self.grid.fill_rect_with(padding, BuildArea.BuildingPadding, EMPTY_AREAS)
 
     def terran_grid(self, pos):
         rect = Rectangle(pos.x, pos.y, 6, 5)
         padding = Rectangle(pos.x, pos.y, 7, 5)
 
-        if self.grid.query_rect(rect, is_empty):
+        if self.rect_may_fit(rect) and self.grid.query_rect_in(rect, EMPTY_AREAS):
             depots = [pos + Point2((1, 4)), pos + Point2((1 + 2, 4)), pos + Point2((1 + 4, 4))]
             raxes = [
                 pos + Point2((1.5, 1.5)),
@@ -461,13 +636,13 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
             for rax_pos in raxes:
                 self.fill_and_save(rax_pos, BlockerType.Building3x3, BuildArea.Building)
 
-            self.grid.fill_rect(padding, fill_padding)
+            self.grid.fill_rect_with(padding, BuildArea.BuildingPadding, EMPTY_AREAS)
 
     def terran_massive_grid(self, pos):
         rect = Rectangle(pos.x, pos.y, 7, 8)
         # padding = Rectangle(pos.x, pos.y - 2, 7, 8)
 
-        if self.grid.query_rect(rect, is_empty):
+        if self.rect_may_fit(rect) and self.grid.query_rect_in(rect, EMPTY_AREAS):
             pylons = [pos + Point2((1, 3)), pos + Point2((6, 4)), pos + Point2((6, 6))]
             gates = [
                 pos + Point2((1.5, 5.5)),
@@ -479,27 +654,27 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
             for gate_pos in gates:
                 self.fill_and_save(gate_pos, BlockerType.Building3x3, BuildArea.Building)
 
-            self.grid.fill_rect(rect, fill_padding)
+            self.grid.fill_rect_with(rect, BuildArea.BuildingPadding, EMPTY_AREAS)
 
     def pylon_pair_normal(self, pos):
         rect_pylon = Rectangle(pos.x, pos.y, 2, 2)
         rect = Rectangle(rect_pylon.right, pos.y, 3, 3)
-        if self.grid.query_rect(rect_pylon, is_empty) and self.grid.query_rect(rect, is_empty):
+        if self.grid.query_rect_in(rect_pylon, EMPTY_AREAS) and self.grid.query_rect_in(rect, EMPTY_AREAS):
             pylon_pos = pos + Point2((1, 1))
             gate_pos = pos + Point2((3.5, 1.5))
             self.fill_and_save(pylon_pos, BlockerType.Building2x2, BuildArea.Pylon)
             self.fill_and_save(gate_pos, BlockerType.Building3x3, BuildArea.Building)
-            self.grid.fill_area(gate_pos, BlockerType.Building5x5, fill_padding)
+            self.grid.fill_area_with(gate_pos, BlockerType.Building5x5, BuildArea.BuildingPadding, EMPTY_AREAS)
 
     def pylon_pair_reversed(self, pos):
         rect_pylon = Rectangle(pos.x, pos.y, 2, 2)
         rect = Rectangle(rect_pylon.x - 3, pos.y, 3, 3)
-        if self.grid.query_rect(rect_pylon, is_empty) and self.grid.query_rect(rect, is_empty):
+        if self.grid.query_rect_in(rect_pylon, EMPTY_AREAS) and self.grid.query_rect_in(rect, EMPTY_AREAS):
             pylon_pos = pos + Point2((1, 1))
             gate_pos = pos + Point2((-1.5, 1.5))
             self.fill_and_save(pylon_pos, BlockerType.Building2x2, BuildArea.Pylon)
             self.fill_and_save(gate_pos, BlockerType.Building3x3, BuildArea.Building)
-            self.grid.fill_area(gate_pos, BlockerType.Building5x5, fill_padding)
+            self.grid.fill_area_with(gate_pos, BlockerType.Building5x5, BuildArea.BuildingPadding, EMPTY_AREAS)
 
     def protoss_wall(self):
         ramp: "ExtendedRamp" = self.base_ramp
@@ -573,6 +748,12 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
         zone_height = self.ai.get_terrain_height(center)
         wall: Optional[Tuple[int, Point2, Point2, List[Point2]]] = None
 
+        # Valid wall positions of all finders are solved at once, grid doesn't change during the search
+        margin = max(finder.margin for finder in wall_finders)
+        empty = self.grid.rect_validity(EMPTY_AREAS, 3, 3, margin)
+        not_hard_wall = self.grid.rect_validity(NOT_HARD_WALL_AREAS, 3, 3, margin)
+        valid_walls = [finder.validity(empty, not_hard_wall, margin) for finder in wall_finders]
+
         for i in range(5, 15):
             for j in range(-15, 16):
                 lookup = center + search_vector * i + perpendicular * j
@@ -581,9 +762,16 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
                     # height doesn't match with zone height
                     continue
 
-                for finder in wall_finders:
+                x = floor(lookup.x)
+                y = floor(lookup.y)
+
+                for finder, valid in zip(wall_finders, valid_walls):
+                    if self.grid.is_inside(lookup):
+                        found = valid[x, y]
+                    else:
+                        found = finder.query(self.grid, lookup, ZoneArea.OwnNaturalZone)
 
-                    if finder.query(self.grid, lookup, ZoneArea.OwnNaturalZone):
+                    if found:
                         pylon = lookup - 2.5 * search_vector
                         zealot = lookup + finder.zealot
                         gates = finder.positions(lookup)
@@ -637,7 +825,7 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
         for position in sc2math.spiral(7, 7):
             pylon_check = pylon + position
             if (
-                self.grid.query_area(pylon_check, BlockerType.Building2x2, is_empty)
+                self.grid.query_area_in(pylon_check, BlockerType.Building2x2, EMPTY_AREAS)
                 and pylon_check.distance_to(gates[0]) < Constants.PYLON_POWERED_DISTANCE
                 and pylon_check.distance_to(gates[1]) < Constants.PYLON_POWERED_DISTANCE
                 and pylon_check.distance_to(gates[2]) < Constants.PYLON_POWERED_DISTANCE
@@ -656,6 +844,7 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
 
         self._wall3x3 = gates
         self._wall2x2 = [pylon]
+        self._changed_slots.update((2, 3))
 
         self.fill_and_save(pylon, BlockerType.Building4x4, BuildArea.BuildingPadding)
         for gate in gates:
@@ -679,32 +868,39 @@ class BuildingSolver(ManagerBase, IBuildingSolver):
             building_index = len(list)
             self._building_positions[area] = list
             list.append(position)
+            if area in SLOT_SIZES:
+                self._changed_slots.add(SLOT_SIZES[area])
         else:
             building_index = -1
 
-        def filler(cell: GridArea):
-            if cell.Area == BuildArea.Empty or cell.Area == BuildArea.BuildingPadding:
-                cell.BuildingIndex = building_index
-                cell.Area = area
-            return cell
+        self.grid.fill_area_with(position, blocker_type, area, FREE_AREAS, building_index)
 
-        self.grid.fill_area(position, blocker_type, filler)
+    def color_zone(self, zone: Zone, zone_type: Optional[ZoneArea]) -> np.ndarray:
+        """
+        Marks empty cells of the zone that are on the zone height with the zone type.
 
-    def color_zone(self, zone: Zone, zone_type: ZoneArea):
+        :return: Boolean [x][y] array of the zone cells, also when zone type is None and the cells are not marked.
+        """
         center = Point2((floor(zone.center_location.x), floor(zone.center_location.y)))
 
         radius = zone.radius
         height = self.ai.get_terrain_height(center)
 
-        def fill_circle(cell: GridArea, point: Point2) -> GridArea:
-            if (
-                cell.Area == BuildArea.Empty
-                and height == self.ai.get_terrain_height(point)
-                and point.distance_to_point2(center) <= zone.radius
-            ):
-                cell.ZoneIndex = zone_type
-
-            return cell
-
         rect = Rectangle(center.x - radius, center.y - radius, radius * 2, radius * 2)
-        self.grid.fill_rect_func(rect, fill_circle)
+        xs, ys = self.grid.rect_slices(rect)
+        cells = self.grid.cells[xs, ys]
+        x, y = np.ogrid[xs, ys]
+        heights = self.ai.game_info.terrain_height.data_numpy.T[xs, ys]
+
+        circle = (
+            (cells["Area"] == AREA_CODES[BuildArea.Empty])
+            & (heights == height)
+            & (np.hypot(x - center.x, y - center.y) <= zone.radius)
+        )
+        if zone_type is not None:
+            cells["ZoneIndex"][circle] = zone_type.value
+            self.grid.changed()
+
+        mask = np.zeros((self.grid.width, self.grid.height), dtype=bool)
+        mask[xs, ys] = circle
+        return mask
@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from sc2 import Race
+from sc2.position import Point2, Point3
+
+from sharpy.general.placement_map import PlacementMap
+from sharpy.general.slot_registry import SlotRegistry
+from sharpy.managers.core.grids.build_grid_test import create_grid
+from .building_solver import BuildingSolver, EMPTY_AREAS, NOT_HARD_WALL_AREAS
+from .grids import BlockerType, BuildArea, Rectangle, ZoneArea
+
+
+class TestWallFinder:
+    def test_validity_matches_query(self):
+        rng = np.random.default_rng(5)
+        buildable = rng.random((30, 26)) < 0.9
+        buildable[14:17, :] = False
+        grid = create_grid(buildable)
+        grid.fill_rect_with(Rectangle(8, 8, 2, 2), BuildArea.HighRock)
+
+        solver = BuildingSolver()
+        finders = solver.wall_finders_v + solver.wall_finders_h + solver.wall_finders_d
+        margin = max(finder.margin for finder in finders)
+        empty = grid.rect_validity(EMPTY_AREAS, 3, 3, margin)
+        not_hard_wall = grid.rect_validity(NOT_HARD_WALL_AREAS, 3, 3, margin)
+
+        found = 0
+        for finder in finders:
+            valid = finder.validity(empty, not_hard_wall, margin)
+            for x in range(0, 30):
+                for y in range(0, 26):
+                    position = Point2((x + 0.5, y + 0.5))
+                    expected = finder.query(grid, position, ZoneArea.OwnNaturalZone)
+                    assert valid[x, y] == expected, (finder.name, x, y)
+                    found += expected
+
+        assert found > 0
+
+
+def create_solver(race: Race) -> BuildingSolver:
+    solver = BuildingSolver()
+    solver.grid = create_grid(np.ones((60, 60), dtype=bool))
+    solver.pather = None
+    solver.knowledge = SimpleNamespace(my_race=race)
+    solver.ai = SimpleNamespace(start_location=Point2((10, 10)), game_info=SimpleNamespace(map_center=Point2((30, 30))))
+    return solver
+
+
+class TestBuildingSolver:
+    def test_zone_solved_over_frames(self):
+        candidates = np.zeros((60, 60), dtype=bool)
+        candidates[20:40, 20:40] = True
+
+        expected = create_solver(Race.Protoss)
+        expected.fill_zone(Point2((30.5, 30.5)), None, candidates)
+
+        solver = create_solver(Race.Protoss)
+        solver.frame_budget = 0
+        solver._zone_jobs.append(solver.fill_zone_steps(Point2((30.5, 30.5)), None, candidates))
+
+        frames = 0
+        while solver._zone_jobs:
+            solver.solve_zones()
+            frames += 1
+
+        # One position is tried in each frame when there is no time left
+        assert frames == 401
+        assert solver.buildings2x2 == expected.buildings2x2
+        assert solver.buildings3x3 == expected.buildings3x3
+        assert len(solver.buildings3x3) > 0
+
+    def test_debug_boxes_cached_until_grid_changes(self):
+        solver = create_solver(Race.Protoss)
+        solver.knowledge.terrain_to_z_height = lambda h: -16 + 32 * h / 255
+        solver.ai.game_info.terrain_height = SimpleNamespace(data_numpy=np.full((60, 60), 255, dtype=np.uint8))
+        solver.fill_and_save(Point2((10, 10)), BlockerType.Building2x2, BuildArea.Pylon)
+
+        boxes = solver.debug_boxes()
+        assert len(boxes) == 4
+        assert (Point3((9, 9, 16)), Point3((10, 10, 17)), solver.grid.pylon_color) in boxes
+        assert solver.debug_boxes() is boxes
+
+        solver.fill_and_save(Point2((20.5, 20.5)), BlockerType.Building3x3, BuildArea.Building)
+        assert len(solver.debug_boxes()) == 13
+
+    def test_slots_follow_building_positions(self):
+        solver = create_solver(Race.Protoss)
+        solver._slots = SlotRegistry(PlacementMap(np.ones((60, 60), dtype=bool)))
+        solver.wall_save(Point2((10, 10)), Point2((20, 20)), [Point2((13.5, 10.5))])
+        solver.fill_and_save(Point2((30.5, 30.5)), BlockerType.Building3x3, BuildArea.Building)
+
+        assert solver.slots.slots(3) == (Point2((13.5, 10.5)), Point2((30.5, 30.5)))
+        assert solver.not_wall3x3 == [Point2((30.5, 30.5))]
+        assert solver.not_wall2x2 == []
+
+        solver.fill_and_save(Point2((40, 40)), BlockerType.Building2x2, BuildArea.Pylon)
+        assert solver.slots.first(2, allow_wall=False) == Point2((40, 40))
+
+    def test_rocks_are_occupied(self):
+        solver = create_solver(Race.Protoss)
+        solver._placement = PlacementMap(np.ones((60, 60), dtype=bool))
+        rock = SimpleNamespace(
+            tag=1,
+            position_tuple=(20, 20),
+            radius=1.9,
+            footprint_radius=None,
+            is_mineral_field=False,
+            is_vespene_geyser=False,
+            is_flying=False,
+        )
+        solver.ai.structures = solver.ai.enemy_structures = solver.ai.mineral_field = solver.ai.vespene_geyser = []
+        solver.ai.destructables = [rock]
+        solver.ai.state = SimpleNamespace(
+            creep=SimpleNamespace(data_numpy=np.zeros((60, 60), dtype=np.uint8)),
+            psionic_matrix=SimpleNamespace(sources=[SimpleNamespace(position=(20, 20), radius=6.5)]),
+        )
+        solver.update_placement()
+
+        spots = solver.placement.warp_in_spots((20, 20), 40, 3)
+        assert spots
+        assert all(abs(x - 20) > 2 or abs(y - 20) > 2 for x, y in spots)
@@ -1,4 +1,4 @@
-from .grid_area import GridArea
+from .grid_area import GridArea, GridCell, AREA_CODES
 from .grid import Grid
 from .blocker_type import BlockerType
 from .build_area import BuildArea
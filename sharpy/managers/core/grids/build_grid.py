@@ -1,5 +1,7 @@
 import string
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+import numpy as np
 
 from s2clientprotocol.debug_pb2 import Color
 
@@ -15,7 +17,8 @@ from sharpy.general.rocks import *
 from .build_area import BuildArea
 from .cliff import Cliff
 from .grid import Grid
-from .grid_area import GridArea
+from .grid_area import GridArea, GridCell, AREA_CODES, AREA_VALUES, CELL_DTYPE
+from .rectangle import Rectangle
 from .blocker_type import BlockerType
 from .zone_area import ZoneArea
 
@@ -32,6 +35,12 @@ class BuildGrid(Grid):
         ai = knowledge.ai
         self.game_info: GameInfo = ai.game_info
         super().__init__(self.game_info.placement_grid.width, self.game_info.placement_grid.height)
+        # Cells are indexed with [x][y], areas are stored as codes of `AREA_CODES`
+        self.cells: np.ndarray = np.zeros((self.width, self.height), dtype=CELL_DTYPE)
+        # Incremented every time cells change
+        self.version = 0
+        # Lookup tables from area codes to area matches, keyed by the areas
+        self._area_tables: Dict[Tuple[BuildArea, ...], np.ndarray] = dict()
         # noinspection PyUnresolvedReferences
         self.knowledge = knowledge  # type: Knowledge
         self.zone_manager = knowledge.zone_manager
@@ -50,138 +59,201 @@ class BuildGrid(Grid):
     def get_default(self):
         return GridArea(BuildArea.NotBuildable)
 
+    def get(self, x: int, y: int) -> GridCell:
+        return GridCell(self, x, y)
+
+    def set(self, x: int, y: int, value):
+        if isinstance(value, GridCell) and value.grid is self and value.x == x and value.y == y:
+            # Cell views write directly to the arrays
+            return
+        self.changed()
+        self.cells[x, y] = (AREA_CODES[value.Area], value.BuildingIndex, value.ZoneIndex.value, value.Cliff.value)
+
+    def changed(self):
+        self.version += 1
+
+    def area_mask(self, values: np.ndarray, areas: Iterable[BuildArea]) -> np.ndarray:
+        """ Boolean mask of area code `values` that match any of the `areas`. """
+        areas = tuple(areas)
+        table = self._area_tables.get(areas)
+        if table is None:
+            table = np.zeros(len(AREA_CODES), dtype=bool)
+            table[[AREA_CODES[area] for area in areas]] = True
+            self._area_tables[areas] = table
+        return table[values]
+
+    def query_rect_in(self, rect: Rectangle, areas: Iterable[BuildArea]) -> bool:
+        """ Vectorized `query_rect`, true if all cells of the rectangle have one of the `areas`. """
+        xs, ys = self.rect_slices(rect)
+        return bool(self.area_mask(self.cells["Area"][xs, ys], areas).all())
+
+    def query_area_in(self, position: Point2, fill_type: BlockerType, areas: Iterable[BuildArea]) -> bool:
+        return self.query_rect_in(self.get_area(position, fill_type), areas)
+
+    def rect_validity(self, areas: Iterable[BuildArea], width: int, height: int, margin: int = 0) -> np.ndarray:
+        """
+        `query_rect_in` for rectangles of the size starting from every cell, solved with one summed-area pass.
+
+        :param margin: Rectangles starting up to this many cells outside of the grid are included.
+        :return: Boolean array where index [x + margin][y + margin] is the rectangle starting from x, y.
+        """
+        invalid = ~self.area_mask(self.cells["Area"], areas)
+        # Last column and row of the grid are never included in rectangles
+        invalid[-1, :] = False
+        invalid[:, -1] = False
+        invalid = np.pad(invalid, ((margin, margin + width), (margin, margin + height)))
+
+        integral = np.zeros((invalid.shape[0] + 1, invalid.shape[1] + 1), dtype=np.int32)
+        np.cumsum(np.cumsum(invalid, axis=0), axis=1, out=integral[1:, 1:])
+        counts = integral[width:, height:] - integral[:-width, height:] - integral[width:, :-height]
+        counts += integral[:-width, :-height]
+        return counts[: self.width + 2 * margin, : self.height + 2 * margin] == 0
+
+    def fill_rect_with(
+        self,
+        rect: Rectangle,
+        area: BuildArea,
+        where: Optional[Iterable[BuildArea]] = None,
+        building_index: Optional[int] = None,
+    ):
+        """
+        Vectorized `fill_rect`, sets area and optionally building index of the cells in the rectangle.
+
+        :param where: Only cells with one of these areas are changed, all cells if None.
+        """
+        self.changed()
+        xs, ys = self.rect_slices(rect)
+        cells = self.cells[xs, ys]
+        mask = Ellipsis if where is None else self.area_mask(cells["Area"], where)
+        cells["Area"][mask] = AREA_CODES[area]
+        if building_index is not None:
+            cells["BuildingIndex"][mask] = building_index
+
+    def fill_area_with(
+        self,
+        position: Point2,
+        fill_type: BlockerType,
+        area: BuildArea,
+        where: Optional[Iterable[BuildArea]] = None,
+        building_index: Optional[int] = None,
+    ):
+        self.fill_rect_with(self.get_area(position, fill_type), area, where, building_index)
+
     def Generate(self, ai: sc2.BotAI):
         self.copy_build_map(self.game_info.placement_grid)
+        areas = self.cells["Area"]
 
         for ramp in self.game_info.map_ramps:
             is_ramp = len(ramp.lower) != len(ramp.points)
-            for point in ramp.points:  # type: Point2
-                x = point.x
-                y = point.y
-                cell: GridArea = self.get(x, y)
-                if is_ramp:
-                    cell.Area = BuildArea.Ramp
-                else:
-                    cell.Area = BuildArea.VisionBlocker
-
-        def low_rock_filler(cell):
-            cell.Area = BuildArea.LowRock
-            return cell
-
-        def high_rock_filler(cell):
-            cell.Area = BuildArea.HighRock
-            return cell
+            points = np.array([(point[0], point[1]) for point in ramp.points], dtype=np.int32).reshape(-1, 2)
+            area = BuildArea.Ramp if is_ramp else BuildArea.VisionBlocker
+            areas[points[:, 0], points[:, 1]] = AREA_CODES[area]
 
         for low_blocker in ai.destructables:  # type: Unit
             type_id = low_blocker.type_id
             # TODO: diagonal rocks, they're not commonly blocking base building though
             if type_id in unbuildable_rocks:
-                self.fill_area(low_blocker.position, BlockerType.Building2x2, low_rock_filler)
+                self.fill_area_with(low_blocker.position, BlockerType.Building2x2, BuildArea.LowRock)
             if type_id in breakable_rocks_2x2:
-                self.fill_area(low_blocker.position, BlockerType.Building2x2, high_rock_filler)
+                self.fill_area_with(low_blocker.position, BlockerType.Building2x2, BuildArea.HighRock)
             if type_id in breakable_rocks_4x4:
-                self.fill_area(low_blocker.position, BlockerType.Building4x4, high_rock_filler)
+                self.fill_area_with(low_blocker.position, BlockerType.Building4x4, BuildArea.HighRock)
             if type_id in breakable_rocks_6x6:
-                self.fill_area(low_blocker.position, BlockerType.Building6x6, high_rock_filler)
-
-        def building_filler(cell):
-            cell.Area = BuildArea.TownHall
-            cell.BuildingIndex = 0
-            return cell
-
-        def mineral_filler(cell):
-            cell.Area = BuildArea.Mineral
-            cell.BuildingIndex = 0
-            return cell
-
-        def vespene_filler(cell):
-            cell.Area = BuildArea.Gas
-            cell.BuildingIndex = 0
-            return cell
-
-        def mining_filler(cell):
-            if cell.Area == BuildArea.Empty:
-                cell.Area = BuildArea.InMineralLine
-            return cell
+                self.fill_area_with(low_blocker.position, BlockerType.Building6x6, BuildArea.HighRock)
 
         for zone in self.zone_manager.expansion_zones:
-            self.fill_area(zone.center_location, BlockerType.Building5x5, building_filler)
+            self.fill_area_with(zone.center_location, BlockerType.Building5x5, BuildArea.TownHall, building_index=0)
 
         for neutral_unit in ai.mineral_field:  # type: Unit
-            self.fill_area(neutral_unit.position, BlockerType.Minerals, mineral_filler)
-            self.fill_line(ai, mining_filler, neutral_unit)
+            self.fill_area_with(neutral_unit.position, BlockerType.Minerals, BuildArea.Mineral, building_index=0)
+            self.fill_line(ai, neutral_unit)
 
         for neutral_unit in ai.vespene_geyser:  # type: Unit
-            self.fill_area(neutral_unit.position, BlockerType.Building3x3, vespene_filler)
-            self.fill_line(ai, mining_filler, neutral_unit)
+            self.fill_area_with(neutral_unit.position, BlockerType.Building3x3, BuildArea.Gas, building_index=0)
+            self.fill_line(ai, neutral_unit)
 
-    def fill_line(self, ai, mining_filler, neutral_unit):
+    def fill_line(self, ai, neutral_unit):
         pos: Point2 = neutral_unit.position
         closest_expansion = pos.closest(ai.expansion_locations.keys())
         direction = closest_expansion - neutral_unit.position
         direction = sc2math.point_normalize(direction)
         i = 1
         while i < 5:
-            self.fill_area(neutral_unit.position + direction * i, BlockerType.Building2x2, mining_filler)
+            self.fill_area_with(
+                neutral_unit.position + direction * i,
+                BlockerType.Building2x2,
+                BuildArea.InMineralLine,
+                (BuildArea.Empty,),
+            )
             i += 1
 
     def copy_build_map(self, buildGrid: PixelMap):
-        for x in range(0, buildGrid.width):
-            for y in range(0, buildGrid.height):
-                if buildGrid.is_set((x, y)):
-                    self.set(x, y, GridArea(BuildArea.Empty))
-                else:
-                    self.set(x, y, GridArea(BuildArea.NotBuildable))
+        # Pixel map is indexed with [y][x]
+        buildable = buildGrid.data_numpy.T != 0
+        self.changed()
+        self.cells[:] = (AREA_CODES[BuildArea.NotBuildable], -1, ZoneArea.NoZone.value, Cliff.No.value)
+        self.cells["Area"][: buildGrid.width, : buildGrid.height][buildable] = AREA_CODES[BuildArea.Empty]
 
     def SolveCliffs(self, ai: sc2.BotAI):
-        maxDifference = 3
-        hMap = self.game_info.terrain_height
-        correction = Point2((0, 1))
-
-        x = 2
-        while x < self.width - 3:
-            y = 3
-            while y < self.height - 3:
-                pos = Point2((x, y))
-                h = hMap[pos + correction]
-                possibles = [
-                    Point2((x - 2, y - 2)),
-                    Point2((x + 2, y - 2)),
-                    Point2((x - 2, y + 2)),
-                    Point2((x + 2, y + 2)),
-                ]
-
-                for possible in possibles:
-                    # To ensure rounding errors don't drop it to previous pixel.
-                    middle = (possible + pos) * 0.500001
-                    cell_possible: GridArea = self[possible]
-                    cell_middle: GridArea = self[middle]
-
-                    if cell_possible.Area == BuildArea.Empty and cell_middle.Area == BuildArea.NotBuildable:
-                        h2 = hMap[possible + correction]
-                        difference = h - h2
-                        if abs(difference) > maxDifference:
-                            continue
-
-                        cell: GridArea = self.get(x, y)
-
-                        if difference < 0:
-                            if cell.Cliff == Cliff.HighCliff:
-                                cell.Cliff = Cliff.BothCliff
-                            else:
-                                cell.Cliff = Cliff.LowCliff
-                        if difference > 0:
-                            if cell.Cliff == Cliff.LowCliff:
-                                cell.Cliff = Cliff.BothCliff
-                            else:
-                                cell.Cliff = Cliff.HighCliff
-                y += 1
-            x += 1
+        max_difference = 3
+        # Heights are read one cell above the position, as with the original point lookups
+        heights = self.game_info.terrain_height.data_numpy.T.astype(np.int16)
+        areas = self.cells["Area"]
+        cliffs = self.cells["Cliff"]
+        empty = areas == AREA_CODES[BuildArea.Empty]
+        not_buildable = areas == AREA_CODES[BuildArea.NotBuildable]
+
+        xs = slice(2, max(self.width - 3, 2))
+        ys = slice(3, max(self.height - 3, 3))
+        cell_cliffs = cliffs[xs, ys]
+        height = heights[xs, ys.start + 1 : ys.stop + 1]
+
+        def shifted(array: np.ndarray, dx: int, dy: int) -> np.ndarray:
+            return array[xs.start + dx : xs.stop + dx, ys.start + dy : ys.stop + dy]
+
+        # Diagonal neighbours are checked in the same order as cells were checked one by one,
+        # so that a later low cliff can still override an earlier both cliff.
+        for dx, dy in ((-2, -2), (2, -2), (-2, 2), (2, 2)):
+            difference = height - shifted(heights, dx, dy + 1)
+            cliff = (
+                shifted(empty, dx, dy)
+                & shifted(not_buildable, dx // 2, dy // 2)
+                & (np.abs(difference) <= max_difference)
+            )
+
+            low = cliff & (difference < 0)
+            cell_cliffs[low] = np.where(
+                cell_cliffs[low] == Cliff.HighCliff.value, Cliff.BothCliff.value, Cliff.LowCliff.value
+            )
+            high = cliff & (difference > 0)
+            cell_cliffs[high] = np.where(
+                cell_cliffs[high] == Cliff.LowCliff.value, Cliff.BothCliff.value, Cliff.HighCliff.value
+            )
 
     def save(self, filename: string):
         if self.knowledge.debug:
             self.save_image(filename, self.select_color)
 
+    def cell_snapshot(self) -> np.ndarray:
+        """ Area, cliff and zone values of the cells as [x][y][3] array, see `render_snapshot`. """
+        return np.stack(
+            (AREA_VALUES[self.cells["Area"]], self.cells["Cliff"], self.cells["ZoneIndex"]), axis=-1
+        ).astype(np.int16)
+
+    def render_snapshot(self, snapshot: np.ndarray) -> np.ndarray:
+        """ Converts cell values of `cell_snapshot` into a [x][y] RGB image with the same colors as `save`. """
+        image = np.zeros(snapshot.shape[0:2] + (3,), dtype=np.uint8)
+        values, inverse = np.unique(snapshot.reshape(-1, 3), axis=0, return_inverse=True)
+        colors = np.zeros((len(values), 3), dtype=np.uint8)
+        for i, (area, cliff, zone) in enumerate(values):
+            cell = GridArea(BuildArea(area))
+            cell.Cliff = Cliff(cliff)
+            cell.ZoneIndex = ZoneArea(zone)
+            color = self.select_color(cell)
+            colors[i] = (color[0], color[1], color[2])
+        image.reshape(-1, 3)[:] = colors[inverse.reshape(-1)]
+        return image
+
     def select_color(self, cell: GridArea) -> Color:
         if cell.Area == BuildArea.Building:
             return self.building_color
@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from sc2.position import Point2
+
+from .build_area import BuildArea
+from .build_grid import BuildGrid
+from .blocker_type import BlockerType
+from .cliff import Cliff
+from .grid_area import GridArea
+from .rectangle import Rectangle
+from .zone_area import ZoneArea
+
+
+def create_grid(buildable: np.ndarray, heights: np.ndarray = None, expansions=(), minerals=()) -> BuildGrid:
+    """ Creates build grid from [x][y] buildable and height arrays. """
+    if heights is None:
+        heights = np.full(buildable.shape, 10, dtype=np.uint8)
+    width, height = buildable.shape
+    game_info = SimpleNamespace(
+        # Pixel maps of the game are indexed with [y][x]
+        placement_grid=SimpleNamespace(width=width, height=height, data_numpy=buildable.T.astype(np.uint8)),
+        terrain_height=SimpleNamespace(data_numpy=heights.T),
+        map_ramps=[],
+    )
+    ai = SimpleNamespace(
+        game_info=game_info,
+        destructables=[],
+        mineral_field=[SimpleNamespace(position=mineral) for mineral in minerals],
+        vespene_geyser=[],
+        expansion_locations={expansion: None for expansion in expansions},
+    )
+    zone_manager = SimpleNamespace(expansion_zones=[SimpleNamespace(center_location=e) for e in expansions])
+    return BuildGrid(SimpleNamespace(ai=ai, zone_manager=zone_manager))
+
+
+class TestBuildGrid:
+    def test_generate(self):
+        buildable = np.ones((20, 16), dtype=bool)
+        buildable[:, 0] = False
+        grid = create_grid(buildable, expansions=[Point2((10.5, 10.5))], minerals=[Point2((16, 10.5))])
+
+        assert grid.get(3, 0).Area == BuildArea.NotBuildable
+        assert grid.get(3, 1).Area == BuildArea.Empty
+        assert grid[Point2((10, 10))].Area == BuildArea.TownHall
+        assert grid.get(8, 8).BuildingIndex == 0
+        assert grid.get(7, 8).Area == BuildArea.Empty
+        assert grid.get(15, 10).Area == BuildArea.Mineral
+        assert grid.get(14, 10).Area == BuildArea.InMineralLine
+        assert grid[Point2((-1, 5))].Area == BuildArea.NotBuildable
+
+    def test_rect_queries_and_fills(self):
+        grid = create_grid(np.ones((10, 10), dtype=bool))
+        empty = (BuildArea.Empty,)
+
+        grid.fill_rect_with(Rectangle(2, 2, 3, 3), BuildArea.Building, empty, 4)
+        assert grid.get(4, 4).Area == BuildArea.Building
+        assert grid.get(4, 4).BuildingIndex == 4
+        assert grid.get(5, 4).Area == BuildArea.Empty
+
+        grid.fill_rect_with(Rectangle(1, 1, 5, 5), BuildArea.BuildingPadding, empty)
+        assert grid.get(3, 3).Area == BuildArea.Building
+        assert grid.get(1, 5).Area == BuildArea.BuildingPadding
+
+        assert not grid.query_rect_in(Rectangle(0, 0, 2, 2), empty)
+        assert grid.query_rect_in(Rectangle(0, 0, 2, 2), (BuildArea.Empty, BuildArea.BuildingPadding))
+        assert grid.query_area_in(Point2((7, 7)), BlockerType.Building2x2, empty)
+
+        # Last column and row of the grid are never included
+        grid.fill_rect_with(Rectangle(8, 0, 5, 5), BuildArea.Pylon)
+        assert grid.get(8, 0).Area == BuildArea.Pylon
+        assert grid.get(9, 0).Area == BuildArea.Empty
+        assert grid.query_rect_in(Rectangle(-5, -5, 4, 4), empty)
+
+    def test_cell_access(self):
+        grid = create_grid(np.ones((10, 10), dtype=bool))
+
+        cell = grid.get(2, 3)
+        cell.ZoneIndex = ZoneArea.OwnMainZone
+        cell.Area = BuildArea.Pylon
+        assert grid.get(2, 3).ZoneIndex == ZoneArea.OwnMainZone
+        assert grid.query_rect(Rectangle(2, 3, 1, 1), lambda c: c.Area == BuildArea.Pylon)
+
+        grid.set(4, 4, GridArea(BuildArea.Gas))
+        grid.fill_rect(Rectangle(4, 4, 2, 1), lambda c: c)
+        assert grid.get(4, 4).Area == BuildArea.Gas
+        assert grid.get(4, 4).BuildingIndex == -1
+
+        snapshot = grid.cell_snapshot()
+        assert snapshot.shape == (10, 10, 3)
+        assert snapshot[2, 3].tolist() == [BuildArea.Pylon.value, Cliff.No.value, ZoneArea.OwnMainZone.value]
+
+    def test_solve_cliffs(self):
+        buildable = np.ones((12, 10), dtype=bool)
+        buildable[5, :] = False
+        heights = np.full(buildable.shape, 10, dtype=np.uint8)
+        heights[5, :] = 11
+        heights[6:, :] = 12
+
+        grid = create_grid(buildable, heights)
+
+        cliffs = grid.cells["Cliff"]
+        assert np.all(cliffs[4, 3:7] == Cliff.LowCliff.value)
+        assert np.all(cliffs[6, 3:7] == Cliff.HighCliff.value)
+        assert np.count_nonzero(cliffs) == 8
+        assert grid.get(4, 3).Cliff == Cliff.LowCliff
+
+    def test_rect_validity_matches_queries(self):
+        rng = np.random.default_rng(3)
+        grid = create_grid(rng.random((24, 18)) < 0.8)
+        grid.fill_rect_with(Rectangle(4, 4, 4, 4), BuildArea.BuildingPadding)
+        free = (BuildArea.Empty, BuildArea.BuildingPadding)
+
+        for width, height in ((1, 1), (3, 3), (6, 9)):
+            margin = 2
+            valid = grid.rect_validity(free, width, height, margin)
+            assert valid.shape == (24 + 2 * margin, 18 + 2 * margin)
+
+            for x in range(-margin, 24 + margin):
+                for y in range(-margin, 18 + margin):
+                    expected = grid.query_rect_in(Rectangle(x, y, width, height), free)
+                    assert valid[x + margin, y + margin] == expected
@@ -1,6 +1,7 @@
 import math
 import os
 from abc import abstractmethod
+from typing import Tuple
 
 from s2clientprotocol.debug_pb2 import Color
 
@@ -11,19 +12,17 @@ from .blocker_type import BlockerType
 
 class Grid:
     def __init__(self, width, height):
-        self.height = height
         self.width = width
         self.height = height
-        self._data = [[0 for y in range(height)] for x in range(width)]
 
+    @abstractmethod
     def set(self, x: int, y: int, value):
-        # print(f"{x},{y})")
-        self._data[x][y] = value
+        ...
 
+    @abstractmethod
     def get(self, x: int, y: int):
         """Get value from position, no checking for performance"""
-        # print(f'{x}, {y}')
-        return self._data[x][y]
+        ...
 
     def __getitem__(self, pos: Point2):
         """ Example usage: is_pathable = self._game_info.pathing_grid[Point2((20, 20))] == 0 """
@@ -56,14 +55,20 @@ class Grid:
                 return False
         return True
 
-    def query_rect(self, rect: Rectangle, check) -> bool:
+    def rect_slices(self, rect: Rectangle) -> Tuple[slice, slice]:
+        """ Cells of the rectangle that are inside the grid as slices for [x][y] arrays. """
+        # Last column and row of the grid are never included
         minx = max(rect.x, 0)
         miny = max(rect.y, 0)
-        maxx = min(rect.right, self.width - 1)
-        maxy = min(rect.bottom, self.height - 1)
+        maxx = max(min(rect.right, self.width - 1), minx)
+        maxy = max(min(rect.bottom, self.height - 1), miny)
+        return slice(minx, maxx), slice(miny, maxy)
 
-        for x in range(minx, maxx):
-            for y in range(miny, maxy):
+    def query_rect(self, rect: Rectangle, check) -> bool:
+        xs, ys = self.rect_slices(rect)
+
+        for x in range(xs.start, xs.stop):
+            for y in range(ys.start, ys.stop):
                 if not check(self.get(x, y)):
                     return False
         return True
@@ -105,23 +110,17 @@ class Grid:
         return Rectangle(wStart, hStart, w, h)
 
     def fill_rect(self, rect: Rectangle, func):
-        minx = max(rect.x, 0)
-        miny = max(rect.y, 0)
-        maxx = min(rect.right, self.width - 1)
-        maxy = min(rect.bottom, self.height - 1)
+        xs, ys = self.rect_slices(rect)
 
-        for x in range(minx, maxx):
-            for y in range(miny, maxy):
+        for x in range(xs.start, xs.stop):
+            for y in range(ys.start, ys.stop):
                 self.set(x, y, func(self.get(x, y)))
 
     def fill_rect_func(self, rect: Rectangle, func):
-        minx = max(rect.x, 0)
-        miny = max(rect.y, 0)
-        maxx = min(rect.right, self.width - 1)
-        maxy = min(rect.bottom, self.height - 1)
+        xs, ys = self.rect_slices(rect)
 
-        for x in range(minx, maxx):
-            for y in range(miny, maxy):
+        for x in range(xs.start, xs.stop):
+            for y in range(ys.start, ys.stop):
                 self.set(x, y, func(self.get(x, y), Point2((x, y))))
 
     def save_image(self, filename, color_func):
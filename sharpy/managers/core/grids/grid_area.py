@@ -1,7 +1,23 @@
+from typing import Dict, List, TYPE_CHECKING
+
+import numpy as np
+
 from .build_area import BuildArea
 from .zone_area import ZoneArea
 from .cliff import Cliff
 
+if TYPE_CHECKING:
+    from .build_grid import BuildGrid
+
+# Build areas are stored in grid arrays as uint8 codes, code is the index in this list
+AREAS: List[BuildArea] = list(BuildArea)
+AREA_CODES: Dict[BuildArea, int] = {area: code for code, area in enumerate(AREAS)}
+AREA_VALUES = np.array([area.value for area in AREAS], dtype=np.int16)
+ZONES: List[ZoneArea] = sorted(ZoneArea, key=lambda zone: zone.value)
+CLIFFS: List[Cliff] = sorted(Cliff, key=lambda cliff: cliff.value)
+
+CELL_DTYPE = np.dtype([("Area", np.uint8), ("BuildingIndex", np.int32), ("ZoneIndex", np.uint8), ("Cliff", np.uint8)])
+
 
 class GridArea:
     def __init__(self, area: BuildArea):
@@ -9,3 +25,50 @@ class GridArea:
         self.ZoneIndex = ZoneArea.NoZone
         self.BuildingIndex = -1
         self.Cliff = Cliff.No
+
+
+class GridCell:
+    """ `GridArea` compatible view of a single cell of the grid arrays, changes are written to the arrays. """
+
+    __slots__ = ("grid", "x", "y")
+
+    def __init__(self, grid: "BuildGrid", x: int, y: int):
+        self.grid = grid
+        self.x = x
+        self.y = y
+
+    @property
+    def Area(self) -> BuildArea:
+        return AREAS[self.grid.cells["Area"][self.x, self.y]]
+
+    @Area.setter
+    def Area(self, area: BuildArea):
+        self.grid.changed()
+        self.grid.cells["Area"][self.x, self.y] = AREA_CODES[area]
+
+    @property
+    def ZoneIndex(self) -> ZoneArea:
+        return ZONES[self.grid.cells["ZoneIndex"][self.x, self.y]]
+
+    @ZoneIndex.setter
+    def ZoneIndex(self, zone: ZoneArea):
+        self.grid.changed()
+        self.grid.cells["ZoneIndex"][self.x, self.y] = zone.value
+
+    @property
+    def BuildingIndex(self) -> int:
+        return int(self.grid.cells["BuildingIndex"][self.x, self.y])
+
+    @BuildingIndex.setter
+    def BuildingIndex(self, index: int):
+        self.grid.changed()
+        self.grid.cells["BuildingIndex"][self.x, self.y] = index
+
+    @property
+    def Cliff(self) -> Cliff:
+        return CLIFFS[self.grid.cells["Cliff"][self.x, self.y]]
+
+    @Cliff.setter
+    def Cliff(self, cliff):
+        self.grid.changed()
+        self.grid.cells["Cliff"][self.x, self.y] = cliff.value
@@ -1,9 +1,10 @@
 import logging
-from typing import Dict, List, Tuple, Union
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 from math import floor
-from sc2 import Race
+from sc2 import Race, Result
 from sc2.game_info import GameInfo
 from sc2.ids.effect_id import EffectId
 from sc2.position import Point2, Point3
@@ -12,21 +13,49 @@ from sc2.units import Units
 
 import sc2pathlib
 from sc2pathlib import MapType, Sc2Map
+from sharpy.general.clearance_map import ClearanceMap
 from sharpy.general.extended_power import ExtendedPower
+from sharpy.general.path_service import BackgroundPath, PathService
+from sharpy.general.walk_distance_table import WalkDistanceTable, blocks_passage
 from sharpy.general.rocks import *
+from sharpy.general.zone_graph import ZoneGraph
 from .manager_base import ManagerBase
 from sharpy.managers.core.unit_value import buildings_2x2, buildings_3x3, buildings_5x5
 from sharpy.sc2math import point_normalize
 
 
+# Units with radius up to this fit through any pathable cell
+NORMAL_UNIT_RADIUS = 0.5
+# Background paths are used while the start is at most this far from the start of the solved path
+BACKGROUND_PATH_DISTANCE = 4
+# Seconds that background paths to a target are kept after they were last used
+BACKGROUND_PATH_TIMEOUT = 5
+# Batched path queries with start and target in the same window of this size share a single search
+PATH_QUERY_WINDOW = 2
+
+
 class PathingManager(ManagerBase):
     map: Sc2Map
     path_finder_terrain: sc2pathlib.PathFinder
+    clearance: ClearanceMap
 
     def __init__(self):
         super().__init__()
         self.found_points = []
         self.found_points_air = []
+        # Zone centers in the order they were given to map zone calculation, first one is zone 1.
+        self.zone_centers: List[Point2] = []
+        self.zone_graph: Optional[ZoneGraph] = None
+        # Process pool for batched path queries, native path finding holds the GIL so threads would not help.
+        self.executor: Optional[Executor] = None
+        # Solves path requests in the process pool, only available when the pool is
+        self.path_service: Optional[PathService] = None
+        self._background_paths: Dict[Tuple[int, int], BackgroundPath] = {}
+        self.distance_table: Optional[WalkDistanceTable] = None
+        # Position and radius of rocks by tag, used to find out which rocks were destroyed
+        self._rocks: Dict[int, Tuple[Point2, float]] = {}
+        # Ground influence copied from the map, cleared when the influence is updated
+        self._ground_influence: Optional[np.ndarray] = None
 
     async def start(self, knowledge: "Knowledge"):
         await super().start(knowledge)
@@ -45,6 +74,13 @@ class PathingManager(ManagerBase):
         _data = np.fmax(path_grid.data_numpy, placement_grid.data_numpy).T
         self.path_finder_terrain = sc2pathlib.PathFinder(_data)
         self.path_finder_terrain.normalize_influence(20)
+        self.clearance = ClearanceMap(_data > 0)
+
+        workers = self.knowledge.config["general"].getint("path_workers", fallback=0)
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            requests = self.knowledge.config["general"].getint("path_requests_per_frame", fallback=50)
+            self.path_service = PathService(self.path_finder_terrain, self.executor, requests)
 
     @property
     def overlord_spots(self) -> List[Point2]:
@@ -54,12 +90,75 @@ class PathingManager(ManagerBase):
         # TODO: cache this
         return points
 
+    def calculate_zones(self, zone_centers: List[Point2]):
+        self.zone_centers = zone_centers
+        self.map.calculate_zones(zone_centers)
+
+    def init_zone_graph(self):
+        """
+        Creates hierarchical zone graph for long range path queries.
+        This needs to be run after zones are calculated and the terrain has rocks and minerals set.
+        """
+        if not self.zone_centers:
+            return
+
+        self.zone_graph = ZoneGraph(self.path_finder_terrain, self.map.zone_grid(), self.zone_centers, self.map.chokes)
+        self._rocks = {rock.tag: (rock.position, rock.radius) for rock in self.ai.destructables}
+        self.print(f"Zone graph created with {len(self.zone_graph.nodes)} nodes.", log_level=logging.DEBUG)
+
+    def init_distance_table(self, points: List[Point2]):
+        """
+        Creates walk distance table between the key points of the map.
+        Distances consider terrain, rocks and minerals, but not buildings.
+        """
+        self.distance_table = WalkDistanceTable(self._terrain_pathable(), points)
+        self._rocks = {rock.tag: (rock.position, rock.radius) for rock in self.ai.destructables}
+
+    def add_distance_points(self, points: List[Point2]):
+        """ Adds new key points to the walk distance table. """
+        if self.distance_table:
+            self.distance_table.add_points(points)
+
+    def _terrain_pathable(self) -> np.ndarray:
+        """ Pathable cells of the terrain with rocks and minerals blocked. """
+        self.path_finder_terrain.reset()
+        self.path_finder_terrain.create_block([mf.position for mf in self.ai.mineral_field], (2, 1))
+        self.set_rocks(self.path_finder_terrain)
+        return np.array(self.path_finder_terrain.map) > 0
+
+    def _update_rocks(self):
+        """ Solves the walk distance table and the zone graph again if a destroyed rock opened up a new passage. """
+        if not self.distance_table and not self.zone_graph:
+            return
+
+        rocks = {rock.tag: (rock.position, rock.radius) for rock in self.ai.destructables}
+        destroyed = [self._rocks[tag] for tag in self._rocks.keys() - rocks.keys()]
+        self._rocks = rocks
+        if not destroyed:
+            return
+
+        pathable = self._terrain_pathable()
+        if any(blocks_passage(pathable, position, radius) for position, radius in destroyed):
+            if self.distance_table:
+                self.distance_table.rebuild(pathable)
+                self.print("Walk distance table updated after rocks were destroyed.", log_level=logging.DEBUG)
+            if self.zone_graph:
+                # Terrain path finder has only rocks and minerals blocked at this point
+                self.init_zone_graph()
+
     async def update(self):
+        self._update_rocks()
         await self.update_influence()
         self.found_points.clear()
         self.found_points_air.clear()
-
-    def set_rocks(self, grid: Union[sc2pathlib.PathFinder, Sc2Map]):
+        if self.path_service:
+            # Grid snapshot for the requests is taken after the influence and blocks are set
+            self.path_service.update()
+            time = self.ai.time
+            for key in [k for k, p in self._background_paths.items() if p.last_used + BACKGROUND_PATH_TIMEOUT < time]:
+                del self._background_paths[key]
+
+    def set_rocks(self, grid: Union[sc2pathlib.PathFinder, Sc2Map, ClearanceMap]):
         for rock in self.ai.destructables:  # type: Unit
             rock_type = rock.type_id
             if rock.name == "MineralField450":
@@ -110,6 +209,7 @@ class PathingManager(ManagerBase):
 
     async def update_influence(self):
         power = ExtendedPower(self.unit_values)
+        self._ground_influence = None
         self.path_finder_terrain.reset()  # Reset
         self.map.reset()  # Reset
         self.map.enable_colossus_map(
@@ -125,18 +225,23 @@ class PathingManager(ManagerBase):
 
         self.path_finder_terrain.create_block(positions, (2, 1))
         self.map.create_block(positions, (2, 1))
+        self.clearance.create_block(positions, (2, 1))
 
         self.set_rocks(self.path_finder_terrain)
         self.set_rocks(self.map)
+        self.set_rocks(self.clearance)
 
         for building in self.ai.structures + self.ai.enemy_structures:  # type: Unit
-            if building.type_id in buildings_2x2:
-                self.map.create_block(building.position, (2, 2))
-            elif building.type_id in buildings_3x3:
-                self.map.create_block(building.position, (3, 3))
-            elif building.type_id in buildings_5x5:
-                self.map.create_block(building.position, (5, 3))
-                self.map.create_block(building.position, (3, 5))
+            for grid in (self.map, self.clearance):
+                if building.type_id in buildings_2x2:
+                    grid.create_block(building.position, (2, 2))
+                elif building.type_id in buildings_3x3:
+                    grid.create_block(building.position, (3, 3))
+                elif building.type_id in buildings_5x5:
+                    grid.create_block(building.position, (5, 3))
+                    grid.create_block(building.position, (3, 5))
+
+        self.clearance.update()
 
         self.map.normalize_influence(20)
 
@@ -223,7 +328,11 @@ class PathingManager(ManagerBase):
     async def post_update(self):
         if self.debug:
             # TODO: Plot Air
-            self.map.plot_ground_map(self.found_points)
+            plotter = self.knowledge.debug_plotter
+            if plotter is not None:
+                plotter.capture(
+                    "ground_map", self.ai.state.game_loop, self._ground_map_snapshot, self._render_ground_map
+                )
             # self.path_finder_air.plot(self.found_points_air, "air_map")
             for spot in self.overlord_spots:
                 point = Point2(spot)
@@ -231,7 +340,38 @@ class PathingManager(ManagerBase):
                 point3 = Point3((point.x, point.y, z))
                 self.client.debug_box2_out(point3, 0.25)
 
-    def walk_distance(self, start: Point2, target: Point2) -> float:
+    def ground_influence(self) -> np.ndarray:
+        """ Ground influence of the map cells as [x][y] array, copied from the map once per influence update. """
+        if self._ground_influence is None:
+            self._ground_influence = np.array(self.map._map.ground_pathing)
+        return self._ground_influence
+
+    def _ground_map_snapshot(self) -> np.ndarray:
+        """ Ground pathing with the current influence, cells of the found paths are marked with -1. """
+        image = np.array(self.map._map.ground_pathing, dtype=np.int32)
+        for point in self.found_points:
+            image[point] = -1
+        return image
+
+    @staticmethod
+    def _render_ground_map(snapshot: np.ndarray) -> np.ndarray:
+        """ Influence is clipped to the image range and the found paths are drawn white. """
+        image = np.clip(snapshot, 0, 254).astype(np.uint8)
+        image[snapshot < 0] = 255
+        return image
+
+    def walk_distance(self, start: Point2, target: Point2, terrain_only: bool = False) -> float:
+        """
+        Walk distance between the points.
+
+        :param terrain_only: Use precomputed distances, the walk distance table for key points of the map and
+        zone graph estimates for long range distances. These only consider terrain, rocks and minerals, not buildings.
+        """
+        if terrain_only:
+            distance = self.terrain_distance(start, target)
+            if distance is not None:
+                return distance
+
         result = self.map.find_path(MapType.Ground, start, target)
         path = result[0]
 
@@ -239,10 +379,88 @@ class PathingManager(ManagerBase):
             return 1000  # No path
         return result[1]
 
-    def find_path(self, start: Point2, target: Point2, target_index: int = 20) -> Point2:
-        result = self.path_finder_terrain.find_path(start, target)
-        path = result[0]
+    def terrain_distance(self, start: Point2, target: Point2) -> Optional[float]:
+        """
+        Precomputed walk distance between the points, None when the points are not known to the walk distance table
+        and the zone graph can't estimate the distance.
+        """
+        if self.distance_table:
+            distance = self.distance_table.distance(start, target)
+            if distance is not None:
+                return distance
 
+        if self.zone_graph:
+            return self.zone_graph.distance(start, target)
+        return None
+
+    def find_path(self, start: Point2, target: Point2, target_index: int = 20) -> Point2:
+        """ Next move target on the path from start to target. """
+        result = None
+        if self.zone_graph:
+            # Long range path, only refine the segments needed to reach target index
+            result = self.zone_graph.find_path(start, target, target_index)
+        if result is None:
+            result = self.path_finder_terrain.find_path(start, target)
+        return self._path_target(result[0], start, target, target_index)
+
+    def request_path(self, start: Point2, target: Point2) -> Future:
+        """
+        Requests a path to be solved in the background, identical requests share the same search.
+        Result is available at the earliest on the next frame, use `path_target` to read it.
+        Without the path service the path is solved immediately.
+
+        :return: Future of the path request.
+        """
+        if self.path_service is None:
+            future = Future()
+            future.set_result(self.path_finder_terrain.find_path(start, target))
+            return future
+        return self.path_service.request(start, target)
+
+    def path_target(
+        self, request: Future, start: Point2, target: Point2, target_index: int = 20, wait: bool = False
+    ) -> Optional[Point2]:
+        """
+        Next move target from a path request, see `find_path`.
+
+        :param request: Future returned by `request_path`.
+        :param wait: Solve the path immediately if the result isn't ready yet.
+        :return: Move target, None when the result isn't ready and wait is false.
+        """
+        if request.done():
+            result = request.result()
+        elif wait:
+            result = self.path_service.result(request)
+        else:
+            return None
+        return self._path_target(result[0], start, target, target_index)
+
+    def find_path_background(self, start: Point2, target: Point2, target_index: int = 20) -> Point2:
+        """
+        Next move target on the path from start to target, see `find_path`.
+        A new path to the target is requested from the path service and the last solved path to the same target
+        is used while the start is close to the start of that path. Otherwise the path is solved immediately.
+        """
+        if self.path_service is None:
+            return self.find_path(start, target, target_index)
+
+        key = target.rounded
+        background = self._background_paths.get(key)
+        if background is None:
+            background = BackgroundPath()
+            self._background_paths[key] = background
+
+        background.last_used = self.ai.time
+        background.collect()
+        if background.request is None:
+            background.request = self.path_service.request(start, target)
+            background.request_start = start
+
+        if background.path is None or start.distance_to_point2(background.start) > BACKGROUND_PATH_DISTANCE:
+            return self.find_path(start, target, target_index)
+        return self._path_target(background.path, start, target, target_index)
+
+    def _path_target(self, path: List[Tuple[int, int]], start: Point2, target: Point2, target_index: int) -> Point2:
         if len(path) < 1:
             self.print(f"No path found from {start} to {target}", log_level=logging.DEBUG)
             return target
@@ -250,10 +468,74 @@ class PathingManager(ManagerBase):
         if len(path) <= target_index:
             return target
 
-        target = path[target_index]
         if self.debug:
             self.found_points.extend(path)
-        return Point2((target[0], target[1]))
+        return Point2(path[target_index])
+
+    def walk_distances_batch(self, starts: List[Point2], targets: List[Point2]) -> np.ndarray:
+        """
+        Walk distances for multiple start and target pairs, see `walk_distance`.
+        Identical queries are solved only once.
+
+        :return: Array of distances in the same order as the queries, 1000 when there is no path.
+        """
+        unique_starts, unique_targets, indices = self._unique_queries(starts, targets)
+        distances = self.map.walk_distances_batch(MapType.Ground, unique_starts, unique_targets, executor=self.executor)
+        distances[distances < 0] = 1000  # No path
+        return distances[indices]
+
+    def find_paths_batch(self, starts: List[Point2], targets: List[Point2], target_index: int = 20) -> List[Point2]:
+        """
+        Finds next move targets for multiple start and target pairs, see `find_path`.
+        Queries with start and target in the same `PATH_QUERY_WINDOW` sized windows share a single search,
+        queries that are closer to their target than the target index still move to their exact target.
+
+        :return: Move targets in the same order as the queries.
+        """
+        unique_starts, unique_targets, indices = self._unique_queries(starts, targets, PATH_QUERY_WINDOW)
+        exact_starts = np.asarray(starts, dtype=np.float64)
+        exact_targets = np.asarray(targets, dtype=np.float64)
+        results: List[Optional[Tuple[List[Tuple[int, int]], float]]] = [None] * len(unique_starts)
+        missing: List[int] = []
+
+        for i in range(0, len(unique_starts)):
+            if self.zone_graph:
+                results[i] = self.zone_graph.find_path(unique_starts[i], unique_targets[i], target_index)
+            if results[i] is None:
+                missing.append(i)
+
+        if missing:
+            solved = self.path_finder_terrain.find_paths_batch(
+                unique_starts[missing], unique_targets[missing], executor=self.executor
+            )
+            for i, result in zip(missing, solved):
+                results[i] = result
+
+        return [
+            self._path_target(results[index][0], Point2(exact_starts[i]), Point2(exact_targets[i]), target_index)
+            for i, index in enumerate(indices)
+        ]
+
+    @staticmethod
+    def _unique_queries(
+        starts: List[Point2], targets: List[Point2], window: float = 1
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Removes duplicate start and target pairs, pairs that round to the same windows are considered identical.
+        The first pair in each window is used for the search.
+
+        :return: Unique starts, unique targets and indices that map the unique results back to the queries.
+        """
+        assert len(starts) == len(targets)
+        queries = np.zeros((len(starts), 4), dtype=np.float64)
+        if len(starts) > 0:
+            queries[:, 0:2] = starts
+            queries[:, 2:4] = targets
+
+        keys = np.rint(queries / window)
+        _, unique_indices, indices = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        unique_queries = queries[unique_indices]
+        return unique_queries[:, 0:2], unique_queries[:, 2:4], indices.reshape(-1)
 
     def find_weak_influence_air(self, target: Point2, radius: float) -> Point2:
         pathing_result = self.map.lowest_influence_in_grid(MapType.Air, target, floor(radius))
@@ -265,6 +547,49 @@ class PathingManager(ManagerBase):
         pos = pathing_result[0]
         return Point2((pos[0], pos[1]))
 
+    def find_weak_influence_air_batch(self, targets: List[Point2], radius: Union[float, List[float]]) -> List[Point2]:
+        """
+        Finds low influence positions near multiple targets, see `find_weak_influence_air`.
+        Targets with the same radius share a single search when they are in the same window of half the radius.
+
+        :param radius: Search radius for all targets or one radius per target.
+        :return: Positions in the same order as the targets.
+        """
+        return self._solve_unique_points(targets, radius, self.find_weak_influence_air)
+
+    def find_weak_influence_ground_batch(
+        self, targets: List[Point2], radius: Union[float, List[float]], map_type: MapType = MapType.Ground
+    ) -> List[Point2]:
+        """
+        Finds low influence positions near multiple targets, see `find_weak_influence_ground`.
+        Targets with the same radius share a single search when they are in the same window of half the radius.
+
+        :param radius: Search radius for all targets or one radius per target.
+        :return: Positions in the same order as the targets.
+        """
+        return self._solve_unique_points(
+            targets, radius, lambda target, r: self.find_weak_influence_ground(target, r, map_type)
+        )
+
+    @staticmethod
+    def _solve_unique_points(
+        points: List[Point2], radius: Union[float, List[float]], solve: Callable[[Point2, float], Point2]
+    ) -> List[Point2]:
+        """ Solves each point and radius pair once per window of half the radius and maps the results to the queries. """
+        if len(points) == 0:
+            return []
+
+        radii = np.broadcast_to(np.asarray(radius, dtype=np.float64), (len(points),))
+        queries = np.zeros((len(points), 3), dtype=np.float64)
+        queries[:, 0:2] = points
+        queries[:, 2] = radii
+
+        windows = np.maximum(radii, 2) / 2
+        keys = np.column_stack((np.floor(queries[:, 0:2] / windows[:, None]), radii))
+        _, unique_indices, indices = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        results = [solve(Point2(points[i]), float(radii[i])) for i in unique_indices]
+        return [results[index] for index in indices.reshape(-1)]
+
     def find_weak_influence_ground_blink(self, target: Point2, radius: float) -> Point2:
         pathing_result = self.map.lowest_influence_in_grid(MapType.Ground, target, floor(radius))
         pos = pathing_result[0]
@@ -306,25 +631,90 @@ class PathingManager(ManagerBase):
         return Point2((target[0], target[1]))
 
     def find_low_inside_ground(
-        self, start: Point2, target: Point2, distance: float, map_type: MapType = MapType.Ground
+        self,
+        start: Point2,
+        target: Point2,
+        distance: float,
+        map_type: MapType = MapType.Ground,
+        radius: Optional[float] = None,
     ) -> Point2:
+        """
+        :param radius: Radius of the unit, the result is moved away from spots that are too tight for the unit.
+        """
         result = self.map.find_low_inside_walk(map_type, start, target, distance)
         result = result[0]  # strip distance
-        end_point = Point2((result[0], result[1]))
-        result_distance = target.distance_to_point2(end_point)
-
-        if result_distance > distance:
-            # Shorten result to be in range for the target
-            vector = end_point - target
-            normal_vector = point_normalize(vector)
-            end_point = normal_vector * distance + target
-
-        return end_point
+        return self._low_inside_result(Point2((result[0], result[1])), target, distance, radius)
 
     def find_low_inside_air(self, start: Point2, target: Point2, distance: float) -> Point2:
         result = self.map.find_low_inside_walk(MapType.Air, start, target, distance)
         result = result[0]  # strip distance
-        end_point = Point2((result[0], result[1]))
+        return self._low_inside_result(Point2((result[0], result[1])), target, distance)
+
+    def find_low_inside_ground_batch(
+        self,
+        starts: List[Point2],
+        targets: List[Point2],
+        distances: Union[float, List[float]],
+        map_type: MapType = MapType.Ground,
+        radius: Union[None, float, List[float]] = None,
+    ) -> List[Point2]:
+        """
+        Finds low influence positions in range of multiple targets, see `find_low_inside_ground`.
+        Queries with the same distance share a single search when their starts and targets are in the same windows
+        of half the distance, results are still shortened to be in range of each exact target.
+
+        :param distances: Distance for all queries or one distance per query.
+        :param radius: Unit radius for all queries or one radius per query.
+        :return: Positions in the same order as the queries.
+        """
+        return self._low_inside_batch(map_type, starts, targets, distances, radius)
+
+    def find_low_inside_air_batch(
+        self, starts: List[Point2], targets: List[Point2], distances: Union[float, List[float]]
+    ) -> List[Point2]:
+        """
+        Finds low influence positions in range of multiple targets, see `find_low_inside_air`.
+
+        :param distances: Distance for all queries or one distance per query.
+        :return: Positions in the same order as the queries.
+        """
+        return self._low_inside_batch(MapType.Air, starts, targets, distances)
+
+    def _low_inside_batch(
+        self,
+        map_type: MapType,
+        starts: List[Point2],
+        targets: List[Point2],
+        distances: Union[float, List[float]],
+        radius: Union[None, float, List[float]] = None,
+    ) -> List[Point2]:
+        assert len(starts) == len(targets)
+        if len(starts) == 0:
+            return []
+
+        distances = np.broadcast_to(np.asarray(distances, dtype=np.float64), (len(starts),))
+        radii = [radius] * len(starts) if radius is None or np.isscalar(radius) else radius
+        windows = np.maximum(distances, 2)[:, None] / 2
+        keys = np.zeros((len(starts), 5), dtype=np.float64)
+        keys[:, 0:2] = np.floor(np.asarray(starts, dtype=np.float64) / windows)
+        keys[:, 2:4] = np.floor(np.asarray(targets, dtype=np.float64) / windows)
+        keys[:, 4] = distances
+        _, unique_indices, indices = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+
+        found: List[Point2] = []
+        for i in unique_indices:
+            result = self.map.find_low_inside_walk(map_type, starts[i], targets[i], float(distances[i]))
+            result = result[0]  # strip distance
+            found.append(Point2((result[0], result[1])))
+
+        return [
+            self._low_inside_result(found[index], targets[i], float(distances[i]), radii[i])
+            for i, index in enumerate(indices.reshape(-1))
+        ]
+
+    def _low_inside_result(
+        self, end_point: Point2, target: Point2, distance: float, radius: Optional[float] = None
+    ) -> Point2:
         result_distance = target.distance_to_point2(end_point)
 
         if result_distance > distance:
@@ -333,4 +723,15 @@ class PathingManager(ManagerBase):
             normal_vector = point_normalize(vector)
             end_point = normal_vector * distance + target
 
+        if radius is not None and radius > NORMAL_UNIT_RADIUS and not self.clearance.is_clear(end_point, radius):
+            end_point = self.clearance.closest_clear(end_point, radius) or end_point
+
         return end_point
+
+    async def on_end(self, game_result: Result):
+        if self.path_service is not None:
+            self.path_service.shutdown()
+            self.path_service = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
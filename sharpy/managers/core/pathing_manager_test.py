@@ -0,0 +1,42 @@
+import numpy as np
+
+from sc2.position import Point2
+
+from .pathing_manager import PathingManager
+
+
+class TestPathingManager:
+    def test_overlapping_queries_are_solved_once(self):
+        solved = []
+
+        def solve(target: Point2, radius: float) -> Point2:
+            solved.append((target, radius))
+            return target.offset((radius, 0))
+
+        targets = [Point2((10.2, 10.7)), Point2((10.9, 10.1)), Point2((20.5, 10.5)), Point2((10.5, 10.5))]
+        results = PathingManager._solve_unique_points(targets, [4, 4, 4, 6], solve)
+
+        assert len(solved) == 3
+        assert results[0] == results[1]
+        nearby = PathingManager._solve_unique_points([Point2((10.2, 10.7)), Point2((11.5, 10.5))], 4, solve)
+        assert nearby == [results[0], results[0]]
+        assert results[2] == Point2((24.5, 10.5))
+        assert results[3] == Point2((16.5, 10.5))
+        assert PathingManager._solve_unique_points([], 4, solve) == []
+
+    def test_nearby_path_queries_share_window(self):
+        starts = [Point2((10.2, 10.4)), Point2((10.9, 10.8)), Point2((14.5, 10.5))]
+        targets = [Point2((50.1, 50)), Point2((50.8, 49.4)), Point2((50, 50))]
+        unique_starts, unique_targets, indices = PathingManager._unique_queries(starts, targets, 2)
+
+        assert len(unique_starts) == 2
+        assert indices.tolist() == [0, 0, 1]
+        assert tuple(unique_starts[0]) == (10.2, 10.4)
+        assert len(PathingManager._unique_queries(starts, targets)[0]) == 3
+
+    def test_ground_map_render_keeps_influence(self):
+        snapshot = np.array([[0, 20, 170], [300, -1, 20]], dtype=np.int32)
+        image = PathingManager._render_ground_map(snapshot)
+
+        assert image.dtype == np.uint8
+        assert image.tolist() == [[0, 20, 170], [254, 255, 20]]
@@ -1,11 +1,12 @@
 import numpy as np
 from typing import Dict, Union, Optional, List, Iterable, Tuple, Callable
 
+from sc2.constants import IS_COLLECTING
 from sc2.ids.effect_id import EffectId
 from scipy.spatial.ckdtree import cKDTree
 
 from sharpy.interfaces import IUnitCache
-from sharpy.managers.core.unit_value import race_townhalls
+from sharpy.managers.core.unit_value import race_townhalls, UnitValue
 from sc2.constants import FakeEffectID
 from sc2.game_state import EffectData
 from sc2.position import Point2
@@ -36,6 +37,8 @@ class UnitCacheManager(ManagerBase, IUnitCache):
         self._own_unit_cache: Dict[UnitTypeId, Units] = {}
         self._enemy_unit_cache: Dict[UnitTypeId, Units] = {}
         self.own_tree: Optional[cKDTree] = None
+        # Own units that are not flying, for finding what stealthed ground units can attack
+        self._own_ground_tree: Optional[cKDTree] = None
         self.enemy_tree: Optional[cKDTree] = None
         self.force_fields: List[EffectData] = []
 
@@ -44,6 +47,9 @@ class UnitCacheManager(ManagerBase, IUnitCache):
         self.own_numpy_vectors: List[np.ndarray] = []
         self.enemy_numpy_vectors: List[np.ndarray] = []
         self._mineral_fields: Dict[Point2, Unit] = {}
+        # Tags of own workers gathering from each resource or townhall, keyed by the target tag
+        self._workers_by_target: Dict[int, List[int]] = {}
+        self._worker_targets: Dict[int, int] = {}
 
         # Set this to false to provide cloaked units to zones and unit micro making use of enemy_in_range method.
         self.only_targetable_enemies_default: bool = True
@@ -69,6 +75,14 @@ class UnitCacheManager(ManagerBase, IUnitCache):
     def mineral_wall(self) -> Units:
         return self._mineral_wall
 
+    @property
+    def workers_by_target(self) -> Dict[int, List[int]]:
+        return self._workers_by_target
+
+    @property
+    def own_ground_tree(self) -> Optional[cKDTree]:
+        return self._own_ground_tree
+
     async def start(self, knowledge: "Knowledge"):
         await super().start(knowledge)
         self.all_own: Units = Units([], self.ai)
@@ -87,6 +101,14 @@ class UnitCacheManager(ManagerBase, IUnitCache):
                 units.append(unit)
         return units
 
+    def assign_worker(self, worker: Unit, target: Unit):
+        old_target = self._worker_targets.get(worker.tag, None)
+        if old_target is not None:
+            self._workers_by_target[old_target].remove(worker.tag)
+
+        self._worker_targets[worker.tag] = target.tag
+        self._workers_by_target.setdefault(target.tag, []).append(worker.tag)
+
     def effects(self, id: Union[UnitTypeId, EffectId]) -> List[Tuple[Point2, EffectData]]:
         if isinstance(id, UnitTypeId):
             return self._effects_cache[FakeEffectID.get(id.value)]
@@ -167,6 +189,7 @@ class UnitCacheManager(ManagerBase, IUnitCache):
 
         self.own_numpy_vectors = []
         self.enemy_numpy_vectors = []
+        own_ground_vectors = []
         self.all_own = self.ai.all_own_units
 
         for unit in self.all_own:
@@ -175,6 +198,8 @@ class UnitCacheManager(ManagerBase, IUnitCache):
                 self._own_unit_cache[unit.type_id] = units
             units.append(unit)
             self.own_numpy_vectors.append(np.array([unit.position.x, unit.position.y]))
+            if not unit.is_flying:
+                own_ground_vectors.append(self.own_numpy_vectors[-1])
 
         for unit in self.ai.all_enemy_units:
             if unit.is_memory:
@@ -195,6 +220,11 @@ class UnitCacheManager(ManagerBase, IUnitCache):
         else:
             self.own_tree = None
 
+        if len(own_ground_vectors) > 0:
+            self._own_ground_tree = cKDTree(own_ground_vectors)
+        else:
+            self._own_ground_tree = None
+
         if len(self.enemy_numpy_vectors) > 0:
             self.enemy_tree = cKDTree(self.enemy_numpy_vectors)
         else:
@@ -210,12 +240,25 @@ class UnitCacheManager(ManagerBase, IUnitCache):
                 self.force_fields.append(effect)
 
         self._enemy_workers = self.enemy([UnitTypeId.SCV, UnitTypeId.PROBE, UnitTypeId.DRONE])
+        self.update_worker_targets()
 
     async def post_update(self):
         if self.debug:
             for mf in self._mineral_wall:
                 self.debug_text_on_unit(mf, "WALL")
 
+    def update_worker_targets(self):
+        self._workers_by_target.clear()
+        self._worker_targets.clear()
+
+        for worker in self.own(UnitValue.worker_types):
+            if worker.orders:
+                # Last order is the one the worker returns to after returning cargo
+                order = worker.orders[-1]
+                if order.ability.id in IS_COLLECTING and isinstance(order.target, int):
+                    self._worker_targets[worker.tag] = order.target
+                    self._workers_by_target.setdefault(order.target, []).append(worker.tag)
+
     def update_minerals(self):
         self._mineral_fields.clear()
         self._mineral_wall.clear()
@@ -0,0 +1,98 @@
+from typing import List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from sc2.position import Point2
+from .manager_base import ManagerBase
+
+if TYPE_CHECKING:
+    from sharpy.knowledges import Knowledge
+    from sharpy.general.zone import Zone
+
+# Last seen time of cells that have never been visible
+NEVER_SEEN = -1
+
+
+class VisibilityManager(ManagerBase):
+    """
+    Keeps the last game time each map cell was visible.
+
+    Grid is indexed with [x][y] and updated once per frame from the visibility map of the game.
+    Points are rounded to cells the same way as in `BotAI.is_visible`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.last_seen: np.ndarray = np.zeros((0, 0), dtype=np.float64)
+        self.time: float = 0
+
+    async def start(self, knowledge: "Knowledge"):
+        await super().start(knowledge)
+        width, height = self.ai.game_info.map_size
+        self.last_seen = np.full((width, height), NEVER_SEEN, dtype=np.float64)
+
+    async def update(self):
+        self.time = self.ai.time
+        visible = self.ai.state.visibility.data_numpy.T == 2
+        self.last_seen[visible] = self.time
+
+    async def post_update(self):
+        pass
+
+    def _cells(self, points: List[Point2]):
+        cells = np.rint(np.array(points, dtype=np.float64).reshape(-1, 2)).astype(np.int32)
+        width, height = self.last_seen.shape
+        return np.clip(cells[:, 0], 0, width - 1), np.clip(cells[:, 1], 0, height - 1)
+
+    def last_seen_at(self, point: Point2) -> float:
+        """ Game time when the point was last visible, -1 if it has never been visible. """
+        return float(self.last_seen_batch([point])[0])
+
+    def last_seen_batch(self, points: List[Point2]) -> np.ndarray:
+        """ Game times when the points were last visible, -1 for points that have never been visible. """
+        if len(points) == 0:
+            return np.zeros(0, dtype=np.float64)
+        return self.last_seen[self._cells(points)]
+
+    def is_visible(self, point: Point2) -> bool:
+        return self.last_seen_at(point) == self.time
+
+    def is_visible_batch(self, points: List[Point2]) -> np.ndarray:
+        return self.last_seen_batch(points) == self.time
+
+    def seen_within(self, point: Point2, seconds: float) -> bool:
+        """ Was the point visible in the last seconds. """
+        return bool(self.seen_within_batch([point], seconds)[0])
+
+    def seen_within_batch(self, points: List[Point2], seconds: float) -> np.ndarray:
+        last_seen = self.last_seen_batch(points)
+        return (last_seen != NEVER_SEEN) & (self.time - last_seen <= seconds)
+
+    def is_area_visible(self, x: int, y: int, x2: int, y2: int) -> bool:
+        """ Are all cells from x, y to x2, y2 visible, end coordinates are exclusive. """
+        area = self.last_seen[max(0, x) : max(0, x2), max(0, y) : max(0, y2)]
+        return area.size > 0 and bool(np.all(area == self.time))
+
+    def oldest_cells(self, mask: np.ndarray, count: int = 1) -> List[Point2]:
+        """
+        Cells that have been visible longest time ago, cells that have never been visible first.
+
+        :param mask: Cells to consider as boolean [x][y] array.
+        :return: Cells as points that round to them, oldest first.
+        """
+        xs, ys = np.nonzero(mask)
+        if len(xs) == 0:
+            return []
+
+        last_seen = self.last_seen[xs, ys]
+        count = min(count, len(xs))
+        oldest = np.argpartition(last_seen, count - 1)[:count]
+        oldest = oldest[np.argsort(last_seen[oldest], kind="stable")]
+        return [Point2((xs[i], ys[i])) for i in oldest]
+
+    def oldest_in_zone(self, zone: "Zone", count: int = 1) -> List[Point2]:
+        """ Cells of the zone area that have been visible longest time ago. """
+        mask: Optional[np.ndarray] = self.zone_manager.zone_mask(zone)
+        if mask is None:
+            return []
+        return self.oldest_cells(mask, count)
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from sc2.position import Point2
+
+from .visibility_manager import VisibilityManager, NEVER_SEEN
+
+
+def create_manager(width: int = 8, height: int = 6) -> VisibilityManager:
+    manager = VisibilityManager()
+    manager.last_seen = np.full((width, height), NEVER_SEEN, dtype=np.float64)
+    manager.ai = SimpleNamespace(time=0, state=SimpleNamespace(visibility=SimpleNamespace(data_numpy=None)))
+    return manager
+
+
+def _set_visible(manager: VisibilityManager, time: float, cells):
+    width, height = manager.last_seen.shape
+    # Visibility map of the game is indexed with [y][x]
+    data = np.zeros((height, width), dtype=np.uint8)
+    for x, y in cells:
+        data[y, x] = 2
+    manager.ai.time = time
+    manager.ai.state.visibility.data_numpy = data
+
+
+async def update(manager: VisibilityManager, time: float, cells):
+    _set_visible(manager, time, cells)
+    await manager.update()
+
+
+class TestVisibilityManager:
+    @pytest.mark.asyncio
+    async def test_last_seen(self):
+        manager = create_manager()
+        await update(manager, 1, [(1, 1), (2, 1)])
+        await update(manager, 3, [(2, 1)])
+
+        points = [Point2((1.2, 0.8)), Point2((2, 1)), Point2((5, 5))]
+        assert manager.last_seen_batch(points).tolist() == [1, 3, NEVER_SEEN]
+        assert manager.is_visible_batch(points).tolist() == [False, True, False]
+        assert manager.seen_within_batch(points, 2).tolist() == [True, True, False]
+        assert not manager.seen_within(Point2((1, 1)), 1)
+        assert manager.last_seen_at(Point2((100, -5))) == NEVER_SEEN
+
+    @pytest.mark.asyncio
+    async def test_area_visible(self):
+        manager = create_manager()
+        await update(manager, 2, [(0, 0), (1, 0), (0, 1), (1, 1), (2, 2)])
+
+        assert manager.is_area_visible(0, 0, 2, 2)
+        assert not manager.is_area_visible(0, 0, 3, 3)
+        assert not manager.is_area_visible(5, 5, 5, 5)
+
+    @pytest.mark.asyncio
+    async def test_oldest_cells(self):
+        manager = create_manager()
+        await update(manager, 1, [(0, 0), (1, 0)])
+        await update(manager, 2, [(0, 0)])
+
+        mask = np.zeros(manager.last_seen.shape, dtype=bool)
+        mask[0:3, 0] = True
+        assert manager.oldest_cells(mask, 2) == [Point2((2, 0)), Point2((1, 0))]
+        assert manager.oldest_cells(mask, 10)[-1] == Point2((0, 0))
+        assert manager.oldest_cells(np.zeros_like(mask), 1) == []
@@ -1,7 +1,7 @@
 import enum
 import logging
 import sys
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
 
 import sc2pathlib
 from sc2.unit import Unit
@@ -11,12 +11,18 @@ from sharpy.interfaces import IZoneManager
 from sc2.game_info import Ramp
 from sc2.units import Units
 from sharpy.managers.core.pathing_manager import PathingManager
+from sharpy.managers.core.visibility_manager import VisibilityManager
 
 from sharpy.managers.core.manager_base import ManagerBase
 from sharpy.general.zone import Zone
+from sharpy.general.power_table import PowerTable
+from sharpy.general.zone_raster import ZoneRaster
+from sharpy.general.zone_tracker import ZoneTracker
 from sc2.position import Point2, Point3
 import numpy as np
 
+TView = TypeVar("TView")
+
 
 class MapName(enum.Enum):
     Example = -1
@@ -145,6 +151,21 @@ class ZoneManager(ManagerBase, IZoneManager):
         self.found_enemy_start: Optional[Point2] = None
         self._enemy_zones: List[Zone] = []
         self._our_zones: List[Zone] = []
+        # Zones in the order of the zone raster of the map
+        self._raster_zones: List[Zone] = []
+        self.zone_raster: Optional[ZoneRaster] = None
+        self.power_table: Optional[PowerTable] = None
+        self._own_tracker: Optional[ZoneTracker] = None
+        self._enemy_tracker: Optional[ZoneTracker] = None
+        self.visibility: Optional[VisibilityManager] = None
+        # All zones and possible start zones don't change after the zones are created
+        self._all_zones: List[Zone] = []
+        self._enemy_start_zones: List[Zone] = []
+        # Zone of each own and enemy unit by unit tag
+        self._unit_zones: Dict[int, Zone] = {}
+        # Views that are solved at most once per frame, cleared when zones are updated or sorted
+        self._views: Dict[str, object] = {}
+        self._views_frame: int = -1
 
     @property
     def expansion_zones(self) -> List[Zone]:
@@ -164,6 +185,7 @@ class ZoneManager(ManagerBase, IZoneManager):
         height_hash: int = np.sum(knowledge.ai.game_info.terrain_height.data_numpy)
         self.map = recognize_map(self.ai.game_info.map_name, height_hash)
         self.print(f"Map set to: {self.map} from name: {self.ai.game_info.map_name} and hash: {height_hash}.")
+        self.visibility = knowledge.get_manager(VisibilityManager)
         self.init_zones()
         self.set_pathing_zones()
 
@@ -174,7 +196,20 @@ class ZoneManager(ManagerBase, IZoneManager):
             expansion_locations_list = []
             for zone in self.zone_manager.expansion_zones:
                 expansion_locations_list.append(zone.center_location)
-            pather.map.calculate_zones(expansion_locations_list)
+            pather.calculate_zones(expansion_locations_list)
+
+            self._raster_zones = list(self.zone_manager.expansion_zones)
+            self.zone_raster = ZoneRaster(
+                pather.map.zone_grid(),
+                expansion_locations_list,
+                [zone.radius for zone in self._raster_zones],
+                [zone.height for zone in self._raster_zones],
+            )
+            full_rebuild = self.knowledge.config["general"].getboolean("zone_full_rebuild", fallback=False)
+            count = len(self._raster_zones)
+            self.power_table = PowerTable(self.unit_values)
+            self._own_tracker = ZoneTracker(self.zone_raster, count, self.power_table, full_rebuild)
+            self._enemy_tracker = ZoneTracker(self.zone_raster, count, self.power_table, full_rebuild)
 
     def init_zones(self):
         """Add expansion locations as zones."""
@@ -190,15 +225,38 @@ class ZoneManager(ManagerBase, IZoneManager):
                 self.zones[exp_loc].danger_radius += MAIN_ZONE_SIZE_CHANGES.get(self.map, 0)
 
         self._expansion_zones = list(self.zones.values())
+        self._all_zones = list(self.zones.values())
+        self._enemy_start_zones = [z for z in self._all_zones if z.is_start_location]
+        self.init_distance_table()
 
         self._sort_expansion_zones()
         self._zones_truly_sorted = self.enemy_start_location_found
         self.zone_sorted_by = self.enemy_start_location
 
+    def init_distance_table(self):
+        """ Precomputes walk distances between zone centers, ramps and gather points. """
+        pather = self.knowledge.get_manager(PathingManager)
+        if not pather:
+            return
+
+        points: List[Point2] = [self.ai.start_location]
+        points.extend(self.ai.enemy_start_locations)
+        for zone in self.zones.values():
+            points.append(zone.center_location)
+            points.append(zone.gather_point)
+            if zone.ramp is not None:
+                points.append(zone.ramp.top_center)
+                points.append(zone.ramp.bottom_center)
+        pather.init_distance_table(points)
+
     def _path_distance(self, start: Point2, end: Point2) -> float:
-        path = Path(self.knowledge.pathing_manager.path_finder_terrain.find_path(start, end))
-        if path.distance > 0:
-            return path.distance
+        distance = self.knowledge.pathing_manager.terrain_distance(start, end)
+        if distance is not None:
+            return distance
+
+        distance = self.knowledge.pathing_manager.path_finder_terrain.find_path(start, end)[1]
+        if distance > 0:
+            return distance
         return start.distance_to(end)  # Failsafe
 
     def _sort_expansion_zones(self):
@@ -265,6 +323,7 @@ class ZoneManager(ManagerBase, IZoneManager):
         for i in range(0, len(self._expansion_zones)):
             self._expansion_zones[i].zone_index = i
 
+        self._views.clear()
         self.adjust_zones()
         self.print("Zones sorted", stats=False, log_level=logging.DEBUG)
 
@@ -275,15 +334,31 @@ class ZoneManager(ManagerBase, IZoneManager):
 
     def init_zone_pathing(self):
         """ Init zone pathing. This needs to be run after all managers have properly started. """
+        self.knowledge.pathing_manager.init_zone_graph()
+        zone_graph = self.knowledge.pathing_manager.zone_graph
         pf: sc2pathlib.PathFinder = self.knowledge.pathing_manager.path_finder_terrain
+        # Stored paths are straightened into waypoints to keep the memory use of the path table low
+        pathable = np.array(pf.map) > 0
         zone_count = len(self._expansion_zones)
+        missing: List[Tuple[int, int]] = []
         for i in range(0, zone_count):
             for j in range(i + 1, zone_count):
-                path_data = pf.find_path(
-                    self._expansion_zones[i].center_location, self._expansion_zones[j].center_location
-                )
-                self._expansion_zones[i].paths[j] = Path(path_data)
-                self._expansion_zones[j].paths[i] = Path(path_data, True)
+                start = self._expansion_zones[i].center_location
+                end = self._expansion_zones[j].center_location
+                path_data = zone_graph.find_path(start, end) if zone_graph else None
+                if path_data is None:
+                    missing.append((i, j))
+                    continue
+                self._expansion_zones[i].paths[j] = Path(path_data, pathable=pathable)
+                self._expansion_zones[j].paths[i] = Path(path_data, True, pathable)
+
+        # Solve the paths that zone graph couldn't answer in a single batch
+        starts = [self._expansion_zones[i].center_location for i, _ in missing]
+        ends = [self._expansion_zones[j].center_location for _, j in missing]
+        results = pf.find_paths_batch(starts, ends, executor=self.knowledge.pathing_manager.executor)
+        for (i, j), path_data in zip(missing, results):
+            self._expansion_zones[i].paths[j] = Path(path_data, pathable=pathable)
+            self._expansion_zones[j].paths[i] = Path(path_data, True, pathable)
 
         for i in range(1, zone_count - 1):
             # Recalculate improved gather points based on pathing
@@ -297,7 +372,7 @@ class ZoneManager(ManagerBase, IZoneManager):
             # however if we need to go through 3rd to get to enemy base from 2nd, it totally should be.
             path = self._expansion_zones[2].paths.get(zone_count - 1)
             path_to_third = self._expansion_zones[2].paths.get(3)
-            last_path_index = len(path_to_third.path) - 1
+            last_path_index = len(path_to_third) - 1
 
             if path_to_third.get_index(last_path_index).distance_to_point2(path.get_index(last_path_index)) < 10:
                 if len(self.gather_points) > 2:
@@ -305,6 +380,8 @@ class ZoneManager(ManagerBase, IZoneManager):
                 else:
                     self.gather_points.append(2)
 
+        self.knowledge.pathing_manager.add_distance_points([zone.gather_point for zone in self._expansion_zones])
+
     def _solve_gather_points(self) -> List[int]:
         gather_points = [0, 1]
         last = 1
@@ -385,6 +462,8 @@ class ZoneManager(ManagerBase, IZoneManager):
 
         self.update_own_units_zones()
         self.update_enemy_units_zones()
+        self.update_last_scouted()
+        self._views.clear()
 
         for zone in self.zones.values():  # type: Zone
             zone.update()
@@ -392,6 +471,7 @@ class ZoneManager(ManagerBase, IZoneManager):
                 self._our_zones.append(zone)
             if zone.is_enemys:
                 self._enemy_zones.append(zone)
+        self._views.clear()
 
         if not self._zones_truly_sorted and self.enemy_start_location_found:
             self._zones_truly_sorted = True
@@ -401,138 +481,109 @@ class ZoneManager(ManagerBase, IZoneManager):
             self._sort_expansion_zones()
 
     def update_own_units_zones(self):
-        # Figure out all the zones the units are set in
-        tags_in_zones: Dict[int, List[int]] = {}
-
-        for zone in self._expansion_zones:
-            # Clear zones
-            zone.our_units.clear()
-
-        unknown_tags = set()
-
-        for unit in self.ai.all_own_units:
-            zone_index = self.pather.map.get_zone(unit.position) - 1
-            if zone_index < 0:
-                # No zone detected, what to do now?
-                unknown_tags.add(unit.tag)
-            else:
-                zone = self._expansion_zones[zone_index]
-                zone.our_units.append(unit)
-                tags_in_zones[unit.tag] = [zone_index]
-
-        for tag in unknown_tags:
-            # Create empty arrays for easy code later
-            tags_in_zones[tag] = []
-
-        for zone in self._expansion_zones:
-            units = self.cache.own_in_range(zone.center_location, zone.radius)
+        neutral = [zone.is_neutral for zone in self._raster_zones]
+        groups = self._own_tracker.update(self.ai.all_own_units, self.ai.get_terrain_height, neutral)
+        self._unit_zones.clear()
+        for zone, units, power in zip(self._raster_zones, groups, self._own_tracker.power):
+            zone.our_units = Units(units, self.ai)
+            zone.our_power.set_array(power)
             for unit in units:
-                if unit.tag in unknown_tags:
-                    # Registering zone here
-                    tags_in_zones[unit.tag].append(zone.zone_index)
-                    zone.our_units.append(unit)
-
-        for tag, zone_indices in tags_in_zones.items():
-            if len(zone_indices) > 1:
-                # the unit is registered in multiple zones, let's make it be in only one zone
-                unit = self.cache.by_tag(tag)
-                best_d: Optional[float] = None
-                best_index = None
-                for zone_index in zone_indices:
-                    zone = self._expansion_zones[zone_index]
-                    d = unit.distance_to(zone.center_location)
-                    # structures in the same zone are at the same height, units walking in ramps need also accounting
-                    height_difference = abs(zone.height - self.ai.get_terrain_height(unit))
-                    d += 10 * height_difference
-                    if zone.is_neutral:
-                        # We'll want to count units as being in relevant zones if possible
-                        d += 5
-
-                    if best_d is None or d < best_d:
-                        best_index = zone_index
-                        best_d = d
-
-                for zone_index in zone_indices:
-                    if zone_index != best_index:
-                        # Remove the unit from other zones
-                        self._expansion_zones[zone_index].our_units.remove(unit)
+                self._unit_zones[unit.tag] = zone
 
     def update_enemy_units_zones(self):
-        # Figure out all the zones the units are set in
-        tags_in_zones: Dict[int, List[int]] = {}
-
-        for zone in self._expansion_zones:
-            # Clear zones
-            zone.known_enemy_units.clear()
-
-        unknown_tags = set()
-
-        for unit in self.ai.all_enemy_units:
-            zone_index = self.pather.map.get_zone(unit.position) - 1
-            if zone_index < 0:
-                # No zone detected, what to do now?
-                unknown_tags.add(unit.tag)
-            else:
-                zone = self._expansion_zones[zone_index]
-                zone.known_enemy_units.append(unit)
-                tags_in_zones[unit.tag] = [zone_index]
-
-        for tag in unknown_tags:
-            # Create empty arrays for easy code later
-            tags_in_zones[tag] = []
-
-        for zone in self._expansion_zones:
-            units = self.cache.enemy_in_range(zone.center_location, zone.radius)
+        # Only add units that we can fight against
+        enemies = self.ai.all_enemy_units.filter(lambda x: x.cloak != 2)
+        neutral = [zone.is_neutral for zone in self._raster_zones]
+        groups = self._enemy_tracker.update(enemies, self.ai.get_terrain_height, neutral)
+        for zone, units, power in zip(self._raster_zones, groups, self._enemy_tracker.power):
+            zone.known_enemy_units = Units(units, self.ai)
+            zone.known_enemy_power.set_array(power)
             for unit in units:
-                if unit.tag in unknown_tags:
-                    # Registering zone here
-                    tags_in_zones[unit.tag].append(zone.zone_index)
-                    zone.known_enemy_units.append(unit)
-
-        for tag, zone_indices in tags_in_zones.items():
-            if len(zone_indices) > 1:
-                # the unit is registered in multiple zones, let's make it be in only one zone
-                unit = self.cache.by_tag(tag)
-                best_d: Optional[float] = None
-                best_index = None
-                for zone_index in zone_indices:
-                    zone = self._expansion_zones[zone_index]
-                    d = unit.distance_to(zone.center_location)
-                    # structures in the same zone are at the same height, units walking in ramps need also accounting
-                    height_difference = abs(zone.height - self.ai.get_terrain_height(unit))
-                    d += 10 * height_difference
-                    if zone.is_neutral:
-                        # We'll want to count units as being in relevant zones if possible
-                        d += 5
-
-                    if best_d is None or d < best_d:
-                        best_index = zone_index
-                        best_d = d
-
-                for zone_index in zone_indices:
-                    if zone_index != best_index:
-                        # Remove the unit from other zones
-                        self._expansion_zones[zone_index].known_enemy_units.remove(unit)
+                self._unit_zones[unit.tag] = zone
+        self._update_enemy_static_power(enemies, self._enemy_tracker.zone_indices)
+
+    def update_last_scouted(self):
+        zones: List[Zone] = list(self.zones.values())
+        if self.visibility is None:
+            for zone in zones:
+                if self.ai.is_visible(zone.center_location):
+                    zone.last_scouted_center = self.ai.time
+                if self.ai.is_visible(zone.mineral_line_center):
+                    zone.last_scouted_mineral_line = self.ai.time
+            return
+
+        points = [zone.center_location for zone in zones] + [zone.mineral_line_center for zone in zones]
+        visible = self.visibility.is_visible_batch(points).tolist()
+        for zone, center_visible, mineral_line_visible in zip(zones, visible[: len(zones)], visible[len(zones) :]):
+            if center_visible:
+                zone.last_scouted_center = self.ai.time
+            if mineral_line_visible:
+                zone.last_scouted_mineral_line = self.ai.time
+
+    def _update_enemy_static_power(self, enemies: Units, zone_indices: np.ndarray):
+        """ Sums the power of enemy static defenses for all zones at once. """
+        table = self.power_table
+        rows = table.rows(enemies)
+        ground = table.static_ground[rows]
+        air = table.static_air[rows]
+        static = np.flatnonzero(ground | air)
+
+        rows = rows[static]
+        factors = table.health_factors([enemies[i] for i in static])
+        zones = zone_indices[static]
+        count = len(self._raster_zones)
+        static_power = table.aggregate(rows, factors, zones, count)
+        ground_power = table.aggregate(rows, factors, np.where(ground[static], zones, -1), count)
+        air_power = table.aggregate(rows, factors, np.where(air[static], zones, -1), count)
+
+        for i, zone in enumerate(self._raster_zones):
+            zone.set_enemy_static_power(static_power[i], ground_power[i], air_power[i])
 
     # endregion
 
     # region Properties
 
+    def _view(self, name: str, solve: Callable[[], TView]) -> TView:
+        """
+        Returns a copy of the cached view, the view is solved at most once per frame and after zones have been updated.
+        """
+        game_loop = self.ai.state.game_loop
+        if self._views_frame != game_loop:
+            self._views_frame = game_loop
+            self._views.clear()
+
+        view = self._views.get(name, None)
+        if view is None:
+            view = solve()
+            self._views[name] = view
+        return view.copy()
+
+    @property
+    def raster_zones(self) -> List[Zone]:
+        """Returns zones in the order of the zone indices of `zone_raster`."""
+        return self._raster_zones
+
     @property
     def unscouted_zones(self) -> List[Zone]:
         """Returns a list of all zones that have not been scouted."""
-        unscouted = [z for z in self.all_zones if not z.is_scouted_at_least_once]
-        return unscouted
+        return self._view("unscouted_zones", lambda: [z for z in self._all_zones if not z.is_scouted_at_least_once])
 
     @property
     def known_enemy_structures_at_start_height(self) -> Units:
         """Returns known enemy structures that are at the height of start locations."""
-        any_start_location = self.ai.enemy_start_locations[0]
-        start_location_height = self.ai.get_terrain_height(any_start_location)
+        return self._view("known_enemy_structures_at_start_height", self._solve_enemy_structures_at_start_height)
 
-        return self.ai.enemy_structures.filter(
-            lambda structure: self.ai.get_terrain_height(structure) == start_location_height
-        )
+    def _solve_enemy_structures_at_start_height(self) -> Units:
+        structures = self.ai.enemy_structures
+        if not structures:
+            return structures
+
+        heights = self.ai.game_info.terrain_height.data_numpy
+        start = self.ai.enemy_start_locations[0].rounded
+        # Positions are rounded the same way as in get_terrain_height
+        cells = np.round(np.array([structure.position for structure in structures])).astype(int)
+        at_start_height = heights[cells[:, 1], cells[:, 0]] == heights[start[1], start[0]]
+        return structures.subgroup(structure for structure, keep in zip(structures, at_start_height) if keep)
 
     @property
     def enemy_start_location_found(self) -> bool:
@@ -607,37 +658,40 @@ class ZoneManager(ManagerBase, IZoneManager):
     @property
     def enemy_expansion_zones(self) -> List[Zone]:
         """Returns enemy expansions zones, sorted by closest to the enemy main zone first."""
-        return list(reversed(self._expansion_zones))
+        return self._view("enemy_expansion_zones", lambda: self._expansion_zones[::-1])
 
     @property
     def all_zones(self) -> List[Zone]:
         """Returns a list of all zones."""
-        zones = list(self.zones.values())
-        return zones
+        return list(self._all_zones)
 
     @property
     def enemy_start_zones(self) -> List[Zone]:
         """Returns all zones that are possible enemy start locations."""
-        filtered = [z for z in self.all_zones if z.is_start_location]
-        return filtered
+        return list(self._enemy_start_zones)
 
     @property
     def scouted_enemy_start_zones(self) -> List[Zone]:
         """returns possible enemy start zones that have been scouted."""
-        scouted = [z for z in self.enemy_start_zones if z.is_scouted_at_least_once]
-        return scouted
+        return self._view(
+            "scouted_enemy_start_zones",
+            lambda: [z for z in self._enemy_start_zones if z.is_scouted_at_least_once],
+        )
 
     @property
     def unscouted_enemy_start_zones(self) -> List[Zone]:
         """Returns possible enemy start zones that have not been scouted. Similar to unscouted_enemy_start_locations."""
-        unscouted = [z for z in self.enemy_start_zones if not z.is_scouted_at_least_once]
-        return unscouted
+        return self._view(
+            "unscouted_enemy_start_zones",
+            lambda: [z for z in self._enemy_start_zones if not z.is_scouted_at_least_once],
+        )
 
     @property
     def our_zones_with_minerals(self) -> List[Zone]:
         """Returns all of our zones that have minerals."""
-        filtered = filter(lambda z: z.our_townhall and z.has_minerals, self.our_zones)
-        return list(filtered)
+        return self._view(
+            "our_zones_with_minerals", lambda: [z for z in self.our_zones if z.our_townhall and z.has_minerals]
+        )
 
     @property
     def own_main_zone(self) -> Zone:
@@ -705,13 +759,11 @@ class ZoneManager(ManagerBase, IZoneManager):
                     client.debug_sphere_out(position, 1, Point3((200, 200, 0)))
 
     # endregion
+    def zone_mask(self, zone: Zone) -> Optional[np.ndarray]:
+        """ Cells of the zone area as boolean [x][y] array, None if the zone has no area. """
+        if self.zone_raster is None or zone not in self._raster_zones:
+            return None
+        return self.zone_raster.grid == self._raster_zones.index(zone)
+
     def zone_for_unit(self, building: Unit) -> Optional[Zone]:
-        if building.is_mine:
-            for zone in self._expansion_zones:
-                if zone.our_units.find_by_tag(building.tag):
-                    return zone
-        else:
-            for zone in self._expansion_zones:
-                if zone.known_enemy_units.find_by_tag(building.tag):
-                    return zone
-        return None
+        return self._unit_zones.get(building.tag, None)
@@ -1,73 +1,99 @@
 import math
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
 
-import sc2
-from sharpy.general.extended_power import ExtendedPower
 from sharpy.interfaces import IUnitCache, IUnitValues
 from sharpy.managers.core import ManagerBase
-from sharpy.managers.core import UnitCacheManager
+from sharpy.managers.core import VisibilityManager
 from sharpy.tools import IntervalFunc
 from sc2.pixel_map import PixelMap
 from sc2.position import Point2
-from sc2.unit import Unit
 
+if TYPE_CHECKING:
+    from sharpy.general.zone import Zone
+    from sharpy.knowledges import Knowledge
+    from sharpy.managers.core import ZoneManager
+
+# Default size of heat map slots in map cells
 SLOT_SIZE = 5
 
 
 class HeatArea:
-    def __init__(self, knowledge: "Knowledge", x: int, y: int, x2: int, y2: int):
-        self.ai = knowledge.ai
-        self.knowledge = knowledge
+    """ View to a single slot of the heat map. """
+
+    def __init__(self, heat_map: "HeatMapManager", slot_x: int, slot_y: int, x: int, y: int, x2: int, y2: int):
+        self.heat_map = heat_map
+        self.slot_x = slot_x
+        self.slot_y = slot_y
         self.bottom_left_x = x
         self.bottom_left_y = y
         self.top_right_x = x2
         self.top_right_y = y2
         self.center = Point2(((x + x2) / 2.0, (y + y2) / 2.0))
-        self._x, self._y = self.center.rounded
-        self.zone: Optional["Zone"] = None
-        self.heat: float = 0
-        self.stealth_heat: float = 0
-        self.last_enemy_power = ExtendedPower(knowledge.unit_values)
-        zone_manager = knowledge.zone_manager
 
-        d2 = 15
-        for zone in zone_manager.expansion_zones:
-            if zone.center_location.distance_to(self.center) < d2:
-                if self.ai.get_terrain_height(zone.center_location) == self.ai.get_terrain_height(self.center):
-                    # if zone == self.zone_manager.own_main_zone:
-                    #     print("MAIN ZONE")
-                    self.zone = zone
-
-    def update(self, time_change: float):
-        if self.stealth_heat > 0:
-            self.stealth_heat = min(2, max(0, (self.stealth_heat - time_change) * (1 - time_change * 0.5)))
-
-        if self.heat > 0:
-            if self.is_visible():
-                self.heat = max(0, (self.heat - time_change * 0.02) * (1 - time_change * 0.5))
-            else:
-                self.heat = max(0, (self.heat - time_change * 0.01) * (1 - time_change * 0.25))
-
-        self.heat += self.last_enemy_power.power * time_change
-        self.last_enemy_power.clear()
+    @property
+    def zone(self) -> Optional["Zone"]:
+        index = self.heat_map.slot_zones[self.slot_x, self.slot_y]
+        return self.heat_map.zones[index] if index >= 0 else None
+
+    @property
+    def heat(self) -> float:
+        return float(self.heat_map.heat[self.slot_x, self.slot_y])
+
+    @heat.setter
+    def heat(self, value: float):
+        self.heat_map.heat[self.slot_x, self.slot_y] = value
+        self.heat_map.heat_changed()
+
+    @property
+    def stealth_heat(self) -> float:
+        return float(self.heat_map.stealth_heat[self.slot_x, self.slot_y])
+
+    @stealth_heat.setter
+    def stealth_heat(self, value: float):
+        self.heat_map.stealth_heat[self.slot_x, self.slot_y] = value
 
     def is_visible(self) -> bool:
-        # TODO: Check all corners?
-        return self.ai.state.visibility.data_numpy[self._y, self._x] == 2
+        return self.heat_map.visible_fraction[self.slot_x, self.slot_y] >= 1
 
 
 class HeatMapManager(ManagerBase):
+    """
+    Keeps track of where enemy units have been seen recently.
+
+    Map is divided into square slots and the heat of each slot is stored in [x][y] arrays.
+    Heat decays faster in the parts of the slot that are visible.
+    Heat sums over rectangles and zones are answered from a summed-area table and per zone totals.
+    """
+
     cache: IUnitCache
     unit_values: IUnitValues
     updater: IntervalFunc
 
-    def __init__(self) -> None:
+    def __init__(self, slot_size: Optional[int] = None) -> None:
+        """
+        :param slot_size: Size of heat map slots in map cells, defaults to `heat_map_slot_size` setting.
+        """
         super().__init__()
+        self.slot_size = slot_size
+        self.visibility: Optional[VisibilityManager] = None
+        self.zones: List["Zone"] = []
+        self.heat = np.zeros((0, 0), dtype=np.float64)
+        self.stealth_heat = np.zeros((0, 0), dtype=np.float64)
+        # Part of the cells in each slot that are visible
+        self.visible_fraction = np.zeros((0, 0), dtype=np.float64)
+        # Index of the zone in `zones` that each slot belongs to, -1 for no zone
+        self.slot_zones = np.zeros((0, 0), dtype=np.int16)
+        # Summed-area table of heat with a leading row and column of zeros, solved when needed
+        self._heat_integral: Optional[np.ndarray] = None
+        self._zone_heat: Optional[np.ndarray] = None
 
     async def start(self, knowledge: "Knowledge"):
         await super().start(knowledge)
         self.updater = IntervalFunc(knowledge.ai, self.__real_update, 0.5)
         self.cache = knowledge.get_required_manager(IUnitCache)
+        self.visibility = knowledge.get_manager(VisibilityManager)
         self.init_heat_map(knowledge)
 
     def init_heat_map(self, knowledge: "Knowledge"):
@@ -75,17 +101,70 @@ class HeatMapManager(ManagerBase):
         height = grid.height
         width = grid.width
 
-        self.slots_w = int(math.ceil(width / SLOT_SIZE))
-        self.slots_h = int(math.ceil(height / SLOT_SIZE))
+        if self.slot_size is None:
+            self.slot_size = knowledge.config["general"].getint("heat_map_slot_size", fallback=SLOT_SIZE)
+        size = self.slot_size
+        self.slots_w = int(math.ceil(width / size))
+        self.slots_h = int(math.ceil(height / size))
+        shape = (self.slots_w, self.slots_h)
+        self.heat = np.zeros(shape, dtype=np.float64)
+        self.stealth_heat = np.zeros(shape, dtype=np.float64)
+        self.visible_fraction = np.zeros(shape, dtype=np.float64)
+        self._heat_integral = None
+        self._zone_heat = None
+        # Number of map cells in each slot
+        self._slot_cells = self._slot_sums(np.ones((width, height), dtype=np.float64))
+
         self.heat_areas: List[HeatArea] = []
         for y in range(0, self.slots_h):
             for x in range(0, self.slots_w):
-                x2 = min(x * SLOT_SIZE + SLOT_SIZE, width - 1)
-                y2 = min(y * SLOT_SIZE + SLOT_SIZE, height - 1)
-                self.heat_areas.append(HeatArea(knowledge, x * SLOT_SIZE, y * SLOT_SIZE, x2, y2))
+                x2 = min(x * size + size, width - 1)
+                y2 = min(y * size + size, height - 1)
+                self.heat_areas.append(HeatArea(self, x, y, x * size, y * size, x2, y2))
+
+        self._solve_slot_zones(knowledge.zone_manager)
         self.last_update = 0
         self.last_quick_update = 0
 
+    def _solve_slot_zones(self, zone_manager: "ZoneManager"):
+        """ Assigns each slot to the zone that its center is in, or the closest zone in range at the same height. """
+        centers = np.array([area.center for area in self.heat_areas], dtype=np.float64).reshape(-1, 2)
+        raster = zone_manager.zone_raster
+
+        if raster is None:
+            self.zones = list(zone_manager.expansion_zones)
+            indices = np.array([self._find_slot_zone(Point2(center)) for center in centers], dtype=np.int16)
+        else:
+            self.zones = zone_manager.raster_zones
+            indices = raster.zone_indices(centers)
+            unzoned = np.flatnonzero(indices < 0)
+            if len(unzoned) > 0:
+                # Terrain height is indexed with [y][x] and rounded the same way as in get_terrain_height
+                cells = np.rint(centers[unzoned]).astype(np.int32)
+                heights = np.asarray(self.ai.game_info.terrain_height.data_numpy)[cells[:, 1], cells[:, 0]]
+                neutral = np.zeros(len(self.zones), dtype=bool)
+                indices[unzoned] = raster.closest_zones(centers[unzoned], heights, neutral)
+
+        self._zone_indices: Dict["Zone", int] = {zone: i for i, zone in enumerate(self.zones)}
+        # Slots are listed in row order
+        self.slot_zones = indices.reshape(self.slots_h, self.slots_w).T.copy()
+
+    def _find_slot_zone(self, center: Point2) -> int:
+        found = -1
+        d2 = 15
+        for i, zone in enumerate(self.zones):
+            if zone.center_location.distance_to(center) < d2:
+                if self.ai.get_terrain_height(zone.center_location) == self.ai.get_terrain_height(center):
+                    found = i
+        return found
+
+    def _slot_sums(self, grid: np.ndarray) -> np.ndarray:
+        """ Sums the values of an [x][y] map grid over each slot. """
+        size = self.slot_size
+        padded = np.zeros((self.slots_w * size, self.slots_h * size), dtype=grid.dtype)
+        padded[: grid.shape[0], : grid.shape[1]] = grid
+        return padded.reshape(self.slots_w, size, self.slots_h, size).sum(axis=(1, 3))
+
     async def update(self):
         self.__stealth_update()
         self.updater.execute()
@@ -95,52 +174,117 @@ class HeatMapManager(ManagerBase):
 
     def __stealth_update(self):
         time_change = self.ai.time - self.last_quick_update
+        ground_tree = self.cache.own_ground_tree
+        if ground_tree is None:
+            return
+
+        stealthed = [unit.position_tuple for unit in self.ai.all_enemy_units if unit.is_cloaked or unit.is_burrowed]
+        if not stealthed:
+            return
+
+        positions = np.array(stealthed, dtype=np.float64)
+        # Only add to stealth heat if we have a ground unit or building nearby
+        # Stealthed units cannot attack air
+        own_close = ground_tree.query_ball_point(positions, 12, return_length=True) > 0
+        slot_x, slot_y = self.slots(positions[own_close])
+        np.add.at(self.stealth_heat, (slot_x, slot_y), 1 * time_change)
 
-        for unit in self.ai.all_enemy_units:  # type: Unit
-            if unit.is_cloaked or unit.is_burrowed:
-                own_close = self.cache.own_in_range(unit.position, 12).not_flying
-                area = self.get_zone(unit.position)
-                if own_close:
-                    # Only add to stealth heat if we have a ground unit or building nearby
-                    # Stealthed units cannot attack air
-                    area.stealth_heat += 1 * time_change
+    def slots(self, positions: List[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """ Slot indices of the positions as x and y index arrays. """
+        cells = np.floor(np.array(positions, dtype=np.float64).reshape(-1, 2) / self.slot_size).astype(np.int32)
+        return np.clip(cells[:, 0], 0, self.slots_w - 1), np.clip(cells[:, 1], 0, self.slots_h - 1)
 
     def get_zone(self, position: Point2) -> HeatArea:
-        x_int = min(self.slots_w, max(0, math.floor(position.x / SLOT_SIZE)))
-        y_int = min(self.slots_h, max(0, math.floor(position.y / SLOT_SIZE)))
-        return self.heat_areas[x_int + y_int * self.slots_w]
+        slot_x, slot_y = self.slots([position])
+        return self.heat_areas[slot_x[0] + slot_y[0] * self.slots_w]
+
+    def _update_visible_fraction(self):
+        if self.visibility is not None:
+            visible = self.visibility.last_seen == self.visibility.time
+        else:
+            visible = self.ai.state.visibility.data_numpy.T == 2
+        self.visible_fraction = self._slot_sums(visible.astype(np.float64)) / self._slot_cells
 
     def __real_update(self):
         time_change = self.ai.time - self.last_update
         self.last_update = self.ai.time
 
-        for unit in self.ai.enemy_units:
-            area = self.get_zone(unit.position)
-            area.last_enemy_power.add_unit(unit)
+        enemies = self.ai.enemy_units
+        enemy_power = np.zeros(self.heat.shape, dtype=np.float64)
+        if enemies:
+            slot_x, slot_y = self.slots([unit.position_tuple for unit in enemies])
+            powers = np.array([self.unit_values.power(unit) for unit in enemies], dtype=np.float64)
+            np.add.at(enemy_power, (slot_x, slot_y), powers)
+
+        self._update_visible_fraction()
+        self.decay(time_change)
+        self.heat += enemy_power * time_change
+        self.heat_changed()
+
+    def heat_changed(self):
+        """ Call after modifying `heat` directly, clears the sums solved from it. """
+        self._heat_integral = None
+        self._zone_heat = None
+
+    @property
+    def heat_integral(self) -> np.ndarray:
+        if self._heat_integral is None:
+            integral = np.zeros((self.slots_w + 1, self.slots_h + 1), dtype=np.float64)
+            np.cumsum(np.cumsum(self.heat, axis=0), axis=1, out=integral[1:, 1:])
+            self._heat_integral = integral
+        return self._heat_integral
 
-        for zone in self.heat_areas:
-            zone.update(time_change)
+    def rect_heat(self, x: float, y: float, x2: float, y2: float) -> float:
+        """ Total heat of the slots that overlap the map rectangle from x, y to x2, y2. """
+        size = self.slot_size
+        sx = min(self.slots_w, max(0, math.floor(x / size)))
+        sy = min(self.slots_h, max(0, math.floor(y / size)))
+        sx2 = min(self.slots_w, max(sx, math.ceil(x2 / size)))
+        sy2 = min(self.slots_h, max(sy, math.ceil(y2 / size)))
+        integral = self.heat_integral
+        return float(integral[sx2, sy2] - integral[sx, sy2] - integral[sx2, sy] + integral[sx, sy])
+
+    def zone_heat(self, zone: "Zone") -> float:
+        """ Total heat of the slots in the zone. """
+        if self._zone_heat is None:
+            assigned = self.slot_zones >= 0
+            self._zone_heat = np.bincount(
+                self.slot_zones[assigned], weights=self.heat[assigned], minlength=len(self.zones)
+            )
+        index = self._zone_indices.get(zone, None)
+        return 0 if index is None else float(self._zone_heat[index])
+
+    def decay(self, time_change: float):
+        stealth = np.clip((self.stealth_heat - time_change) * (1 - time_change * 0.5), 0, 2)
+        self.stealth_heat = np.where(self.stealth_heat > 0, stealth, self.stealth_heat)
+
+        visible = np.maximum(0, (self.heat - time_change * 0.02) * (1 - time_change * 0.5))
+        hidden = np.maximum(0, (self.heat - time_change * 0.01) * (1 - time_change * 0.25))
+        decayed = self.visible_fraction * visible + (1 - self.visible_fraction) * hidden
+        self.heat = np.where(self.heat > 0, decayed, self.heat)
+        self.heat_changed()
+
+    def _hotspot(self, values: np.ndarray) -> Optional[Tuple[int, int]]:
+        """ Slot with the highest positive value, first one in row order on ties. """
+        y, x = np.unravel_index(np.argmax(values.T), (self.slots_h, self.slots_w))
+        if values[x, y] <= 0:
+            return None
+        return int(x), int(y)
+
+    def _center(self, slot: Tuple[int, int]) -> Point2:
+        return self.heat_areas[slot[0] + slot[1] * self.slots_w].center
 
     def get_stealth_hotspot(self) -> Optional[Tuple[Point2, float]]:
-        top_heat_position: Point2 = None
-        top_value = 0
-        for heat_area in self.heat_areas:
-            if heat_area.stealth_heat > top_value:
-                top_heat_position = heat_area.center
-                top_value = heat_area.stealth_heat
-
-        if top_heat_position is None:
+        slot = self._hotspot(self.stealth_heat)
+        if slot is None:
             return None
 
-        return top_heat_position, top_value
+        return self._center(slot), float(self.stealth_heat[slot])
 
     def get_zones_hotspot(self, zones: List["Zone"]) -> Optional[Point2]:
-        top_heat_area = None
-        top_value = 0
-        for heat_area in self.heat_areas:
-            value = heat_area.heat
-            if heat_area.zone in zones and value > 0 and (top_heat_area is None or value > top_value):
-                top_value = value
-                top_heat_area = heat_area
-
-        return top_heat_area
+        indices = [self._zone_indices[zone] for zone in zones if zone in self._zone_indices]
+        slot = self._hotspot(np.where(np.isin(self.slot_zones, indices), self.heat, 0))
+        if slot is None:
+            return None
+
+        return self._center(slot)
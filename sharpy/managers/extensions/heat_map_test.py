@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from scipy.spatial.ckdtree import cKDTree
+
+from sc2.position import Point2
+
+from sharpy.general.zone_raster_test import create_raster, CENTERS
+from .heat_map import HeatMapManager, SLOT_SIZE
+
+
+class MockZone:
+    def __init__(self, center_location: Point2):
+        self.center_location = center_location
+
+
+def create_heat_map(
+    width: int = 22, height: int = 12, zones=(), raster=None, slot_size: int = SLOT_SIZE
+) -> HeatMapManager:
+    heat_map = HeatMapManager(slot_size)
+    game_info = SimpleNamespace(
+        placement_grid=SimpleNamespace(width=width, height=height),
+        terrain_height=SimpleNamespace(data_numpy=np.full((height, width), 10)),
+    )
+    heat_map.ai = SimpleNamespace(_game_info=game_info, game_info=game_info, get_terrain_height=lambda position: 10)
+    zone_manager = SimpleNamespace(expansion_zones=list(zones), raster_zones=list(zones), zone_raster=raster)
+    heat_map.init_heat_map(SimpleNamespace(ai=heat_map.ai, zone_manager=zone_manager))
+    return heat_map
+
+
+class TestHeatMapManager:
+    def test_slots(self):
+        heat_map = create_heat_map()
+
+        assert heat_map.heat.shape == (5, 3)
+        slot_x, slot_y = heat_map.slots([(0, 0), (12.5, 7), (30, -4)])
+        assert slot_x.tolist() == [0, 2, 4]
+        assert slot_y.tolist() == [0, 1, 0]
+
+        area = heat_map.get_zone(Point2((12.5, 7)))
+        area.heat = 3
+        assert heat_map.heat[2, 1] == 3
+        assert area.center == Point2((12.5, 7.5))
+
+    def test_decay(self):
+        heat_map = create_heat_map()
+        heat_map.heat[:] = 10
+        heat_map.visible_fraction[0, 0] = 1
+        heat_map.visible_fraction[1, 0] = 0.5
+
+        heat_map.decay(1)
+
+        visible = (10 - 0.02) * 0.5
+        hidden = (10 - 0.01) * 0.75
+        assert heat_map.heat[0, 0] == visible
+        assert heat_map.heat[1, 0] == 0.5 * visible + 0.5 * hidden
+        assert heat_map.heat[2, 0] == hidden
+        assert heat_map.get_zone(Point2((1, 1))).is_visible()
+
+    def test_hotspots(self):
+        zone = MockZone(Point2((2, 2)))
+        heat_map = create_heat_map(zones=[zone])
+
+        assert heat_map.get_stealth_hotspot() is None
+        assert heat_map.get_zones_hotspot([zone]) is None
+
+        heat_map.stealth_heat[3, 2] = 1.5
+        assert heat_map.get_stealth_hotspot() == (Point2((3.5 * SLOT_SIZE, 10.5)), 1.5)
+
+        heat_map.heat[4, 2] = 20
+        heat_map.heat[1, 1] = 5
+        assert heat_map.get_zone(Point2((6, 6))).zone is zone
+        assert heat_map.get_zones_hotspot([zone]) == Point2((7.5, 7.5))
+        assert np.count_nonzero(heat_map.slot_zones >= 0) == 9
+
+    def test_zones_from_raster(self):
+        zones = [MockZone(center) for center in CENTERS]
+        heat_map = create_heat_map(80, 50, zones, create_raster(), slot_size=10)
+
+        # Slot centers inside zone areas belong to the zone, others to the closest zone in range
+        assert heat_map.slot_zones.shape == (8, 5)
+        assert heat_map.slot_zones[1, 1] == 0
+        assert heat_map.slot_zones[5, 2] == 1
+        assert heat_map.slot_zones[4, 3] == 2
+        assert heat_map.slot_zones[0, 4] == -1
+        assert heat_map.get_zone(Point2((20, 20))).zone is zones[0]
+
+    def test_heat_sums(self):
+        zones = [MockZone(center) for center in CENTERS]
+        heat_map = create_heat_map(80, 50, zones, create_raster(), slot_size=10)
+        heat_map.heat[1, 1] = 2
+        heat_map.heat[2, 1] = 3
+        heat_map.heat[5, 2] = 4
+        heat_map.heat_changed()
+
+        assert heat_map.rect_heat(0, 0, 80, 50) == 9
+        assert heat_map.rect_heat(15, 15, 25, 20) == 5
+        assert heat_map.rect_heat(10, 10, 20, 20) == 2
+        assert heat_map.rect_heat(-10, -10, 5, 5) == 0
+        assert heat_map.zone_heat(zones[0]) == heat_map.heat[heat_map.slot_zones == 0].sum()
+        assert heat_map.zone_heat(zones[1]) == 4
+
+        heat_map.get_zone(Point2((55, 25))).heat = 1
+        assert heat_map.zone_heat(zones[1]) == 1
+        assert heat_map.rect_heat(0, 0, 80, 50) == 6
+
+    @pytest.mark.asyncio
+    async def test_stealth_heat_near_own_ground_units(self):
+        heat_map = create_heat_map()
+        heat_map.updater = SimpleNamespace(execute=lambda: None)
+        heat_map.cache = SimpleNamespace(own_ground_tree=cKDTree([(3, 3), (4, 3)]))
+        heat_map.ai.time = 2
+        heat_map.ai.all_enemy_units = [
+            SimpleNamespace(position_tuple=(10, 3), is_cloaked=True, is_burrowed=False),
+            SimpleNamespace(position_tuple=(11, 4), is_cloaked=False, is_burrowed=True),
+            SimpleNamespace(position_tuple=(6, 3), is_cloaked=False, is_burrowed=False),
+            SimpleNamespace(position_tuple=(20, 10), is_cloaked=True, is_burrowed=False),
+        ]
+
+        await heat_map.update()
+
+        assert heat_map.stealth_heat[2, 0] == 4
+        assert np.count_nonzero(heat_map.stealth_heat) == 1
+        assert heat_map.get_stealth_hotspot() == (Point2((12.5, 2.5)), 4)
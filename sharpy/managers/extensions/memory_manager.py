@@ -1,15 +1,19 @@
 from collections import deque
 from typing import Dict, Set, Deque, List, Optional
 
+import numpy as np
+
 from sc2.position import Point2
 from sharpy.events import UnitDestroyedEvent
 from sharpy.interfaces import IMemoryManager
-from sharpy.managers.core import ManagerBase
+from sharpy.managers.core import ManagerBase, VisibilityManager
 from sc2 import UnitTypeId, Race
 from sc2.unit import Unit
 from sc2.units import Units
 
 MAX_SNAPSHOTS_PER_UNIT = 10
+# Cells around the snapshot position that must be visible for the unit to be known to have left
+SNAPSHOT_CELL_OFFSETS = np.array([(0, 0), (1, 0), (0, 1), (1, 1)], dtype=np.float64)
 
 BURROWED_ALIAS: Set[UnitTypeId] = {
     UnitTypeId.BANELINGBURROWED,
@@ -51,9 +55,11 @@ class MemoryManager(ManagerBase, IMemoryManager):
         self.unit_dict: Dict[int, Deque[Unit]] = dict()
         self.expire_air = 60  # Time in seconds when snapshot expires
         self.expire_ground = 360  # Time in seconds when snapshot expires
+        self.visibility: Optional[VisibilityManager] = None
 
     async def start(self, knowledge: "Knowledge"):
         await super().start(knowledge)
+        self.visibility = knowledge.get_manager(VisibilityManager)
 
         if knowledge.my_race == Race.Protoss:
             self.detectors = {UnitTypeId.PHOTONCANNON, UnitTypeId.OBSERVER, UnitTypeId.OBSERVERSIEGEMODE}
@@ -93,23 +99,11 @@ class MemoryManager(ManagerBase, IMemoryManager):
 
         memory_tags_to_remove = list()
 
-        for unit_tag in self._memory_units_by_tag:
-            if self.is_unit_visible(unit_tag):
-                continue
-
-            snap = self.get_latest_snapshot(unit_tag)
-            points: List[Point2] = []
-            points.append(Point2((int(snap.position.x), int(snap.position.y))))
-            points.append(Point2((int(snap.position.x + 1), int(snap.position.y))))
-            points.append(Point2((int(snap.position.x), int(snap.position.y + 1))))
-            points.append(Point2((int(snap.position.x + 1), int(snap.position.y + 1))))
-
-            visible = True
-
-            for point in points:
-                if not self.ai.is_visible(point):
-                    visible = False
+        hidden_tags = [tag for tag in self._memory_units_by_tag if not self.is_unit_visible(tag)]
+        snaps = [self.get_latest_snapshot(tag) for tag in hidden_tags]
+        snaps_visible = self.snapshot_areas_visible(snaps)
 
+        for unit_tag, snap, visible in zip(hidden_tags, snaps, snaps_visible):
             expired = self.check_expiration(snap)
 
             if expired:
@@ -176,6 +170,20 @@ class MemoryManager(ManagerBase, IMemoryManager):
         unit: Optional[Unit] = self.unit_dict.get(unit_tag, None)
         return unit is not None and not unit.is_memory
 
+    def snapshot_areas_visible(self, snaps: List[Unit]) -> List[bool]:
+        """Returns true for each snapshot whose surrounding cells are all visible on this frame."""
+        if not snaps:
+            return []
+
+        positions = np.floor(np.array([snap.position_tuple for snap in snaps], dtype=np.float64))
+        cells = (positions[:, None, :] + SNAPSHOT_CELL_OFFSETS[None, :, :]).reshape(-1, 2)
+
+        if self.visibility is not None:
+            visible = self.visibility.is_visible_batch(cells)
+        else:
+            visible = np.array([self.ai.is_visible(Point2(cell)) for cell in cells], dtype=bool)
+        return visible.reshape(-1, len(SNAPSHOT_CELL_OFFSETS)).all(axis=1).tolist()
+
     def on_unit_destroyed(self, event: UnitDestroyedEvent):
         """Call this when a unit is destroyed, to make sure that the unit is erased from memory."""
         # Remove the unit from frozen dictionaries.
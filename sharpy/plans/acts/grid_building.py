@@ -252,70 +252,52 @@ class GridBuilding(ActBuilding):
 
     def position_protoss(self, count) -> Optional[Point2]:
         is_pylon = self.unit_type == UnitTypeId.PYLON
-        buildings = self.ai.structures
-        matrix = self.ai.state.psionic_matrix
-        future_position = None
+        slots = self.building_solver.slots
 
         iterator = self.get_iterator(is_pylon, count)
 
         if is_pylon:
-            for point in self.building_solver.buildings2x2[::iterator]:
-                if not buildings.closer_than(1, point):
-                    return point
-        else:
-            pylons = self.cache.own(UnitTypeId.PYLON).not_ready
-            for point in self.building_solver.buildings3x3[::iterator]:
-                if not self.allow_wall:
-                    if point in self.building_solver.wall3x3:
-                        continue
-                if not buildings.closer_than(1, point) and matrix.covers(point):
-                    return point
+            return slots.first(2, step=iterator)
 
-                if future_position is None and pylons and point.distance_to_closest(pylons) <= 7:
-                    future_position = point
+        position = slots.first(3, power=True, allow_wall=self.allow_wall, step=iterator)
+        if position is not None:
+            return position
 
-        return future_position
+        pylons = self.cache.own(UnitTypeId.PYLON).not_ready
+        if pylons:
+            for point in slots.slots(3, allow_wall=self.allow_wall, step=iterator):
+                if point.distance_to_closest(pylons) <= 7:
+                    return point
+        return None
 
     def position_zerg(self, count) -> Optional[Point2]:
-        buildings = self.ai.structures
-        creep = self.ai.state.creep
-        future_position = None
-
-        for point in self.building_solver.buildings3x3:
-            if not buildings.closer_than(1, point) and self.is_on_creep(creep, point):
-                return point
-
-        return future_position
+        return self.building_solver.slots.first(3, creep=True)
 
     def position_terran(self, count) -> Optional[Point2]:
         is_depot = self.unit_type == UnitTypeId.SUPPLYDEPOT
-        buildings = self.ai.structures
-        future_position = None
+        slots = self.building_solver.slots
 
         if is_depot:
-            for point in self.building_solver.buildings2x2:
-                if not buildings.closer_than(1, point):
-                    return point
-        else:
-            pylons = self.cache.own(UnitTypeId.PYLON).not_ready
-            reserved_landing_locations: Set[Point2] = set(self.building_solver.structure_target_move_location.values())
-            for point in self.building_solver.buildings3x3:
-                if not self.allow_wall:
-                    if point in self.building_solver.wall3x3:
-                        continue
-                # If a structure is landing here from AddonSwap() then dont use this location
-                if point in reserved_landing_locations:
-                    continue
-                # If this location has a techlab or reactor next to it, then don't create a new structure here
-                if point in self.building_solver.free_addon_locations:
-                    continue
-                if not buildings.closer_than(1, point):
-                    return point
+            return slots.first(2)
+
+        reserved_landing_locations: Set[Point2] = set(self.building_solver.structure_target_move_location.values())
+        free_addon_locations = self.building_solver.free_addon_locations
 
-                if future_position is None and pylons and point.distance_to_closest(pylons) <= 7:
-                    future_position = point
+        def is_excluded(point: Point2) -> bool:
+            # If a structure is landing here from AddonSwap() then dont use this location
+            # If this location has a techlab or reactor next to it, then don't create a new structure here
+            return point in reserved_landing_locations or point in free_addon_locations
 
-        return future_position
+        for point in slots.ready(3, allow_wall=self.allow_wall):
+            if not is_excluded(point):
+                return point
+
+        pylons = self.cache.own(UnitTypeId.PYLON).not_ready
+        if pylons:
+            for point in slots.slots(3, allow_wall=self.allow_wall):
+                if not is_excluded(point) and point.distance_to_closest(pylons) <= 7:
+                    return point
+        return None
 
     def get_iterator(self, is_pylon, count):
         if self.iterator is None:
@@ -1,6 +1,9 @@
+from typing import Dict, List, Optional, Tuple
+
 from sc2 import UnitTypeId, AbilityId
+from sc2.position import Point2
 from sc2.unit import Unit
-from sharpy.interfaces import IGatherPointSolver, IZoneManager
+from sharpy.interfaces import IBuildingSolver, IGatherPointSolver, IZoneManager
 from sharpy.managers.core import PathingManager
 
 from sharpy.managers.core.roles import UnitTask
@@ -8,11 +11,19 @@ from sc2.units import Units
 from sharpy.plans.acts.act_base import ActBase
 
 
+WARP_IN_RADIUS = 7
+# Warpgate that is ready again this soon after a warp-in order did not warp the unit in
+WARP_RETRY_TIME = 2
+# Seconds that a spot where a warp-in did not happen is not used
+FAILED_SPOT_TIME = 10
+
+
 class WarpUnit(ActBase):
     """Use Warp Gates (Protoss) to build units."""
 
     gather_point_solver: IGatherPointSolver
     zone_manager: IZoneManager
+    building_solver: Optional[IBuildingSolver]
 
     def __init__(self, unit_type: UnitTypeId, to_count: int = 9999, priority: bool = False):
         assert unit_type is not None and isinstance(unit_type, UnitTypeId)
@@ -22,6 +33,10 @@ class WarpUnit(ActBase):
         self.unit_type = unit_type
         self.to_count = to_count
         self.priority = priority
+        # Position and time of the last warp-in order of each warpgate
+        self._warp_orders: Dict[int, Tuple[Point2, float]] = {}
+        # Time until each failed warp-in spot can be used again
+        self._failed_spots: Dict[Point2, float] = {}
 
         super().__init__()
 
@@ -30,6 +45,7 @@ class WarpUnit(ActBase):
         self.gather_point_solver = knowledge.get_required_manager(IGatherPointSolver)
         self.zone_manager = knowledge.get_required_manager(IZoneManager)
         self.pather = knowledge.get_manager(PathingManager)
+        self.building_solver = knowledge.get_manager(IBuildingSolver)
 
     @property
     def is_done(self) -> bool:
@@ -80,19 +96,64 @@ class WarpUnit(ActBase):
                     # Waiting for warp prism
                     return False
 
-            for warpgate in warpgates.ready:
-                if await self.ready_to_warp(warpgate):
-                    pos = near_position.to2.random_on_distance(6)
-                    placement = await self.ai.find_placement(AbilityId.WARPGATETRAIN_STALKER, pos, placement_step=1)
-                    if placement is None:
-                        # return ActionResult.CantFindPlacementLocation
-                        self.knowledge.print("can't find place to warp in")
-                        return False
-                    if not self.pather or self.pather.map.is_connected(placement):
-                        warpgate.warp_in(unit_type, placement)
+            ready = [warpgate for warpgate in warpgates.ready if await self.ready_to_warp(warpgate)]
+            self.update_failed_spots(ready)
+
+            spots: List[Point2] = []
+            if self.building_solver is not None:
+                spots = self.warp_in_spots(near_position, len(ready))
+            for warpgate, spot in zip(ready, spots):
+                self.warp_in(warpgate, unit_type, spot)
+
+            # Search placements for the rest of the warpgates when there are not enough spots
+            for warpgate in ready[len(spots) :]:
+                pos = near_position.to2.random_on_distance(6)
+                placement = await self.ai.find_placement(AbilityId.WARPGATETRAIN_STALKER, pos, placement_step=1)
+                if placement is None:
+                    # return ActionResult.CantFindPlacementLocation
+                    self.knowledge.print("can't find place to warp in")
+                    return False
+                self.warp_in(warpgate, unit_type, placement)
 
         elif self.priority:
             unit = self.ai._game_data.units[unit_type.value]
             cost = self.ai._game_data.calculate_ability_cost(unit.creation_ability)
             self.knowledge.reserve(cost.minerals, cost.vespene)
         return False
+
+    def warp_in(self, warpgate: Unit, unit_type: UnitTypeId, position: Point2):
+        if self.pather and not self.pather.map.is_connected(position):
+            self._failed_spots[position] = self.ai.time + FAILED_SPOT_TIME
+            return
+
+        warpgate.warp_in(unit_type, position)
+        self._warp_orders[warpgate.tag] = (position, self.ai.time)
+
+    def update_failed_spots(self, ready: List[Unit]):
+        """ Warpgates that are ready again right after their warp-in order did not warp in, those spots have failed. """
+        time = self.ai.time
+        for warpgate in ready:
+            order = self._warp_orders.pop(warpgate.tag, None)
+            if order is not None and time - order[1] <= WARP_RETRY_TIME:
+                self._failed_spots[order[0]] = time + FAILED_SPOT_TIME
+
+        self._failed_spots = {spot: until for spot, until in self._failed_spots.items() if until > time}
+
+    def warp_in_spots(self, near_position: Point2, count: int) -> List[Point2]:
+        """
+        Powered and pathable warp-in positions near the position with least enemy influence.
+        Cells of ground units and the spots where warp-in failed recently are not used.
+        """
+        if count <= 0:
+            return []
+
+        units = self.ai.all_units.closer_than(WARP_IN_RADIUS + 1, near_position)
+        blocked = [unit.position for unit in units if not unit.is_flying]
+        blocked.extend(self._failed_spots.keys())
+        influence = None
+        if self.pather:
+            influence = self.pather.ground_influence()
+
+        placement = self.building_solver.placement
+        spots = placement.warp_in_spots(near_position, count, WARP_IN_RADIUS, blocked, influence)
+        return [Point2(spot) for spot in spots]
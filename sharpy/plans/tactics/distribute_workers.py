@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict
 
-from sc2.constants import IS_COLLECTING, ALL_GAS
+from sc2.constants import ALL_GAS
 from sharpy.managers.core import UnitRoleManager
 from sharpy.managers.core.unit_value import buildings_5x5, UnitValue
 from sharpy.plans.acts import ActBase
@@ -8,8 +8,8 @@ from sc2.ids.buff_id import BuffId
 from sc2.units import Units
 
 from sharpy.managers.core.roles import UnitTask
-from sc2 import AbilityId
-from sc2.unit import Unit, UnitOrder
+from sc2 import AbilityId, UnitTypeId
+from sc2.unit import Unit
 
 from sharpy.knowledges import Knowledge
 from sharpy.general.zone import Zone
@@ -174,32 +174,29 @@ class DistributeWorkers(ActBase):
             # can't mine anything
             return
 
-        for worker in self.ai.workers:
-            # worker.is_gathering
-            if worker.orders:
-                order: UnitOrder = worker.orders[-1]
-
-                if order.ability.id in IS_COLLECTING and isinstance(order.target, int):
-                    obj = self.cache.by_tag(order.target)
-                    if obj:
-                        # if obj.mineral_contents > 0:
-                        if obj.is_mineral_field > 0:
-                            townhall = self.ai.townhalls.closest_to(obj)
-                            self.add_worker(worker, townhall)
-                        elif obj.type_id in ALL_GAS:
-                            self.add_worker(worker, obj)
-
-                        if obj.type_id in buildings_5x5:
-                            if worker.is_carrying_minerals:
-                                self.add_worker(worker, obj)
-                            elif worker.is_carrying_vespene:
-                                if self.ai.gas_buildings:
-                                    gas_building = self.ai.gas_buildings.closest_to(worker)
-                                    self.add_worker(worker, gas_building)
-
-                        # self.print(
-                        #     f"worker {worker.tag} is {order.ability.id.name} to {order.target} {obj.type_id.name}"
-                        # )
+        for target_tag, worker_tags in self.cache.workers_by_target.items():
+            obj = self.cache.by_tag(target_tag)
+            if not obj:
+                continue
+
+            for worker in self.cache.by_tags(worker_tags):
+                if worker.type_id == UnitTypeId.MULE:
+                    continue
+
+                # if obj.mineral_contents > 0:
+                if obj.is_mineral_field > 0:
+                    townhall = self.ai.townhalls.closest_to(obj)
+                    self.add_worker(worker, townhall)
+                elif obj.type_id in ALL_GAS:
+                    self.add_worker(worker, obj)
+
+                if obj.type_id in buildings_5x5:
+                    if worker.is_carrying_minerals:
+                        self.add_worker(worker, obj)
+                    elif worker.is_carrying_vespene:
+                        if self.ai.gas_buildings:
+                            gas_building = self.ai.gas_buildings.closest_to(worker)
+                            self.add_worker(worker, gas_building)
 
     def generate_worker_queue(self):
         self.work_queue.clear()
@@ -343,3 +340,4 @@ class DistributeWorkers(ActBase):
             worker.gather(work, queue=True)
         else:
             worker.gather(work)
+        self.cache.assign_worker(worker, work)
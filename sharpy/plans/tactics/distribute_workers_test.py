@@ -3,6 +3,7 @@ import sys
 from random import randint
 from typing import Optional, Union, List
 
+import numpy as np
 import pytest
 from unittest import mock
 
@@ -52,7 +53,7 @@ def mock_ai() -> BotAI:
     ai._distances_override_functions(0)
     ai.actions = []
     ai.config = {"general": mock.Mock(), "debug_log": mock.Mock()}
-    ai.config["general"].getboolean = lambda x: False
+    ai.config["general"].getboolean = lambda x, fallback=False: False
     ai.config["debug_log"].getboolean = lambda x, fallback: False
     ai.my_race = Race.Protoss
     ai.enemy_race = Race.Protoss
@@ -124,11 +125,18 @@ async def mock_knowledge(ai) -> Knowledge:
     knowledge.pathing_manager.start = fake
     knowledge.pathing_manager.path_finder_terrain = mock.Mock()
     knowledge.pathing_manager.map.get_zone = lambda param: 1 if param.distance_to(ai.start_location) < 12 else 2
+    knowledge.pathing_manager.map.zone_grid = lambda: np.array(
+        [[knowledge.pathing_manager.map.get_zone(Point2((x, y))) for y in range(100)] for x in range(100)]
+    )
 
     knowledge.pathing_manager.path_finder_terrain.find_path = lambda p1, p2: (
         [p1, p2],
         math.hypot(p1[0] - p2[0], p1[1] - p2[1]),
     )
+    knowledge.pathing_manager.init_distance_table = lambda points: None
+    knowledge.pathing_manager.path_finder_terrain.find_paths_batch = lambda starts, ends, executor=None: [
+        knowledge.pathing_manager.path_finder_terrain.find_path(p1, p2) for p1, p2 in zip(starts, ends)
+    ]
     managers = [
         UnitCacheManager(),
         UnitValue(),
@@ -616,3 +624,46 @@ class TestDistributeWorkers:
         await distribute_workers.start(knowledge)
         await distribute_workers.execute()
         assert len(ai.actions) == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_workers_spread_to_mineral_fields(self):
+        distribute_workers = DistributeWorkers()
+        ai = mock_ai()
+
+        mineral = create_mineral(ai, Point2((16, 12)))
+        ai._resource_location_to_expansion_position_dict[mineral.position] = MAIN_POINT
+
+        mock_unit(ai, UnitTypeId.NEXUS, Point2(MAIN_POINT))
+        worker1 = mock_unit(ai, UnitTypeId.PROBE, Point2((20, 10)))
+        worker2 = mock_unit(ai, UnitTypeId.PROBE, Point2((20, 10)))
+
+        knowledge = await mock_knowledge(ai)
+        knowledge.roles.set_task(0, worker1)
+        knowledge.roles.set_task(0, worker2)
+        await distribute_workers.start(knowledge)
+        await distribute_workers.execute()
+
+        assert len(ai.actions) == 2
+        assert {action.target.tag for action in ai.actions} == {ai.mineral_field[0].tag, mineral.tag}
+
+    @pytest.mark.asyncio
+    async def test_go_mine_picks_least_gathered_mineral_field(self):
+        ai = mock_ai()
+
+        mineral = create_mineral(ai, Point2((16, 12)))
+        ai._resource_location_to_expansion_position_dict[mineral.position] = MAIN_POINT
+
+        mock_unit(ai, UnitTypeId.NEXUS, Point2(MAIN_POINT))
+        worker1 = mock_unit(ai, UnitTypeId.PROBE, Point2((20, 10)))
+        worker2 = mock_unit(ai, UnitTypeId.PROBE, Point2((20, 10)))
+
+        knowledge = await mock_knowledge(ai)
+        zone: Zone = knowledge.zone_manager.expansion_zones[0]
+        assert len(zone.mineral_fields) == 2
+
+        # Workers are sent to the field with fewest gatherers instead of always to the first field of the zone
+        zone.go_mine(worker1)
+        zone.go_mine(worker2)
+
+        assert len(ai.actions) == 2
+        assert {action.target.tag for action in ai.actions} == {mf.tag for mf in zone.mineral_fields}
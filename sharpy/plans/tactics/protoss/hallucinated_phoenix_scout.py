@@ -117,7 +117,7 @@ class HallucinatedPhoenixScout(ActBase):
             # won't live long enough to scout all bases.
             targets = self.zone_manager.enemy_expansion_zones
 
-        targets.sort(key=lambda z: z.last_scouted_mineral_line)
+        targets = sorted(targets, key=lambda z: z.last_scouted_mineral_line)
         if len(targets) > 0:
             return targets[0].mineral_line_center
 
@@ -1,8 +1,9 @@
 import random
-from typing import Optional, Dict, Set
+from typing import Optional, Dict, List, Set, Tuple
 import numpy as np
 
 from sc2.units import Units
+from sharpy.general.creep_frontier import CreepFrontier, far_from
 from sharpy.interfaces import IBuildingSolver
 from sharpy.managers.core import BuildingSolver
 from sharpy.managers.core.grids import BlockerType, BuildArea
@@ -23,6 +24,8 @@ TOWNHALL_MIN_DISTANCE = 10
 CREEP_TUMOR_MIN_DISTANCE = 8
 # Can be lowered to improve creep spread accuracy, or increased to improve performance
 CREEP_TARGET_INTERVAL = 10
+# Creep tumors can plant new tumors closer than this
+CREEP_TUMOR_CAST_RANGE = 9
 
 # todo:
 # * don't spread creep if hostiles are near
@@ -46,6 +49,11 @@ class SpreadCreepV2(ActBase):
         self.reserved_expansion_positions: Set[Point2] = set()
         # Locations where a tumor is about to spawn or currently spawning
         self.tumor_used_locations: Set[Point2] = set()
+        self.frontier: Optional[CreepFrontier] = None
+        self._target_points = np.zeros((0, 2))
+        self._reserved_mask: Optional[np.ndarray] = None
+        self._placeable_mask: Optional[np.ndarray] = None
+        self._placeable_version = -1
         super().__init__()
 
     async def start(self, knowledge: "Knowledge"):
@@ -53,6 +61,8 @@ class SpreadCreepV2(ActBase):
         self.ai = knowledge.ai
         self.create_target_tumor_locations()
         self.fill_reserved_expansion_positions()
+        # Pixel map is indexed with [y][x]
+        self.frontier = CreepFrontier(self.ai.game_info.pathing_grid.data_numpy.T != 0)
         return await super().start(knowledge)
 
     def create_target_tumor_locations(self):
@@ -65,6 +75,7 @@ class SpreadCreepV2(ActBase):
             for y in range(CREEP_TARGET_INTERVAL, map_shape[0], CREEP_TARGET_INTERVAL)
             if pathing_grid[y, x] == 1
         ]
+        self._target_points = np.array(self.target_tumor_locations, dtype=np.float64).reshape(-1, 2)
 
     def fill_reserved_expansion_positions(self):
         """ Fill all locations where no creep tumor should be planted at. """
@@ -74,6 +85,20 @@ class SpreadCreepV2(ActBase):
                 for y in range(-2, 3):
                     self.reserved_expansion_positions.add(Point2((x + xx, y + yy)))
 
+    def placeable_mask(self) -> np.ndarray:
+        """ Cells that `is_placeable` accepts regardless of creep and planned tumors, solved when the grid changes. """
+        grid = self.building_solver.grid
+        if self._reserved_mask is None:
+            self._reserved_mask = np.zeros((grid.width, grid.height), dtype=bool)
+            for x, y in self.reserved_expansion_positions:
+                if 0 <= x < grid.width and 0 <= y < grid.height:
+                    self._reserved_mask[int(x), int(y)] = True
+
+        if self._placeable_version != grid.version:
+            self._placeable_version = grid.version
+            self._placeable_mask = grid.area_mask(grid.cells["Area"], areas) & ~self._reserved_mask
+        return self._placeable_mask
+
     async def execute(self) -> bool:
         tumors = self.cache.own(UnitTypeId.CREEPTUMORBURROWED)
 
@@ -93,8 +118,8 @@ class SpreadCreepV2(ActBase):
         Filter 'self.target_tumor_locations' by:
             - Remove all locations that already have a townhall nearby
             - Remove all locations that already have a creep tumor nearby
+        Also updates the creep frontier that tumor targets are selected from.
         """
-        self.available_tumor_locations.clear()
         # expansions: List[Point2] = self.ai.expansion_locations_list
         townhalls: Units = self.cache.own_townhalls
         tumors: Units = self.cache.own(
@@ -107,28 +132,44 @@ class SpreadCreepV2(ActBase):
             if isinstance(tumor.order_target, Point2):
                 self.tumor_used_locations.add(tumor.order_target.rounded)
 
-        for point in self.target_tumor_locations:  # type: Point2
-            if townhalls and townhalls.closest_distance_to(point) < TOWNHALL_MIN_DISTANCE:
-                continue
-            if tumors and tumors.closest_distance_to(point) < CREEP_TUMOR_MIN_DISTANCE:
-                continue
-            if (
-                self.tumor_used_locations
-                and point.distance_to_closest(self.tumor_used_locations) < CREEP_TUMOR_MIN_DISTANCE
-            ):
-                continue
-            self.available_tumor_locations.append(point)
+        townhall_positions = [townhall.position for townhall in townhalls]
+        tumor_positions = [tumor.position for tumor in tumors]
+        available = (
+            far_from(self._target_points, townhall_positions, TOWNHALL_MIN_DISTANCE)
+            & far_from(self._target_points, tumor_positions, CREEP_TUMOR_MIN_DISTANCE)
+            & far_from(self._target_points, list(self.tumor_used_locations), CREEP_TUMOR_MIN_DISTANCE)
+        )
+        self.available_tumor_locations = [self.target_tumor_locations[i] for i in np.flatnonzero(available)]
+
+        self.frontier.set_creep(self.ai.state.creep.data_numpy)
+        self.frontier.set_visibility(self.ai.state.visibility.data_numpy)
+        self.frontier.set_placeable(self.placeable_mask())
+        self.frontier.set_sources(townhall_positions + tumor_positions + list(self.tumor_used_locations))
 
     async def spread_creep_tumors(self):
         """ Orders tumors to plant new tumors. """
         tumors = self.cache.own(UnitTypeId.CREEPTUMORBURROWED)
+        ready: List[Unit] = [
+            tumor
+            for tumor in tumors
+            if self.knowledge.cooldown_manager.is_ready(tumor.tag, AbilityId.BUILD_CREEPTUMOR_TUMOR)
+        ]
+        if not ready:
+            return
+
+        targets = self.frontier.best_targets(
+            [tumor.position for tumor in ready], CREEP_TUMOR_CAST_RANGE, CREEP_TUMOR_MIN_DISTANCE
+        )
 
-        for tumor in tumors:  # type: Unit
-            if self.knowledge.cooldown_manager.is_ready(tumor.tag, AbilityId.BUILD_CREEPTUMOR_TUMOR):
+        for tumor, target in zip(ready, targets):  # type: Unit, Optional[Tuple[int, int]]
+            if target is not None:
+                position = Point2(target)
+            else:
                 position = self.get_next_creep_tumor_position(tumor)
-                if position:
-                    self.knowledge.cooldown_manager.used_ability(tumor.tag, AbilityId.BUILD_CREEPTUMOR_TUMOR)
-                    tumor(AbilityId.BUILD_CREEPTUMOR_TUMOR, position)
+
+            if position:
+                self.knowledge.cooldown_manager.used_ability(tumor.tag, AbilityId.BUILD_CREEPTUMOR_TUMOR)
+                tumor(AbilityId.BUILD_CREEPTUMOR_TUMOR, position)
 
     async def spawn_creep_tumors(self):
         """ Order queens to plant tumors. """
@@ -0,0 +1,79 @@
+"""
+Benchmark for batched path queries compared to solving the paths one by one.
+Run from repository root: python tools/benchmark_batch_paths.py [workers]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Set working dir to root of repository.
+script_path = Path(os.path.abspath(__file__))
+assert script_path.parent.stem == "tools", "`This script expects to be in tools folder under repository root.`"
+os.chdir(script_path.parent.parent)
+sys.path.insert(0, os.getcwd())
+
+from sc2pathlib import PathFinder
+
+WIDTH = 200
+HEIGHT = 180
+QUERIES = 200
+
+
+def create_grid() -> np.ndarray:
+    """ Open map with vertical walls that have a few gaps in them. """
+    grid = np.zeros((WIDTH, HEIGHT), dtype=np.uint8)
+    grid[2 : WIDTH - 2, 2 : HEIGHT - 2] = 1
+    for x in range(25, WIDTH - 25, 30):
+        grid[x : x + 3, :] = 0
+        grid[x : x + 3, 20:26] = 1
+        grid[x : x + 3, HEIGHT - 26 : HEIGHT - 20] = 1
+    return grid
+
+
+def measure(name: str, func, repeats: int = 3) -> float:
+    best = None
+    for _ in range(0, repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    print(f"{name}: {best * 1000:.1f} ms")
+    return best
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    grid = create_grid()
+    path_finder = PathFinder(grid)
+
+    random = np.random.RandomState(0)
+    starts = np.column_stack((random.uniform(3, 20, QUERIES), random.uniform(3, HEIGHT - 3, QUERIES)))
+    ends = np.column_stack((random.uniform(WIDTH - 20, WIDTH - 3, QUERIES), random.uniform(3, HEIGHT - 3, QUERIES)))
+
+    def loop():
+        return [path_finder.find_path((start[0], start[1]), (end[0], end[1])) for start, end in zip(starts, ends)]
+
+    print(f"{QUERIES} path queries on {WIDTH}x{HEIGHT} grid")
+    loop_time = measure("loop", loop)
+    measure("batch", lambda: path_finder.find_paths_batch(starts, ends))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Warm up the worker processes
+        path_finder.find_paths_batch(starts, ends, executor=executor)
+        pool_time = measure(
+            f"batch with {workers} workers", lambda: path_finder.find_paths_batch(starts, ends, executor=executor)
+        )
+
+    print(f"Speedup with workers: {loop_time / pool_time:.2f}x")
+
+    expected = np.array([result[1] for result in loop()])
+    assert np.allclose(path_finder.walk_distances_batch(starts, ends), expected)
+
+
+if __name__ == "__main__":
+    main()
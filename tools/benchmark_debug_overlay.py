@@ -0,0 +1,133 @@
+"""
+Benchmark for building solver debug drawing, frame time with debug off compared to debug on.
+Run from repository root: python tools/benchmark_debug_overlay.py
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+# Set working dir to root of repository.
+script_path = Path(os.path.abspath(__file__))
+assert script_path.parent.stem == "tools", "`This script expects to be in tools folder under repository root.`"
+os.chdir(script_path.parent.parent)
+sys.path.insert(0, os.getcwd())
+
+from sc2 import Race
+from sc2.position import Point2, Point3
+
+from sharpy.managers.core import BuildingSolver
+from sharpy.managers.core.grids import BuildArea, BuildGrid
+
+SIZE = 160
+FRAMES = 100
+
+
+class CountingClient:
+    def __init__(self):
+        self.boxes = 0
+
+    def debug_box_out(self, c1, c2, color=None):
+        self.boxes += 1
+
+
+def create_grid() -> BuildGrid:
+    """Build grid of a fully buildable map without expansions or resources."""
+    game_info = SimpleNamespace(
+        placement_grid=SimpleNamespace(width=SIZE, height=SIZE, data_numpy=np.ones((SIZE, SIZE), dtype=np.uint8)),
+        terrain_height=SimpleNamespace(data_numpy=np.full((SIZE, SIZE), 128, dtype=np.uint8)),
+        map_ramps=[],
+    )
+    ai = SimpleNamespace(
+        game_info=game_info, destructables=[], mineral_field=[], vespene_geyser=[], expansion_locations={}
+    )
+    return BuildGrid(SimpleNamespace(ai=ai, zone_manager=SimpleNamespace(expansion_zones=[])))
+
+
+def create_solver() -> BuildingSolver:
+    solver = BuildingSolver()
+    solver.grid = create_grid()
+    solver.pather = None
+    solver._debug = True
+    solver.knowledge = SimpleNamespace(
+        my_race=Race.Protoss, debug=True, terrain_to_z_height=lambda h: -16 + 32 * h / 255
+    )
+    solver.ai = SimpleNamespace(
+        start_location=Point2((10, 10)),
+        game_info=SimpleNamespace(
+            map_center=Point2((SIZE / 2, SIZE / 2)),
+            terrain_height=SimpleNamespace(data_numpy=np.full((SIZE, SIZE), 128, dtype=np.uint8)),
+        ),
+        state=SimpleNamespace(
+            observation_raw=SimpleNamespace(player=SimpleNamespace(camera=SimpleNamespace(x=40, y=40)))
+        ),
+        _client=CountingClient(),
+    )
+    candidates = np.zeros((SIZE, SIZE), dtype=bool)
+    candidates[20 : SIZE - 20, 20 : SIZE - 20] = True
+    solver.fill_zone(Point2((SIZE / 2, SIZE / 2)), None, candidates)
+    return solver
+
+
+def draw_per_cell(solver: BuildingSolver):
+    """Debug drawing as it was done before caching, every cell is queried each frame."""
+    client = solver.ai._client
+    colors = {
+        BuildArea.Building: solver.grid.building_color,
+        BuildArea.TownHall: solver.grid.townhall_color,
+        BuildArea.Pylon: solver.grid.pylon_color,
+        BuildArea.Mineral: solver.grid.mineral_color,
+        BuildArea.Gas: solver.grid.gas_color,
+    }
+    heights = solver.ai.game_info.terrain_height.data_numpy
+    for x in range(0, solver.grid.width - 1):
+        for y in range(0, solver.grid.height - 1):
+            color = colors.get(solver.grid.get(x, y).Area)
+            if color is not None:
+                z = solver.knowledge.terrain_to_z_height(float(heights[y + 1, x]))
+                client.debug_box_out(Point3((x, y, z)), Point3((x + 1, y + 1, z + 1)), color)
+
+
+def measure(name: str, func, repeats: int = 3) -> float:
+    best = None
+    for _ in range(0, repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    print(f"{name}: {best * 1000 / FRAMES:.3f} ms / frame")
+    return best
+
+
+def main():
+    solver = create_solver()
+    loop = asyncio.new_event_loop()
+
+    def frames(debug: bool, changed: bool = False):
+        solver.knowledge.debug = debug
+        for _ in range(0, FRAMES):
+            if changed:
+                solver.grid.changed()
+            loop.run_until_complete(solver.post_update())
+
+    print(f"{len(solver.debug_boxes())} debug boxes on {SIZE}x{SIZE} grid, {FRAMES} frames")
+    off_time = measure("debug off", lambda: frames(False))
+    on_time = measure("debug on, cached boxes", lambda: frames(True))
+    measure("debug on, grid changed every frame", lambda: frames(True, True))
+
+    solver.debug_camera_radius = 30
+    measure("debug on, cached boxes near camera", lambda: frames(True))
+    solver.debug_camera_radius = None
+
+    per_cell_time = measure("debug on, per cell drawing", lambda: [draw_per_cell(solver) for _ in range(0, FRAMES)])
+    print(f"Cached drawing overhead: {(on_time - off_time) * 1000 / FRAMES:.3f} ms / frame")
+    print(f"Speedup compared to per cell drawing: {per_cell_time / on_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()